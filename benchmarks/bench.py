@@ -0,0 +1,270 @@
+import json
+import os
+import platform
+import statistics
+import subprocess  # nosec B404 - runs the interpreter itself, see bench_import
+import sys
+import time
+import click
+import numpy as np
+from loguru import logger
+from src import instrumentation
+from src.batch import generate_batch
+from src.grid import Grid
+
+GENERATE_SIZES = (9, 32, 128, 512)
+SEED = 0
+
+# directory holding the src package, where the import benchmark runs
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(setup, repeat: int) -> list:
+    """Time a benchmark.
+
+    Args:
+        setup (callable): builds the state of one run, not timed, and returns
+            the function to time
+        repeat (int): number of runs
+
+    Returns:
+        list: duration of every run in seconds
+    """
+    durations = []
+
+    for _ in range(repeat):
+        run = setup()
+        start = time.perf_counter()
+        run()
+        durations.append(time.perf_counter() - start)
+
+    return durations
+
+
+def generated_states(size: int) -> np.ndarray:
+    """Tile ids of the map generated from the fixed seed.
+
+    Args:
+        size (int): grid size
+
+    Returns:
+        np.ndarray: tile ids of shape (size, size)
+    """
+    grid = Grid(size, seed=SEED)
+    grid.generate_map()
+
+    return grid.states.copy()
+
+
+def bench_import(size: int) -> tuple:
+    """Start a process importing the generation modules, the cold start of a worker."""
+    command = [sys.executable, "-c", "import src.grid, src.batch, src.farm, src.dataset"]
+
+    def setup():
+        return lambda: subprocess.run(command, cwd=ROOT, check=True)  # nosec B603
+
+    return setup, 1
+
+
+def bench_grid_construction(size: int) -> tuple:
+    """Build a grid."""
+    def setup():
+        return lambda: Grid(size, seed=SEED)
+
+    return setup, size * size
+
+
+def bench_generate_map(size: int) -> tuple:
+    """Generate a map, from the construction of the grid to the rendering."""
+    def setup():
+        return lambda: Grid(size, seed=SEED).generate_map()
+
+    return setup, size * size
+
+
+def bench_lowest_entropy(size: int) -> tuple:
+    """Select every cell of a grid in entropy order."""
+    def setup():
+        grid = Grid(size, seed=SEED)
+
+        def run():
+            for _ in range(size * size):
+                grid._lowest_entropy()
+
+        return run
+
+    return setup, size * size
+
+
+def bench_update_neighbours(size: int) -> tuple:
+    """Update the four neighbours of every cell, collapsed to a solved map."""
+    states = generated_states(size)
+
+    def setup():
+        grid = Grid(size, propagation="neighbours", seed=SEED)
+        cells = list(grid._cells.flat)
+
+        def run():
+            for cell in cells:
+                grid._states[cell.row, cell.column] = states[cell.row, cell.column]
+                grid._update_neighbours(cell)
+
+        return run
+
+    return setup, size * size
+
+
+def bench_propagate(size: int) -> tuple:
+    """Collapse every cell to a solved map and propagate until arc consistency."""
+    states = generated_states(size)
+
+    def setup():
+        grid = Grid(size, seed=SEED)
+
+        def run():
+            for row in range(size):
+                for column in range(size):
+                    grid.collapse(row, column, int(states[row, column]))
+                    grid._propagate(row, column)
+
+        return run
+
+    return setup, size * size
+
+
+def bench_populate_map(size: int) -> tuple:
+    """Render the patterns of a grid."""
+    def setup():
+        grid = Grid(size, seed=SEED)
+        grid._states[...] = np.random.default_rng(SEED).integers(0, 8, size=(size, size))
+
+        return grid._populate_map
+
+    return setup, size * size
+
+
+def bench_generate_batch(size: int, count: int = 64) -> tuple:
+    """Generate a batch of maps at once."""
+    def setup():
+        return lambda: generate_batch(size, count, seed=SEED)
+
+    return setup, size * size * count
+
+
+def benchmarks(sizes: tuple) -> list:
+    """Benchmarks to run.
+
+    The benchmarks of a single step run at the largest size up to 128, the
+    import benchmark has no size and is reported with size 0.
+
+    Args:
+        sizes (tuple): grid sizes
+
+    Returns:
+        list: (name, size, factory) of every benchmark, the factory returns
+            the setup function and the number of cells processed by a run
+    """
+    medium = max([size for size in sizes if size <= 128], default=min(sizes))
+
+    return [
+        ("import", 0, bench_import),
+        *[("grid_construction", size, bench_grid_construction) for size in sizes],
+        *[("generate_map", size, bench_generate_map) for size in sizes],
+        ("lowest_entropy", medium, bench_lowest_entropy),
+        ("update_neighbours", medium, bench_update_neighbours),
+        ("propagate", medium, bench_propagate),
+        *[("populate_map", size, bench_populate_map) for size in sizes],
+        ("generate_batch", min(medium, 32), bench_generate_batch),
+    ]
+
+
+def run_benchmarks(sizes: tuple = GENERATE_SIZES, repeat: int = 3, only: tuple = ()) -> dict:
+    """Run the benchmark suite.
+
+    Args:
+        sizes (tuple, optional): grid sizes. Defaults to GENERATE_SIZES.
+        repeat (int, optional): runs of every benchmark. Defaults to 3.
+        only (tuple, optional): names of the benchmarks to run, all when empty.
+
+    Returns:
+        dict: environment and results, ready to be dumped as JSON
+    """
+    previous_level = instrumentation.set_level("off")
+    results = []
+
+    try:
+        for name, size, factory in benchmarks(sizes):
+            if only and name not in only:
+                continue
+
+            setup, cells = factory(size)
+            durations = measure(setup, repeat)
+            best = min(durations)
+            results.append({
+                "name": name,
+                "size": size,
+                "repeat": repeat,
+                "best": best,
+                "median": statistics.median(durations),
+                "mean": statistics.mean(durations),
+                "cells_per_second": cells / best if best else None,
+            })
+            logger.info("{} size={} best={:.4f}s", name, size, best)
+    finally:
+        instrumentation.set_level(previous_level)
+
+    return {
+        "seed": SEED,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list:
+    """Find the benchmarks slower than in a baseline report.
+
+    Args:
+        report (dict): current report
+        baseline (dict): previous report
+        tolerance (float): allowed slowdown, 0.1 for 10%
+
+    Returns:
+        list: (name, size, baseline best, current best) of the regressions
+    """
+    previous = {(result["name"], result["size"]): result["best"] for result in baseline["results"]}
+    regressions = []
+
+    for result in report["results"]:
+        key = (result["name"], result["size"])
+        if key in previous and result["best"] > previous[key] * (1 + tolerance):
+            regressions.append((*key, previous[key], result["best"]))
+
+    return regressions
+
+
+@click.command()
+@click.option("--sizes", default=",".join(map(str, GENERATE_SIZES)), show_default=True,
+              help="Comma separated grid sizes.")
+@click.option("--repeat", default=3, show_default=True, help="Runs of every benchmark.")
+@click.option("--only", multiple=True, help="Run only this benchmark, can be repeated.")
+@click.option("--output", type=click.File("w"), default="-", help="JSON report file, stdout by default.")
+@click.option("--baseline", type=click.File("r"), help="Previous JSON report to compare with.")
+@click.option("--tolerance", default=0.1, show_default=True, help="Slowdown allowed against the baseline.")
+def bench(sizes, repeat, only, output, baseline, tolerance):
+    """Benchmark startup, grid construction, generation, propagation and rendering."""
+    report = run_benchmarks(tuple(int(size) for size in sizes.split(",")), repeat, only)
+    json.dump(report, output, indent=2)
+    output.write("\n")
+
+    if baseline is not None:
+        regressions = compare(report, json.load(baseline), tolerance)
+        for name, size, previous, current in regressions:
+            logger.warning("{} size={} is slower: {:.4f}s -> {:.4f}s", name, size, previous, current)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    bench()
@@ -0,0 +1,219 @@
+import numpy as np
+from src import instrumentation
+from src.log import logger
+from src.tileset import Tileset, get_tileset
+from src.grid import ContradictionError
+
+
+def generate_batch(size: int, count: int, seed=None, max_restarts: int = 100, tileset="default") -> np.ndarray:
+    """Generate a batch of maps at once.
+
+    The waves of all the maps are solved together: the selection of the cell
+    with the lowest entropy, its collapse and the propagation are numpy
+    operations over the leading batch axis. A map hitting a contradiction is
+    restarted on its own.
+
+    Args:
+        size (int): number of cells per side of each map
+        count (int): number of maps
+        seed (optional): seed or np.random.Generator. Defaults to None.
+        max_restarts (int, optional): restarts allowed over the batch. Defaults to 100.
+        tileset (optional): name of a shared tileset or a Tileset. Defaults to "default".
+
+    Raises:
+        ContradictionError: the restart budget is spent
+
+    Returns:
+        np.ndarray: uint8 maps of shape (count, 3 * size, 3 * size)
+    """
+    return _BatchSolver(size, count, seed, max_restarts, tileset).solve()
+
+
+class _BatchSolver:
+    """
+    Class _BatchSolver.
+
+    The arrays of all the maps are stored flat, the cell (map, row, column)
+    is at index (map * size + row) * size + column.
+
+    wave - bitmask of the options left for each cell
+    collapsed - shows for each cell if the state was defined
+    entropy - Shannon entropy of the weights of the options plus a random
+              tie-breaking noise for each cell not collapsed, infinity for
+              the others; the noise is smaller than the gap between two
+              entropies so it only orders cells with the same entropy
+    open_cells - number of cells not collapsed in each map
+    """
+
+    _tileset: Tileset
+    _rng: np.random.Generator
+    _wave: np.ndarray
+    _collapsed: np.ndarray
+    _entropy: np.ndarray
+    _noise: np.ndarray
+    _open_cells: np.ndarray
+    _neighbours: np.ndarray
+    _restarts: int
+
+    def __init__(self, size: int, count: int, seed, max_restarts: int, tileset="default"):
+        self._tileset = tileset if isinstance(tileset, Tileset) else get_tileset(tileset)
+        self._rng = np.random.default_rng(seed)
+        self._size = size
+        self._count = count
+        self._max_restarts = max_restarts
+        self._restarts = 0
+
+        cells = size * size
+        self._wave = np.full(
+            shape=count * cells,
+            fill_value=self._tileset.full_mask,
+            dtype=self._tileset.mask_dtype
+        )
+        self._collapsed = np.zeros(shape=count * cells, dtype=bool)
+        entropies = np.unique(self._tileset.entropy)
+        noise_scale = np.diff(entropies).min() / 2 if entropies.size > 1 else 1.0
+        self._noise = self._rng.random(size=count * cells) * noise_scale
+        self._entropy = self._tileset.entropy[self._wave] + self._noise
+        self._open_cells = np.full(shape=count, fill_value=cells)
+
+        # index of the neighbour of every cell of a map per direction, -1 on the border
+        rows, columns = np.divmod(np.arange(cells), size)
+        self._neighbours = np.stack([
+            np.where(columns > 0, np.arange(cells) - 1, -1),
+            np.where(rows > 0, np.arange(cells) - size, -1),
+            np.where(columns < size - 1, np.arange(cells) + 1, -1),
+            np.where(rows < size - 1, np.arange(cells) + size, -1),
+        ])
+
+        # tile id of the n-th option of every bitmask
+        options_count = self._tileset.options_count
+        self._nth_option = np.zeros(
+            shape=(self._tileset.full_mask + 1, options_count), dtype=np.uint8
+        )
+        for mask in range(self._tileset.full_mask + 1):
+            tile_ids = [tile_id for tile_id in range(options_count) if mask >> tile_id & 1]
+            self._nth_option[mask, :len(tile_ids)] = tile_ids
+
+    def solve(self) -> np.ndarray:
+        """Collapse every map of the batch.
+
+        Returns:
+            np.ndarray: uint8 maps of shape (count, 3 * size, 3 * size)
+        """
+        cells = self._size * self._size
+        entropy = self._entropy.reshape(self._count, cells)
+
+        while True:
+            active = np.flatnonzero(self._open_cells)
+            if active.size == 0:
+                break
+
+            # lowest entropy cell of every active map
+            chosen = active * cells + np.argmin(entropy[active], axis=1)
+
+            # pick one of its options at random, according to the weights
+            tile_ids = self._tileset.sample_many(self._wave[chosen], self._rng)
+            self._wave[chosen] = np.left_shift(1, tile_ids).astype(self._wave.dtype)
+            self._collapse(chosen)
+
+            changed = self._propagate(chosen)
+            self._update(changed)
+
+        states = self._nth_option[self._wave, 0].reshape(self._count, self._size, self._size)
+
+        return self._tileset.render(states)
+
+    def _collapse(self, cells: np.ndarray) -> None:
+        """Mark cells as collapsed.
+
+        Args:
+            cells (np.ndarray): flat indices of cells not collapsed yet
+        """
+        self._collapsed[cells] = True
+        self._entropy[cells] = np.inf
+        self._open_cells -= np.bincount(
+            cells // (self._size * self._size), minlength=self._count
+        )
+
+    def _propagate(self, cells: np.ndarray) -> np.ndarray:
+        """Remove the options not supported by the neighbours until nothing changes.
+
+        All the maps are processed together: each round applies the support of
+        the cells changed in the previous round to their neighbours.
+
+        Args:
+            cells (np.ndarray): flat indices of the changed cells
+
+        Returns:
+            np.ndarray: flat indices of the cells whose options were reduced
+        """
+        cells_per_map = self._size * self._size
+        support = self._tileset.support
+        wave = self._wave
+        changed = []
+
+        while cells.size:
+            offsets = cells - cells % cells_per_map
+            targets = []
+            allowed = []
+
+            for direction_index in range(len(self._neighbours)):
+                neighbours = self._neighbours[direction_index][cells % cells_per_map]
+                inside = neighbours >= 0
+                targets.append(offsets[inside] + neighbours[inside])
+                allowed.append(support[direction_index][wave[cells[inside]]])
+
+            targets = np.concatenate(targets)
+            allowed = np.concatenate(allowed)
+            before = wave[targets]
+            np.bitwise_and.at(wave, targets, allowed)
+
+            cells = np.unique(targets[wave[targets] != before])
+            changed.append(cells)
+
+        return np.concatenate(changed)
+
+    def _update(self, changed: np.ndarray) -> None:
+        """Refresh the cells changed by a propagation.
+
+        Cells left with a single option are collapsed, maps with a cell left
+        without options are restarted.
+
+        Args:
+            changed (np.ndarray): flat indices of the changed cells
+        """
+        changed = np.unique(changed)
+        failed = np.unique(changed[self._wave[changed] == 0] // (self._size * self._size))
+
+        changed = changed[~self._collapsed[changed]]
+        options = self._tileset.popcount[self._wave[changed]]
+        self._entropy[changed] = self._tileset.entropy[self._wave[changed]] + self._noise[changed]
+        self._collapse(changed[options == 1])
+
+        if failed.size:
+            self._restart(failed)
+
+    def _restart(self, maps: np.ndarray) -> None:
+        """Clear the wave of maps.
+
+        Args:
+            maps (np.ndarray): indices of the maps
+
+        Raises:
+            ContradictionError: the restart budget is spent
+        """
+        if self._restarts + maps.size > self._max_restarts:
+            raise ContradictionError(
+                f"No solution found after {self._restarts} restarts")
+
+        self._restarts = self._restarts + maps.size
+        if instrumentation.debug_enabled:
+            logger.debug("Contradiction. Restarting maps {}", maps)
+
+        cells = self._size * self._size
+        for map_index in maps:
+            section = slice(map_index * cells, (map_index + 1) * cells)
+            self._wave[section] = self._tileset.full_mask
+            self._collapsed[section] = False
+            self._entropy[section] = self._tileset.entropy[self._tileset.full_mask] + self._noise[section]
+            self._open_cells[map_index] = cells
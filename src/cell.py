@@ -1,48 +1,43 @@
-from uuid import uuid4
 import numpy as np
-from loguru import logger
-from src.tileset import Tileset
+from src.log import logger
+from src import instrumentation
+from src.tileset import UNCOLLAPSED, Tileset, get_tileset
 
 
 class Cell:
     """
     Class Cell.
 
-    options - shows which states (from 0 to 6) are available for this cell
+    options - shows which states (tile ids from 0 to 6) are available for this cell
     collapsed - shows if the cell was collapsed, which means the state was defined
-    state - shows which state was assigned to the cell (from 0 to 6), where
-            10 means the state was not assigned yet
+    state - shows which state was assigned to the cell (tile id from 0 to 6),
+            where UNCOLLAPSED means the state was not assigned yet
+
+    A cell is identified by its position, two cells are equal when they have
+    the same row and column.
     """
 
-    _id: str
+    __slots__ = ("_collapsed", "_state", "_entropy", "_options", "_row", "_column")
+
     _collapsed: bool
-    _state: str
+    _state: int
     _entropy: int
     _row: int
     _column: int
 
     def __init__(self, options=None, row=None, column=None):
         """Class Cell constructor."""
-        self._id = uuid4()
-
-        self._options = options if options else [
-            "Tile_0",
-            "Tile_1",
-            "Tile_2",
-            "Tile_3",
-            "Tile_4",
-            "Tile_5",
-            "Tile_6"
-        ]
+        self._options = options if options else [0, 1, 2, 3, 4, 5, 6]
         self._collapsed = False
-        self._state = "Tile_10"
+        self._state = UNCOLLAPSED
         self._entropy = len(self._options)
         self._row = row
         self._column = column
 
     @property
-    def id(self):
-        return self._id
+    def id(self) -> tuple:
+        """Position of the cell, (row, column)."""
+        return (self._row, self._column)
 
     @property
     def state(self):
@@ -75,44 +70,53 @@ class Cell:
         """Column property"""
         return self._column
 
-    def update_state(self, new_state="Tile_0", method="direct") -> str:
+    def update_state(self, new_state=0, method="direct", rng=None) -> int:
         """Update cell's state.
 
         Args:
-            new_state (str, optional): state. Defaults to "Tile_0".
+            new_state (int, optional): tile id, a tile name is also accepted.
+                Defaults to 0.
             method (str, optional): method. Defaults to "direct".
+            rng (np.random.Generator, optional): generator used by the random
+                method. Defaults to None, using the global numpy generator.
 
         Returns:
-            str: the cell's state
+            int: the cell's state
         """
-        if self._collapsed:
-            logger.debug("The cell is already collapsed!")
-            return self._state
+        if self.collapsed:
+            if instrumentation.debug_enabled:
+                logger.debug("The cell is already collapsed!")
+            return self.state
+
+        tileset = self._get_tileset()
+        state = None
 
         if method == "random":
-            new_state = np.random.choice(self._options)
-            logger.debug("All options: {}", self._options)
-            logger.debug("Random selection: {} ", new_state)
+            if not self.options:
+                logger.debug("Error. The cell has no options left")
+                return self.state
 
-        tileset = Tileset()
+            # the options are picked according to the weights of the tileset
+            new_state = tileset.sample(tileset.get_mask(self.options), rng)
+            if instrumentation.debug_enabled:
+                logger.debug("All options: {}", self.options)
+                logger.debug("Random selection: {} ", new_state)
 
-        if new_state in tileset.tile_list:
-            self._state = new_state
+        if isinstance(new_state, str) and new_state in tileset.tile_list:
+            new_state = tileset.get_tile_id(new_state)
 
-        elif isinstance(new_state, int):
-            if 0 <= new_state <= len(self._options) - 1:
-                self._state = tileset.tile_list[new_state]
+        if isinstance(new_state, (int, np.integer)):
+            if 0 <= new_state < tileset.options_count:
+                state = int(new_state)
             else:
                 logger.debug("Error. The state index is out of range (0,6)")
         else:
             logger.debug(
                 "Error. Wrong state was given. Neither Tile name, nor Tile index")
 
-        self._options = []
-        self._entropy = 0
-        self._collapsed = True
+        self._collapse(state)
 
-        return self._state
+        return self.state
 
     def update_options(self, keep_options: list) -> list:
         """Update cell's options.
@@ -124,7 +128,8 @@ class Cell:
             list: the current options for the cell
         """
         if self._collapsed:
-            logger.debug("This cell [{}] is already collapsed. Skipping", self)
+            if instrumentation.debug_enabled:
+                logger.debug("This cell [{}] is already collapsed. Skipping", self)
             return self._options
 
         remove_options = [
@@ -135,8 +140,167 @@ class Cell:
 
         return self._options
 
+    def _get_tileset(self) -> Tileset:
+        """Tileset used to resolve states."""
+        return get_tileset()
+
+    def _collapse(self, state: int) -> None:
+        """Store the collapsed state.
+
+        Args:
+            state (int): new state, None keeps the current one
+        """
+        if state is not None:
+            self._state = state
+
+        self._options = []
+        self._entropy = 0
+        self._collapsed = True
+
     def __repr__(self) -> str:
-        return f"<{__name__}.{__class__.__name__} id={self._id} row={self._row} column={self._column} collapsed={self._collapsed} state={self._state} entropy={self._entropy}>"
+        return f"<{__name__}.{__class__.__name__} row={self._row} column={self._column} collapsed={self._collapsed} state={self._state} entropy={self._entropy}>"
 
     def __eq__(self, cell: object) -> bool:
-        return self._id == cell.id
+        if not isinstance(cell, Cell):
+            return NotImplemented
+
+        return self.id == cell.id
+
+    def __hash__(self) -> int:
+        return hash(self.id)
+
+
+class CellView(Cell):
+    """
+    Class CellView.
+
+    Thin view of a cell of a Grid, created on demand. The options, state and
+    collapsed flag are not stored on the view but read from and written to
+    the Grid's wave. Views of the same cell of the same grid are equal.
+    """
+
+    __slots__ = ("_grid",)
+
+    def __init__(self, grid, row: int, column: int):
+        """Class CellView constructor."""
+        self._grid = grid
+        self._row = row
+        self._column = column
+
+    @property
+    def state(self):
+        """State property."""
+        return self._grid.get_state(self._row, self._column)
+
+    @property
+    def entropy(self):
+        """Entropy property."""
+        return len(self.options)
+
+    @property
+    def collapsed(self):
+        """Collapsed property."""
+        return self._grid.is_collapsed(self._row, self._column)
+
+    @property
+    def options(self):
+        """Options property."""
+        if self.collapsed:
+            return []
+
+        return self._grid.get_options(self._row, self._column)
+
+    def update_options(self, keep_options: list) -> list:
+        """Update cell's options.
+
+        Args:
+            keep_options (list): list of options to keep for the cell
+
+        Return:
+            list: the current options for the cell
+        """
+        if self.collapsed:
+            if instrumentation.debug_enabled:
+                logger.debug("This cell [{}] is already collapsed. Skipping", self)
+            return self.options
+
+        self._grid.restrict(self._row, self._column, keep_options)
+
+        return self.options
+
+    def _get_tileset(self) -> Tileset:
+        """Tileset used to resolve states."""
+        return self._grid.tileset
+
+    def _collapse(self, state: int) -> None:
+        """Store the collapsed state in the grid.
+
+        Args:
+            state (int): new state, None keeps the current one
+        """
+        self._grid.collapse(self._row, self._column, state)
+
+    def __repr__(self) -> str:
+        return f"<{__name__}.{__class__.__name__} row={self._row} column={self._column} collapsed={self.collapsed} state={self.state} entropy={self.entropy}>"
+
+    def __eq__(self, cell: object) -> bool:
+        if not isinstance(cell, Cell):
+            return NotImplemented
+
+        return isinstance(cell, CellView) and cell._grid is self._grid and self.id == cell.id
+
+    def __hash__(self) -> int:
+        return hash((id(self._grid), self._row, self._column))
+
+
+class CellViews:
+    """
+    Class CellViews.
+
+    Two dimensional accessor creating the CellView of a Grid cell when it is
+    read, so no object is kept per cell. Supports cells[row, column],
+    cells[row][column], iterating over the rows and cells.flat.
+    """
+
+    __slots__ = ("_grid", "_size")
+
+    def __init__(self, grid, size: int):
+        """Class CellViews constructor."""
+        self._grid = grid
+        self._size = size
+
+    @property
+    def shape(self) -> tuple:
+        """Number of rows and columns."""
+        return (self._size, self._size)
+
+    @property
+    def flat(self):
+        """Iterate over all the cells row by row."""
+        for row in range(self._size):
+            yield from self._row(row)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            row, column = key
+            if not (-self._size <= row < self._size and -self._size <= column < self._size):
+                raise IndexError(f"Cell {key} out of range")
+
+            return CellView(self._grid, row % self._size, column % self._size)
+
+        rows = range(self._size)[key]
+        if isinstance(rows, range):
+            return [self._row(row) for row in rows]
+
+        return self._row(rows)
+
+    def __iter__(self):
+        for row in range(self._size):
+            yield self._row(row)
+
+    def _row(self, row: int) -> list:
+        """Views of the cells of a row."""
+        return [CellView(self._grid, row, column) for column in range(self._size)]
@@ -0,0 +1,127 @@
+import os
+import time
+import click
+from src import instrumentation
+from src.dataset import FORMATS, DatasetWriter
+from src.farm import MazeFarm
+from src.grid import PROPAGATIONS, STRATEGIES
+from src.tileset import TILESETS
+
+# seconds between two progress reports
+PROGRESS_INTERVAL = 1.0
+
+
+@click.group()
+def cli():
+    """Generate Wave Function Collapse grid world mazes."""
+
+
+@cli.command()
+@click.option("--size", default=16, show_default=True, type=click.IntRange(min=1),
+              help="Number of cells per side of the maps.")
+@click.option("--count", default=1, show_default=True, type=click.IntRange(min=1), help="Number of maps.")
+@click.option("--seed", default=0, show_default=True,
+              help="Seed of the first map, map i uses seed + i. Ignored when appending to an existing dataset.")
+@click.option("--workers", type=click.IntRange(min=1), help="Worker processes, the number of CPUs by default.")
+@click.option("--chunk-size", default=64, show_default=True, type=click.IntRange(min=1),
+              help="Maps solved by a worker per task.")
+@click.option("--format", "format_", type=click.Choice(FORMATS), default="packed", show_default=True,
+              help="packed stores one bit per pixel, states one tile id per cell.")
+@click.option("--propagation", type=click.Choice(PROPAGATIONS), default="arc", show_default=True)
+@click.option("--strategy", type=click.Choice(STRATEGIES), default="backtrack", show_default=True)
+@click.option("--tileset", type=click.Choice(tuple(TILESETS)), default="default", show_default=True,
+              help="Tileset of the maps, its fingerprint is stored in the dataset header.")
+@click.option("--out", default="-", show_default=True, type=click.Path(dir_okay=False, allow_dash=True),
+              help="Dataset file, - streams the dataset to stdout.")
+@click.option("--append", is_flag=True, help="Add the maps to an existing dataset file.")
+@click.option("--progress/--no-progress", default=True, show_default=True,
+              help="Report the progress and the throughput on stderr.")
+@click.option("--instrumentation", "level", type=click.Choice(instrumentation.LEVELS), default="off",
+              show_default=True, help="Logging of the workers, see src.instrumentation.")
+def generate(
+    size, count, seed, workers, chunk_size, format_, propagation, strategy, tileset, out, append, progress, level
+):
+    """Generate maps and write them as a dataset, see src.dataset.
+
+    The maps are written chunk by chunk as the workers finish them, at most
+    a few chunks per worker are held in memory whatever the count.
+    """
+    farm = MazeFarm(
+        size, workers=workers, chunk_size=chunk_size, propagation=propagation, strategy=strategy, tileset=tileset
+    )
+
+    if out == "-":
+        writer = DatasetWriter(
+            click.open_file("-", "wb"), size, seed=seed, format=format_, expected_count=count, tileset=tileset
+        )
+    else:
+        try:
+            writer = DatasetWriter(out, size, seed=seed, format=format_, append=append, tileset=tileset)
+        except ValueError as error:
+            # the file to append to is not a dataset or holds other maps
+            raise click.BadParameter(str(error), param_hint="'--out'") from error
+        if writer.count:
+            # carry on with the seeds following the maps already in the file
+            seed = writer.seed + writer.count
+
+    # workers started by fork inherit the level, the others read the environment
+    previous_level = instrumentation.set_level(level)
+    previous_environment = os.environ.get(instrumentation.ENVIRONMENT_VARIABLE)
+    os.environ[instrumentation.ENVIRONMENT_VARIABLE] = level
+
+    try:
+        with writer:
+            _write_maps(farm, writer, count, seed, progress)
+    finally:
+        instrumentation.set_level(previous_level)
+        if previous_environment is None:
+            del os.environ[instrumentation.ENVIRONMENT_VARIABLE]
+        else:
+            os.environ[instrumentation.ENVIRONMENT_VARIABLE] = previous_environment
+
+
+def _write_maps(farm: MazeFarm, writer: DatasetWriter, count: int, seed: int, progress: bool) -> None:
+    """Write the maps of a farm as they are generated.
+
+    Args:
+        farm (MazeFarm): farm generating the maps
+        writer (DatasetWriter): dataset to write to
+        count (int): number of maps
+        seed (int): seed of the first map
+        progress (bool): report the progress on stderr
+    """
+    start = time.perf_counter()
+    reported = start
+    generated = 0
+
+    for _, maps in farm.generate(count, seed=seed):
+        writer.append(maps)
+        generated = generated + len(maps)
+
+        now = time.perf_counter()
+        if progress and generated < count and now - reported >= PROGRESS_INTERVAL:
+            reported = now
+            click.echo(_progress(generated, count, now - start), err=True)
+
+    if progress:
+        click.echo(_progress(generated, count, time.perf_counter() - start), err=True)
+
+
+def _progress(generated: int, count: int, seconds: float) -> str:
+    """Progress report line.
+
+    Args:
+        generated (int): maps generated so far
+        count (int): maps to generate
+        seconds (float): time spent
+
+    Returns:
+        str: maps generated, percentage and maps per second
+    """
+    rate = generated / seconds if seconds else 0.0
+
+    return f"{generated}/{count} maps ({100 * generated / count:.1f}%) {rate:.1f} maps/s"
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,125 @@
+from typing import NamedTuple
+import numpy as np
+
+
+class Connectivity(NamedTuple):
+    """
+    Class Connectivity.
+
+    Connectivity of the paths of rendered maps, every field is an array with
+    the leading shape of the maps, i.e. a 0-d array for a single map. Two
+    path pixels are connected when they are side by side.
+
+    components - number of connected groups of path pixels
+    largest_component - share of the path pixels in the largest group, 0
+                        for a map without path
+    dead_ends - path pixels with a single path neighbour
+    loops - number of independent cycles of the paths, edges - pixels +
+            components
+    """
+
+    components: np.ndarray
+    largest_component: np.ndarray
+    dead_ends: np.ndarray
+    loops: np.ndarray
+
+
+def label(maps: np.ndarray) -> np.ndarray:
+    """Label the connected groups of path pixels.
+
+    Vectorized union-find over the whole batch: every round hooks the root
+    of each edge end on the smaller root of the two, then pointer jumping
+    makes every pixel point at its root, until no edge joins two roots.
+
+    Args:
+        maps (np.ndarray): maps of shape (..., height, width), non zero
+            pixels are paths
+
+    Returns:
+        np.ndarray: int64 labels of the shape of maps, the flat index in
+            the map of the first pixel of the group for path pixels, -1 for
+            walls
+    """
+    paths = np.asarray(maps) != 0
+    *batch, height, width = paths.shape
+    pixels = height * width
+    index = np.arange(paths.size).reshape(paths.shape)
+
+    horizontal = paths[..., :, :-1] & paths[..., :, 1:]
+    vertical = paths[..., :-1, :] & paths[..., 1:, :]
+    first = np.concatenate([index[..., :, :-1][horizontal], index[..., :-1, :][vertical]])
+    second = np.concatenate([index[..., :, 1:][horizontal], index[..., 1:, :][vertical]])
+
+    parent = np.arange(paths.size)
+
+    while True:
+        first_root = parent[first]
+        second_root = parent[second]
+        joined = first_root != second_root
+        if not joined.any():
+            break
+
+        # roots only ever point at smaller roots, so no cycle is made
+        np.minimum.at(
+            parent,
+            np.maximum(first_root[joined], second_root[joined]),
+            np.minimum(first_root[joined], second_root[joined])
+        )
+
+        while True:
+            grandparent = parent[parent]
+            if (grandparent == parent).all():
+                break
+            parent = grandparent
+
+    # the roots are the smallest pixels of their group, within their map
+    labels = parent.reshape(paths.shape) % pixels
+
+    return np.where(paths, labels, -1)
+
+
+def analyse(maps: np.ndarray) -> Connectivity:
+    """Measure the connectivity of the paths of maps.
+
+    Args:
+        maps (np.ndarray): maps of shape (..., height, width), non zero
+            pixels are paths
+
+    Returns:
+        Connectivity: statistics per map
+    """
+    paths = np.asarray(maps) != 0
+    *batch, height, width = paths.shape
+    labels = label(paths).reshape(-1, height * width)
+    flat_paths = paths.reshape(-1, height * width)
+
+    roots = flat_paths & (labels == np.arange(height * width))
+    components = roots.sum(axis=1)
+
+    # size of every group, counted at its root
+    offsets = np.arange(len(labels))[:, None] * height * width
+    sizes = np.bincount((labels + offsets)[flat_paths], minlength=labels.size).reshape(labels.shape)
+    path_pixels = flat_paths.sum(axis=1)
+    largest = np.divide(
+        sizes.max(axis=1, initial=0), path_pixels, out=np.zeros(len(labels)), where=path_pixels > 0
+    )
+
+    horizontal = paths[..., :, :-1] & paths[..., :, 1:]
+    vertical = paths[..., :-1, :] & paths[..., 1:, :]
+    edges = horizontal.sum(axis=(-2, -1)) + vertical.sum(axis=(-2, -1))
+
+    neighbours = np.zeros(paths.shape, dtype=np.uint8)
+    neighbours[..., :, :-1] += horizontal
+    neighbours[..., :, 1:] += horizontal
+    neighbours[..., :-1, :] += vertical
+    neighbours[..., 1:, :] += vertical
+    dead_ends = (paths & (neighbours == 1)).sum(axis=(-2, -1))
+
+    components = components.reshape(batch)
+
+    return Connectivity(
+        components=components,
+        largest_component=largest.reshape(batch),
+        dead_ends=np.asarray(dead_ends),
+        loops=np.asarray(edges - path_pixels.reshape(batch) + components),
+    )
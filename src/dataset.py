@@ -0,0 +1,328 @@
+import os
+import struct
+import numpy as np
+from src import instrumentation
+from src.log import logger
+from src.tileset import Tileset, get_tileset
+
+MAGIC = b"WFCMAZE\0"
+VERSION = 1
+FORMATS = ("packed", "states")
+
+# magic, version, format, size, seed of the first map, count, tileset fingerprint
+_HEADER = struct.Struct("<8sHBxIqQ20s")
+HEADER_SIZE = 64
+
+
+def record_shape(size: int, format: str) -> tuple:
+    """Shape of the uint8 record of one map.
+
+    Args:
+        size (int): number of cells per side of the map
+        format (str): "packed" stores the rendered map with one bit per
+            pixel, each row padded to a whole byte, "states" stores one tile
+            id per cell
+
+    Raises:
+        ValueError: unknown format
+
+    Returns:
+        tuple: shape of a record
+    """
+    if format == "packed":
+        return (3 * size, (3 * size + 7) // 8)
+    if format == "states":
+        return (size, size)
+
+    raise ValueError(f"Unknown format {format}, expected one of {FORMATS}")
+
+
+class DatasetWriter:
+    """
+    Class DatasetWriter.
+
+    Append-only file of maps. A fixed size header is followed by one record
+    per map; every record of a file has the same size so the offset of map i
+    is HEADER_SIZE + i * record size, which makes an explicit offset index
+    unnecessary. The map i was generated with the seed of the header plus i.
+
+    The count of the header is rewritten on flush and close, the records
+    written after the last flush are ignored by a reader and dropped when
+    the file is opened again for appending.
+
+    A file object, e.g. stdout, is written as a stream: the header cannot be
+    rewritten, so it is written once announcing the expected count, and the
+    file is left open on close.
+
+    format - "packed" or "states", see record_shape
+    count - number of maps in the file
+    """
+
+    _path: str
+    _size: int
+    _seed: int
+    _format: str
+    _count: int
+    _tileset: Tileset
+    _record_shape: tuple
+    _expected_count: int
+    _stream: bool
+
+    def __init__(
+        self,
+        path,
+        size: int,
+        seed: int = 0,
+        format: str = "packed",
+        append: bool = False,
+        expected_count: int = None,
+        tileset="default"
+    ):
+        """Class DatasetWriter constructor.
+
+        Args:
+            path: file path, or binary file object written as a stream
+            size (int): number of cells per side of the maps
+            seed (int, optional): seed of the first map. Defaults to 0.
+            format (str, optional): "packed" or "states". Defaults to "packed".
+            append (bool, optional): add to an existing file instead of
+                truncating it. Defaults to False.
+            expected_count (int, optional): number of maps announced by the
+                header of a stream. Defaults to None, required for streams.
+            tileset (optional): name of a shared tileset or the Tileset the
+                maps were generated with, its fingerprint is stored in the
+                header. Defaults to "default".
+
+        Raises:
+            ValueError: unknown format, the existing file does not match the
+                size, the format or the tileset, or no expected count for a
+                stream
+        """
+        self._path = path
+        self._size = size
+        self._seed = seed
+        self._format = format
+        self._record_shape = record_shape(size, format)
+        self._tileset = tileset if isinstance(tileset, Tileset) else get_tileset(tileset)
+        self._count = 0
+        self._expected_count = expected_count
+        self._stream = hasattr(path, "write")
+
+        if self._stream:
+            if expected_count is None:
+                raise ValueError("The expected count of a stream is required")
+            self._file = path
+            self._write_header()
+        elif append and os.path.exists(path):
+            header = read_header(path)
+            if (header["size"], header["format"]) != (size, format):
+                raise ValueError(f"{path} holds {header['format']} maps of size {header['size']}")
+            if header["fingerprint"] != self._tileset.fingerprint:
+                raise ValueError(f"{path} was generated with another tileset")
+
+            self._seed = header["seed"]
+            self._count = header["count"]
+            self._file = open(path, "r+b")
+            self._file.truncate(HEADER_SIZE + self._count * self.record_size)
+            self._file.seek(0, os.SEEK_END)
+        else:
+            self._file = open(path, "w+b")
+            self._write_header()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    @property
+    def count(self) -> int:
+        """Number of maps in the file."""
+        return self._count
+
+    @property
+    def seed(self) -> int:
+        """Seed of the first map."""
+        return self._seed
+
+    @property
+    def record_size(self) -> int:
+        """Number of bytes of one map."""
+        return int(np.prod(self._record_shape))
+
+    def append(self, maps: np.ndarray) -> None:
+        """Add maps at the end of the file.
+
+        Args:
+            maps (np.ndarray): rendered maps of shape (count, 3 * size, 3 * size)
+        """
+        if self._format == "packed":
+            records = np.packbits(maps.astype(bool), axis=-1)
+        else:
+            records = self._tileset.identify(maps)
+
+        records = np.ascontiguousarray(records, dtype=np.uint8)
+        self._file.write(records.data)
+        self._count = self._count + len(records)
+
+    def flush(self) -> None:
+        """Write the count to the header so the appended maps can be read."""
+        if not self._stream:
+            position = self._file.tell()
+            self._write_header()
+            self._file.seek(position)
+        self._file.flush()
+
+    def close(self) -> None:
+        """Flush and close the file, a stream is only flushed."""
+        if self._file.closed:
+            return
+
+        self.flush()
+        if not self._stream:
+            self._file.close()
+        if instrumentation.stats_enabled:
+            logger.debug("Wrote {} maps to {}", self._count, getattr(self._path, "name", self._path))
+
+    def _write_header(self) -> None:
+        """Write the header at the start of the file."""
+        header = _HEADER.pack(
+            MAGIC,
+            VERSION,
+            FORMATS.index(self._format),
+            self._size,
+            self._seed,
+            self._expected_count if self._stream else self._count,
+            self._tileset.fingerprint
+        )
+        if not self._stream:
+            self._file.seek(0)
+        self._file.write(header.ljust(HEADER_SIZE, b"\0"))
+
+
+class DatasetReader:
+    """
+    Class DatasetReader.
+
+    Memory-mapped view of a file written by DatasetWriter. Records are
+    read-only views of the mapping, nothing is copied until a map is
+    decoded.
+
+    records - array of shape (count, *record shape) over the file
+    """
+
+    _header: dict
+    _records: np.ndarray
+    _tileset: Tileset
+
+    def __init__(self, path: str, tileset="default"):
+        """Class DatasetReader constructor.
+
+        Args:
+            path (str): file path
+            tileset (optional): name of a shared tileset or the Tileset the
+                maps were generated with, which decodes the states. Defaults
+                to "default".
+
+        Raises:
+            ValueError: the file is not a dataset
+        """
+        self._header = read_header(path)
+        self._tileset = tileset if isinstance(tileset, Tileset) else get_tileset(tileset)
+        shape = (self._header["count"], *record_shape(self._header["size"], self._header["format"]))
+
+        if self._header["count"]:
+            self._records = np.memmap(path, dtype=np.uint8, mode="r", offset=HEADER_SIZE, shape=shape)
+        else:
+            # a zero sized file mapping is not allowed
+            self._records = np.empty(shape=shape, dtype=np.uint8)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._header["count"]
+
+    def __getitem__(self, index) -> np.ndarray:
+        """Record of map index, a view of the file."""
+        return self._records[index]
+
+    @property
+    def size(self) -> int:
+        """Number of cells per side of the maps."""
+        return self._header["size"]
+
+    @property
+    def seed(self) -> int:
+        """Seed of the first map."""
+        return self._header["seed"]
+
+    @property
+    def format(self) -> str:
+        """Record format."""
+        return self._header["format"]
+
+    @property
+    def records(self) -> np.ndarray:
+        """All the records, a view of the file."""
+        return self._records
+
+    def get_map(self, index) -> np.ndarray:
+        """Decode maps.
+
+        Args:
+            index: index or slice of the maps
+
+        Raises:
+            ValueError: the states were written with another tileset
+
+        Returns:
+            np.ndarray: uint8 maps of shape (..., 3 * size, 3 * size)
+        """
+        records = self._records[index]
+
+        if self.format == "packed":
+            return np.unpackbits(records, axis=-1, count=3 * self.size)
+
+        if self._header["fingerprint"] != self._tileset.fingerprint:
+            raise ValueError("The states were written with another tileset")
+
+        return self._tileset.render(records)
+
+    def close(self) -> None:
+        """Release the file mapping."""
+        self._records = None
+
+
+def read_header(path: str) -> dict:
+    """Read the header of a dataset file.
+
+    Args:
+        path (str): file path
+
+    Raises:
+        ValueError: the file is not a dataset or has another version
+
+    Returns:
+        dict: size, seed, count, format and fingerprint
+    """
+    with open(path, "rb") as file:
+        data = file.read(HEADER_SIZE)
+
+    if len(data) < HEADER_SIZE or not data.startswith(MAGIC):
+        raise ValueError(f"{path} is not a maze dataset")
+
+    _, version, format, size, seed, count, fingerprint = _HEADER.unpack(data[:_HEADER.size])
+    if version != VERSION:
+        raise ValueError(f"{path} has version {version}, expected {VERSION}")
+
+    return {
+        "size": size,
+        "seed": seed,
+        "count": count,
+        "format": FORMATS[format],
+        "fingerprint": fingerprint,
+    }
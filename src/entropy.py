@@ -0,0 +1,73 @@
+import heapq
+import numpy as np
+
+
+class EntropyHeap:
+    """
+    Class EntropyHeap.
+
+    Min-heap of the cells of a grid ordered by entropy. Entries are never
+    updated in place: a new entry is pushed every time the entropy of a cell
+    changes and outdated entries are skipped by the caller when popped (lazy
+    invalidation).
+
+    noise - random priority of each cell, breaks ties between cells with the
+            same entropy
+    """
+
+    _heap: list
+    _noise: np.ndarray
+
+    def __init__(self, size: int, rng: np.random.Generator = None):
+        """Class EntropyHeap constructor.
+
+        Args:
+            size (int): number of cells
+            rng (np.random.Generator, optional): generator for the tie-breaking.
+                Defaults to a new unseeded generator.
+        """
+        rng = rng if rng is not None else np.random.default_rng()
+        self._noise = rng.random(size).tolist()
+        self._heap = []
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, index: int, entropy) -> None:
+        """Add an entry for a cell.
+
+        Args:
+            index (int): flat index of the cell
+            entropy: entropy of the cell
+        """
+        heapq.heappush(self._heap, (entropy, self._noise[index], index))
+
+    def pop(self) -> tuple:
+        """Remove the entry with the lowest entropy.
+
+        Returns:
+            tuple: (entropy, flat index of the cell), None if the heap is empty
+        """
+        if not self._heap:
+            return None
+
+        entropy, _, index = heapq.heappop(self._heap)
+
+        return entropy, index
+
+    def rebuild(self, entropy: np.ndarray, indices: np.ndarray) -> None:
+        """Replace all the entries.
+
+        Args:
+            entropy (np.ndarray): entropy of the cells
+            indices (np.ndarray): flat index of the cells
+        """
+        self._heap = [
+            (value, self._noise[index], index)
+            for value, index in zip(entropy.tolist(), indices.tolist())
+        ]
+        heapq.heapify(self._heap)
+
+    def clear(self) -> None:
+        """Remove all the entries."""
+        self._heap = []
@@ -0,0 +1,22 @@
+from typing import NamedTuple
+
+
+class CollapseEvent(NamedTuple):
+    """
+    Class CollapseEvent.
+
+    One step of the generation of a Grid.
+
+    kind - "collapse" when a cell was collapsed, otherwise the strategy used
+           to resolve a contradiction: "backtrack", "restart" or "repair"
+    row - row position of the collapsed cell or of the contradiction
+    column - column position of the collapsed cell or of the contradiction
+    state - tile id given to the collapsed cell, None for a contradiction
+    changed - positions of the other cells whose options or state changed
+    """
+
+    kind: str
+    row: int
+    column: int
+    state: int
+    changed: list
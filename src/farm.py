@@ -0,0 +1,144 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+from src import instrumentation
+from src.log import logger
+from src.grid import Grid
+
+# shared memory block attached by the worker process
+_shared_memory = None
+
+
+class MazeFarm:
+    """
+    Class MazeFarm.
+
+    Generates maps over a pool of worker processes. Seeds are split in
+    chunks, every chunk is solved by one worker which renders its maps
+    straight into a slot of a shared memory block; only the slot number and
+    the seeds travel between the processes.
+
+    workers - number of worker processes
+    chunk_size - number of maps solved by a worker per task
+    max_in_flight - number of chunks submitted and not consumed yet, which
+                    is also the number of slots of the shared memory block
+    grid_options - keyword arguments given to every Grid
+    """
+
+    _size: int
+    _workers: int
+    _chunk_size: int
+    _max_in_flight: int
+    _grid_options: dict
+
+    def __init__(
+        self,
+        size: int,
+        workers: int = None,
+        chunk_size: int = 64,
+        max_in_flight: int = None,
+        **grid_options
+    ):
+        """Class MazeFarm constructor."""
+        self._size = size
+        self._workers = workers if workers else os.cpu_count() or 1
+        self._chunk_size = chunk_size
+        self._max_in_flight = max_in_flight if max_in_flight else 2 * self._workers
+        self._grid_options = grid_options
+
+    @property
+    def map_shape(self) -> tuple:
+        """Shape of one map."""
+        return (3 * self._size, 3 * self._size)
+
+    def generate(self, count: int, seed: int = 0):
+        """Generate maps for consecutive seeds.
+
+        Args:
+            count (int): number of maps
+            seed (int, optional): seed of the first map. Defaults to 0.
+
+        Yields:
+            tuple: (seed of the first map, uint8 maps) chunks in seed order
+        """
+        slot_shape = (self._chunk_size, *self.map_shape)
+        slot_bytes = int(np.prod(slot_shape))
+        shared_memory = SharedMemory(create=True, size=slot_bytes * self._max_in_flight)
+        slots = np.ndarray(
+            shape=(self._max_in_flight, *slot_shape), dtype=np.uint8, buffer=shared_memory.buf
+        )
+
+        try:
+            with ProcessPoolExecutor(
+                max_workers=self._workers,
+                initializer=_attach,
+                initargs=(shared_memory.name,)
+            ) as executor:
+                chunks = iter(range(seed, seed + count, self._chunk_size))
+                free_slots = deque(range(self._max_in_flight))
+                in_flight = deque()
+
+                while True:
+                    while free_slots:
+                        first_seed = next(chunks, None)
+                        if first_seed is None:
+                            break
+
+                        slot = free_slots.popleft()
+                        seeds = range(first_seed, min(first_seed + self._chunk_size, seed + count))
+                        future = executor.submit(
+                            _solve_chunk, slot, slot_shape, self._size, seeds, self._grid_options
+                        )
+                        in_flight.append((first_seed, slot, future))
+
+                    if not in_flight:
+                        break
+
+                    first_seed, slot, future = in_flight.popleft()
+                    generated = future.result()
+                    maps = slots[slot, :generated].copy()
+                    free_slots.append(slot)
+                    if instrumentation.debug_enabled:
+                        logger.debug("Generated maps {} to {}", first_seed, first_seed + generated - 1)
+
+                    yield first_seed, maps
+        finally:
+            del slots
+            shared_memory.close()
+            shared_memory.unlink()
+
+
+def _attach(name: str) -> None:
+    """Attach the worker process to the shared memory block.
+
+    Args:
+        name (str): name of the shared memory block
+    """
+    global _shared_memory
+    _shared_memory = SharedMemory(name=name)
+
+
+def _solve_chunk(slot: int, slot_shape: tuple, size: int, seeds: range, grid_options: dict) -> int:
+    """Generate the maps of a chunk into a slot of the shared memory block.
+
+    Args:
+        slot (int): index of the slot
+        slot_shape (tuple): shape of a slot
+        size (int): size of the grids
+        seeds (range): seeds of the maps
+        grid_options (dict): keyword arguments given to every Grid
+
+    Returns:
+        int: number of maps generated
+    """
+    slot_bytes = int(np.prod(slot_shape))
+    maps = np.ndarray(
+        shape=slot_shape, dtype=np.uint8, buffer=_shared_memory.buf, offset=slot * slot_bytes
+    )
+
+    for index, seed in enumerate(seeds):
+        Grid(size, seed=seed, **grid_options).generate_map(out=maps[index])
+
+    return len(seeds)
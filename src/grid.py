@@ -1,105 +1,424 @@
 
+from collections import deque
+from time import perf_counter
 import numpy as np
-import matplotlib.pyplot as plt
-from loguru import logger
-from src.tileset import Tileset
-from src.cell import Cell
+from src.log import logger
+from src import instrumentation
+from src.tileset import UNCOLLAPSED, Tileset, get_tileset
+from src.cell import Cell, CellViews
+from src.entropy import EntropyHeap
+from src.events import CollapseEvent
+from src.connectivity import label
+
+# row and column offsets of the neighbours, in the order of the directions
+OFFSETS = ((0, -1), (-1, 0), (0, 1), (1, 0))
+
+PROPAGATIONS = ("arc", "neighbours")
+
+STRATEGIES = ("backtrack", "restart", "repair")
+
+# times the paths apart from the main one are solved again before being
+# filled with walls, see Grid.generate_map(connected=True)
+CONNECT_ATTEMPTS = 10
+
+# tile id without any path
+WALL = 0
+
+
+class ContradictionError(RuntimeError):
+    """Raised when the wave cannot be solved within the restart budget."""
 
 
 class Grid:
-    """Class Grid."""
+    """
+    Class Grid.
+
+    wave - bitmask of the options left for each cell, the bit positions are
+           the tile ids of the Tileset
+    states - tile id assigned to each cell, UNCOLLAPSED for cells not collapsed
+    collapsed - shows for each cell if the state was defined
+    cells - Cell views on the wave created on demand, kept for compatibility
+    heap - cells not collapsed ordered by the Shannon entropy of the weights
+           of their options
+    constraints - bitmask of the options allowed for each cell whatever
+                  happens, restarts and repairs start again from them
+    propagation - "arc" propagates the options of a collapsed cell until the
+                  wave is arc consistent, "neighbours" only updates the four
+                  direct neighbours
+    strategy - what to do when a cell is left without options:
+               "backtrack" undoes the last collapses one by one,
+               "restart" clears the whole wave,
+               "repair" clears the patch around the cell;
+               backtrack and repair fall back to a restart once their budget
+               is spent
+    rng - random generator used for the collapses and the tie-breaking, a
+          grid generated from the same seed always gives the same map
+    tileset - name of a shared tileset or a Tileset, its weights give the
+              frequency of the tiles
+    stats - counters of the generation, logged once per map at the STATS
+            instrumentation level; the steps are only logged at the DEBUG
+            level
+    profiler - time and counters per phase of the generation steps, None
+               unless the grid is built with profile=True
+    board - figure, image and entropy texts of the "image" drawing, kept
+            so the next drawings update them in place
+    region - (rows, columns, mask) being solved again by regenerate_region,
+             restarts only clear it; None for the whole grid
+    """
 
     _size: int
     _tileset: Tileset
-    _cells: np.ndarray
+    _constraints: np.ndarray
+    _wave: np.ndarray
+    _states: np.ndarray
+    _collapsed: np.ndarray
+    _cells: CellViews
+    _heap: EntropyHeap
     _collapsed_cells: int
     _map: np.ndarray
+    _map_current: bool
+    _propagation: str
+    _strategy: str
+    _trail: list
+    _decisions: list
+    _contradiction: tuple
+    _restarts: int
+    _backtracks: int
+    _repairs: int
+    _collapses: int
+    _propagations: int
+    _contradictions: int
+    _budget_start: tuple
+    _rng: np.random.Generator
+    _profiler: instrumentation.Profiler
+    _board: dict
+    _region: tuple
+
+    def __init__(
+        self,
+        size: int,
+        propagation: str = "arc",
+        strategy: str = "backtrack",
+        max_restarts: int = 100,
+        max_backtracks: int = 1000,
+        max_repairs: int = 100,
+        repair_size: int = 3,
+        seed=None,
+        profile: bool = False,
+        tileset="default"
+    ):
+        if propagation not in PROPAGATIONS:
+            raise ValueError(f"Unknown propagation {propagation!r}, expected one of {PROPAGATIONS}")
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy {strategy!r}, expected one of {STRATEGIES}")
 
-    def __init__(self, size: int):
         self._size = size
-        self._tileset = Tileset()
-        self._cells = np.ndarray(shape=(size, size), dtype=Cell)
+        self._rng = np.random.default_rng(seed)
+        self._propagation = propagation
+        self._strategy = strategy
+        self._max_restarts = max_restarts
+        self._max_backtracks = max_backtracks
+        self._max_repairs = max_repairs
+        self._repair_size = repair_size
+        self._profiler = instrumentation.Profiler() if profile else None
+        self._board = None
+        self._region = None
+
+        # (row, column, previous bitmask) of every wave change, only kept
+        # when backtracking
+        self._trail = []
+        # (trail length, row, column) of every collapse, only kept when
+        # backtracking
+        self._decisions = []
+        self._contradiction = None
+        self._restarts = 0
+        self._backtracks = 0
+        self._repairs = 0
+        self._collapses = 0
+        self._propagations = 0
+        self._contradictions = 0
+        # counters at the last restart, the budgets apply between restarts
+        self._budget_start = (0, 0)
+        self._tileset = tileset if isinstance(tileset, Tileset) else get_tileset(tileset)
+        self._constraints = np.full(
+            shape=(size, size),
+            fill_value=self._tileset.full_mask,
+            dtype=self._tileset.mask_dtype
+        )
+        self._wave = self._constraints.copy()
+        self._states = np.full(
+            shape=(size, size),
+            fill_value=UNCOLLAPSED,
+            dtype=np.uint8
+        )
+        self._collapsed = np.zeros(shape=(size, size), dtype=bool)
+        self._cells = CellViews(self, size)
         self._collapsed_cells = 0
-        self._map = np.zeros(shape=(3 * size, 3 * size))
+        self._map = np.zeros(shape=(3 * size, 3 * size), dtype=np.uint8)
+        # whether _map shows the states, set by generate_map and cleared by
+        # every collapse or reset
+        self._map_current = False
 
-        for row_index in range(size):
-            for column_index in range(size):
-                self._cells[row_index, column_index] = Cell(
-                    row=row_index, column=column_index
-                )
+        self._heap = EntropyHeap(size * size, rng=self._rng)
+        self._rebuild_heap()
 
-    def draw_board(self, include_entropy=False, tiles="separate", title=""):
-        """Draw board.
+    @property
+    def tileset(self) -> Tileset:
+        """Tileset property."""
+        return self._tileset
+
+    @property
+    def wave(self) -> np.ndarray:
+        """Wave property."""
+        return self._wave
+
+    @property
+    def states(self) -> np.ndarray:
+        """Tile id of every cell, UNCOLLAPSED for cells not collapsed."""
+        return self._states
+
+    @property
+    def restarts(self) -> int:
+        """Number of times the wave was cleared after a contradiction."""
+        return self._restarts
+
+    @property
+    def backtracks(self) -> int:
+        """Number of collapses undone after a contradiction."""
+        return self._backtracks
+
+    @property
+    def repairs(self) -> int:
+        """Number of patches cleared after a contradiction."""
+        return self._repairs
+
+    @property
+    def stats(self) -> dict:
+        """Counters of the generation since the grid was built or reset.
+
+        collapses - cells collapsed, including the collapses undone later
+        propagations - cell options reduced by the propagation of a collapse
+        contradictions - cells left without options
+        """
+        return {
+            "collapses": self._collapses,
+            "propagations": self._propagations,
+            "contradictions": self._contradictions,
+            "restarts": self._restarts,
+            "backtracks": self._backtracks,
+            "repairs": self._repairs,
+        }
+
+    @property
+    def profiler(self) -> instrumentation.Profiler:
+        """Profiler of the generation steps, None when profiling is off.
+
+        It is not cleared by reset, so it sums up every map generated by the
+        grid.
+        """
+        return self._profiler
+
+    @property
+    def rng(self) -> np.random.Generator:
+        """Random generator property."""
+        return self._rng
+
+    def reset(self, seed=None) -> None:
+        """Clear the wave and the contradiction counters.
 
         Args:
-            include_entropy (bool, optional): show entropy. Defaults to False.
-            tiles (str, optional): show borders between tiles. Defaults to "separate".
-            title (str, optional): set title. Defaults to "".
+            seed (optional): seed or np.random.Generator replacing the random
+                generator. Defaults to None, keeping the current one.
+        """
+        if seed is not None:
+            self._rng = np.random.default_rng(seed)
+
+        self._heap = EntropyHeap(self._size * self._size, rng=self._rng)
+        self._reset_counters()
+        self._reset()
+
+    def _reset_counters(self) -> None:
+        """Set the generation counters back to zero."""
+        self._restarts = 0
+        self._backtracks = 0
+        self._repairs = 0
+        self._collapses = 0
+        self._propagations = 0
+        self._contradictions = 0
+        self._budget_start = (0, 0)
+
+    def constrain(self, masks: np.ndarray) -> list:
+        """Restrict the options of the cells for the whole generation.
+
+        Unlike restrict, the constraints are kept when the wave is cleared by
+        a restart, a repair or reset. They are meant to be set before
+        generating, e.g. to match the borders of an adjacent grid.
+
+        Args:
+            masks (np.ndarray): bitmask of the options allowed for each cell
+
+        Raises:
+            ContradictionError: a cell is left without options
+
+        Returns:
+            list: positions of the cells whose options were reduced
         """
-        if tiles == "separate":
-            counter = 1
-            fig = plt.figure(figsize=(8, 8))
+        self._constraints &= masks
+        before = self._wave.copy()
+        self._wave &= masks
+        self._trail.clear()
+        self._decisions.clear()
 
-            if isinstance(title, str):
-                fig.suptitle("tiles", fontsize=16)
-            elif isinstance(title, int):
-                fig.suptitle(str(title) + "%", fontsize=16)
+        cells = [(int(row), int(column)) for row, column in np.argwhere(self._wave != before)]
+        for row, column in cells:
+            self._push(row, column)
 
-            for row_cell in self._cells:
-                for cell in row_cell:
-                    state = cell.state
+        changed = cells + self._propagate_cells(cells)
+        empty = any(self._wave[row, column] == 0 for row, column in cells)
 
-                    ax = fig.add_subplot(self._size, self._size, counter)
-                    # ax.set_title(state)
+        if empty or self._contradiction is not None:
+            self._contradiction = None
+            raise ContradictionError("The constraints cannot be satisfied")
 
-                    if include_entropy:
-                        plt.text(
-                            0.7,
-                            0.7,
-                            str(cell.entropy),
-                            fontsize=12, color="w"
-                        )
+        return changed
 
-                    plt.axis("off")
-                    plt.imshow(self._tileset.get_tile(state))
+    def get_state(self, row: int, column: int) -> int:
+        """Get the state of a cell.
 
-                    counter = counter + 1
-            # fig.tight_layout()
-            plt.show()
+        Args:
+            row (int): row position of the cell
+            column (int): column position of the cell
 
-        elif tiles == "unite":
-            plt.axis("off")
-            plt.imshow(self._map)
-            plt.show()
+        Returns:
+            int: the cell's state, a tile id
+        """
+        return int(self._states[row, column])
+
+    def get_options(self, row: int, column: int) -> list:
+        """Get the options left for a cell.
+
+        Args:
+            row (int): row position of the cell
+            column (int): column position of the cell
+
+        Returns:
+            list: the cell's options, tile ids
+        """
+        return self._tileset.get_options(int(self._wave[row, column]))
 
+    def is_collapsed(self, row: int, column: int) -> bool:
+        """Check if a cell is collapsed.
+
+        Args:
+            row (int): row position of the cell
+            column (int): column position of the cell
+
+        Returns:
+            bool: True if the state of the cell was defined
+        """
+        return bool(self._collapsed[row, column])
+
+    def restrict(self, row: int, column: int, keep_options: list) -> int:
+        """Remove from the cell's options all the options not in keep_options.
+
+        Args:
+            row (int): row position of the cell
+            column (int): column position of the cell
+            keep_options (list): tile ids to keep for the cell
+
+        Returns:
+            int: the cell's bitmask
+        """
+        self._wave[row, column] &= self._tileset.get_mask(keep_options)
+        self._push(row, column)
+
+        return self._wave[row, column]
+
+    def collapse(self, row: int, column: int, state: int) -> None:
+        """Collapse a cell to a state.
+
+        Args:
+            row (int): row position of the cell
+            column (int): column position of the cell
+            state (int): new state, a tile id, None if no valid state was given
+        """
+        if state is None:
+            self._wave[row, column] = 0
         else:
-            logger.debug("error. Wrong tiles value was given!")
+            self._states[row, column] = state
+            self._wave[row, column] = 1 << state
+
+        self._collapsed[row, column] = True
+        self._map_current = False
+
+    def draw_board(self, include_entropy=False, tiles="separate", title=""):
+        """Draw board.
+
+        matplotlib is only imported on the first drawing, see src.visual.
+
+        Args:
+            include_entropy (bool, optional): show entropy. Defaults to False.
+            tiles (str, optional): show borders between tiles. Defaults to "separate".
+                "image" draws the whole board as one image with a grid
+                overlay, updated in place by the next calls and never
+                blocking.
+            title (str, optional): set title. Defaults to "".
+        """
+        from src import visual
+
+        visual.draw_board(self, include_entropy=include_entropy, tiles=tiles, title=title)
+
+    def _push(self, row: int, column: int) -> None:
+        """Add the current entropy of a cell to the heap.
+
+        Args:
+            row (int): row position of the cell
+            column (int): column position of the cell
+        """
+        entropy = float(self._tileset.entropy[self._wave[row, column]])
+        self._heap.push(row * self._size + column, entropy)
+
+    def _rebuild_heap(self) -> None:
+        """Fill the heap with the current entropy of the cells not collapsed."""
+        indices = np.flatnonzero(~self._collapsed)
+        entropy = self._tileset.entropy[self._wave.flat[indices]]
+        self._heap.rebuild(entropy, indices)
 
     def _lowest_entropy(self) -> Cell:
         """Returns the cell with the lowest entropy.
 
+        Entries of the heap which are collapsed or whose entropy changed since
+        they were pushed are dropped. Ties are broken randomly.
+
         Returns:
             Cell: the cell found
         """
-        _lowest_entropy = 7
+        entropy_table = self._tileset.entropy
         candidate = self._cells[0, 0]
 
-        for cell in self._cells.flat:
+        while True:
+            entry = self._heap.pop()
+            if entry is None:
+                break
 
-            if not cell.collapsed and cell.entropy < _lowest_entropy:
-                candidate = cell
-                _lowest_entropy = cell.entropy
+            entropy, index = entry
+            row, column = divmod(index, self._size)
+            if not self._collapsed[row, column] and entropy_table[self._wave[row, column]] == entropy:
+                candidate = self._cells[row, column]
+                break
 
-        logger.debug(
-            "The cell with the lowest entropy: {}", candidate)
+        if instrumentation.debug_enabled:
+            logger.debug("The cell with the lowest entropy: {}", candidate)
 
         return candidate
 
-    def _update_neighbours(self, collapsed_cell: Cell) -> dict:
+    def _update_neighbours(self, collapsed_cell: Cell, changed: list = None) -> dict:
         """Update the options of the cells' neighbours.
 
         Args:
             cell (Cell): the cell to update
+            changed (list, optional): positions of the neighbours whose
+                options were reduced are appended to it. Defaults to None.
 
         Return:
             dict: dict containing updated cells per direction
@@ -115,115 +434,723 @@ class Grid:
         # update cell to the left
         if column > lower_bound:
             neighbour = self._update_neighbouring_cell(
-                row=row, column=column - 1, state=state, direction="LEFT"
+                row=row, column=column - 1, state=state, direction="LEFT", changed=changed
             )
             updated_cells["LEFT"] = neighbour
 
         # update cell above
         if row > lower_bound:
             neighbour = self._update_neighbouring_cell(
-                row=row - 1, column=column, state=state, direction="UP"
+                row=row - 1, column=column, state=state, direction="UP", changed=changed
             )
             updated_cells["UP"] = neighbour
 
         # update cell to the right
         if column < upper_bound:
             neighbour = self._update_neighbouring_cell(
-                row=row, column=column + 1, state=state, direction="RIGHT"
+                row=row, column=column + 1, state=state, direction="RIGHT", changed=changed
             )
             updated_cells["RIGHT"] = neighbour
 
         # update cell below
         if row < upper_bound:
             neighbour = self._update_neighbouring_cell(
-                row=row + 1, column=column, state=state, direction="DOWN"
+                row=row + 1, column=column, state=state, direction="DOWN", changed=changed
             )
             updated_cells["DOWN"] = neighbour
 
         return updated_cells
 
-    def _update_neighbouring_cell(self, row: int, column: int, state: str, direction: str) -> Cell:
+    def _update_neighbouring_cell(
+        self, row: int, column: int, state: int, direction: str, changed: list = None
+    ) -> Cell:
         """Update a single neighbouring cell.
 
         Args:
             row (int): row position of the current cell
             column (int): column position of the current cell
-            state (str): state of the current cell
+            state (int): state of the current cell
             direction (str): direction to find the neighbour
+            changed (list, optional): the position of the neighbour is
+                appended to it when its options are reduced. Defaults to None.
 
         Returns:
             Cell: the neighbouring cell
         """
         # logger.debug(f"Checking cell {direction.lower()}.")
-        available_options = self._tileset.get_connection_rules(
+        available_options = self._tileset.get_adjacency(
             state=state, direction=direction
         )
         neighbour: Cell = self._cells[row, column]
 
         # logger.debug("Available Options: {}", available_options)
-        neighbour.update_options(available_options)
+        if not self._collapsed[row, column]:
+            options = self._wave[row, column]
+            remaining = options & available_options
+
+            if remaining != options:
+                if self._strategy == "backtrack":
+                    self._trail.append((row, column, options))
+                self._wave[row, column] = remaining
+                self._push(row, column)
+                if changed is not None:
+                    changed.append((row, column))
+                if self._profiler is not None:
+                    popcount = self._tileset.popcount
+                    self._profiler.options_removed += int(popcount[options]) - int(popcount[remaining])
+
+                if remaining == 0:
+                    self._contradiction = (row, column)
 
         return neighbour
 
-    def _update(self) -> None:
+    def _propagate(self, row: int, column: int) -> list:
+        """Propagate the options of a cell through the wave.
+
+        A worklist of the cells whose options changed is processed until no
+        option can be removed anymore (AC-3): every option left in a cell is
+        then allowed by at least one option of each neighbour.
+
+        Args:
+            row (int): row position of the changed cell
+            column (int): column position of the changed cell
+
+        Returns:
+            list: positions of the cells whose options were reduced
+        """
+        return self._propagate_cells([(row, column)])
+
+    def _propagate_cells(self, cells: list) -> list:
+        """Propagate the options of several cells through the wave.
+
+        Propagation stops at the first cell left without options, which is
+        stored as the contradiction.
+
+        Args:
+            cells (list): positions of the changed cells
+
+        Returns:
+            list: positions of the cells whose options were reduced
+        """
+        support = self._tileset.support
+        entropy = self._tileset.entropy
+        wave = self._wave
+        size = self._size
+        heap = self._heap
+        profiler = self._profiler
+        # the profiler counts the options removed from the trail, so a
+        # profiled propagation keeps one even without backtracking
+        trail = self._trail if self._strategy == "backtrack" else ([] if profiler is not None else None)
+        trail_start = len(trail) if trail is not None else 0
+
+        changed = []
+        queue = deque(cells)
+        queued = set(cells)
+        depth = len(queue)
+
+        while queue:
+            row, column = queue.popleft()
+            queued.discard((row, column))
+            mask = wave[row, column]
+
+            for direction_index, (row_offset, column_offset) in enumerate(OFFSETS):
+                neighbour_row = row + row_offset
+                neighbour_column = column + column_offset
+
+                if not (0 <= neighbour_row < size and 0 <= neighbour_column < size):
+                    continue
+
+                options = wave[neighbour_row, neighbour_column]
+                remaining = options & support[direction_index, mask]
+
+                if remaining == options:
+                    continue
+
+                if trail is not None:
+                    trail.append((neighbour_row, neighbour_column, options))
+                wave[neighbour_row, neighbour_column] = remaining
+                heap.push(neighbour_row * size + neighbour_column, float(entropy[remaining]))
+                neighbour = (neighbour_row, neighbour_column)
+                changed.append(neighbour)
+
+                if remaining == 0:
+                    self._contradiction = neighbour
+                    queue.clear()
+                    break
+
+                if neighbour not in queued:
+                    queue.append(neighbour)
+                    queued.add(neighbour)
+                    if len(queue) > depth:
+                        depth = len(queue)
+
+        if profiler is not None:
+            self._profile_propagation(trail[trail_start:], changed, depth)
+
+        return changed
+
+    def _profile_propagation(self, trail: list, changed: list, depth: int) -> None:
+        """Record a propagation in the profiler.
+
+        Args:
+            trail (list): (row, column, previous bitmask) of the wave changes
+                made by the propagation
+            changed (list): positions of the cells whose options were reduced
+            depth (int): longest worklist of the propagation
+        """
+        popcount = self._tileset.popcount
+        # the options a cell had before its first change, the wave holds the
+        # options left
+        before = {}
+        for row, column, options in trail:
+            before.setdefault((row, column), options)
+
+        self._profiler.options_removed += sum(
+            int(popcount[options]) - int(popcount[self._wave[row, column]])
+            for (row, column), options in before.items()
+        )
+        self._profiler.add_propagation(len(changed), depth)
+
+    def _reset(self, rows: slice = slice(None), columns: slice = slice(None), mask: np.ndarray = None) -> list:
+        """Clear a rectangle of the wave and constrain it by its surroundings.
+
+        Only the cleared cells and the ring of cells around them are visited,
+        apart from the heap rebuilt when the whole grid is cleared.
+
+        Args:
+            rows (slice, optional): rows to clear. Defaults to all.
+            columns (slice, optional): columns to clear. Defaults to all.
+            mask (np.ndarray, optional): boolean array of the shape of the
+                rectangle, the cells to clear. Defaults to None, all of them.
+
+        Returns:
+            list: positions of the cells cleared and of the cells whose
+                options were reduced
+        """
+        row_start, row_stop, _ = rows.indices(self._size)
+        column_start, column_stop, _ = columns.indices(self._size)
+        rows = slice(row_start, row_stop)
+        columns = slice(column_start, column_stop)
+        if mask is None:
+            mask = np.ones(shape=(row_stop - row_start, column_stop - column_start), dtype=bool)
+
+        # views on the rectangle, written through the mask
+        collapsed = self._collapsed[rows, columns]
+        wave = self._wave[rows, columns]
+        self._collapsed_cells -= int(collapsed[mask].sum())
+        collapsed[mask] = False
+        self._states[rows, columns][mask] = UNCOLLAPSED
+        wave[mask] = self._constraints[rows, columns][mask]
+        self._trail.clear()
+        self._decisions.clear()
+        self._contradiction = None
+        self._map_current = False
+
+        cleared = [
+            (row_start + int(row), column_start + int(column))
+            for row, column in np.argwhere(mask)
+        ]
+        if len(cleared) == self._size * self._size:
+            self._rebuild_heap()
+        else:
+            for row, column in cleared:
+                self._push(row, column)
+
+        # the constrained cells and the cells just around the cleared ones
+        # carry their constraints
+        border = [
+            (row_start + int(row), column_start + int(column))
+            for row, column in np.argwhere(mask & (wave != self._tileset.full_mask))
+        ]
+        padded = np.zeros(shape=(mask.shape[0] + 2, mask.shape[1] + 2), dtype=bool)
+        padded[1:-1, 1:-1] = mask
+        ring = np.zeros_like(padded)
+        ring[:-1, :] |= padded[1:, :]
+        ring[1:, :] |= padded[:-1, :]
+        ring[:, :-1] |= padded[:, 1:]
+        ring[:, 1:] |= padded[:, :-1]
+        ring &= ~padded
+        for row, column in np.argwhere(ring):
+            row = row_start - 1 + int(row)
+            column = column_start - 1 + int(column)
+            if 0 <= row < self._size and 0 <= column < self._size:
+                border.append((row, column))
+
+        return cleared + self._propagate_cells(border)
+
+    def _restart(self) -> list:
+        """Clear the whole wave, or the region being solved again.
+
+        Raises:
+            ContradictionError: the restart budget is spent
+
+        Returns:
+            list: positions of the changed cells
+        """
+        if self._restarts >= self._max_restarts:
+            raise ContradictionError(
+                f"No solution found after {self._restarts} restarts")
+
+        self._restarts = self._restarts + 1
+        self._budget_start = (self._backtracks, self._repairs)
+        if instrumentation.debug_enabled:
+            logger.debug("Contradiction. Restarting ({})", self._restarts)
+
+        if self._region is not None:
+            return self._reset(*self._region)
+
+        return self._reset()
+
+    def _backtrack(self) -> tuple:
+        """Undo the collapses until the wave has no contradiction.
+
+        The option chosen by an undone collapse is removed from its cell, so
+        the same choice is not made twice.
+
+        Returns:
+            tuple: (strategy used, positions of the changed cells)
+        """
+        changed = []
+
+        while self._contradiction is not None:
+            spent = self._backtracks - self._budget_start[0]
+            if not self._decisions or spent >= self._max_backtracks:
+                return "restart", changed + self._restart()
+
+            self._backtracks = self._backtracks + 1
+            self._contradiction = None
+            mark, row, column = self._decisions.pop()
+            tile_id = self._states[row, column]
+
+            while len(self._trail) > mark:
+                trail_row, trail_column, options = self._trail.pop()
+                self._wave[trail_row, trail_column] = options
+                self._push(trail_row, trail_column)
+                changed.append((trail_row, trail_column))
+
+            self._states[row, column] = UNCOLLAPSED
+            self._collapsed[row, column] = False
+            self._collapsed_cells = self._collapsed_cells - 1
+
+            options = self._wave[row, column]
+            remaining = int(options) & ~(1 << int(tile_id))
+            self._trail.append((row, column, options))
+            self._wave[row, column] = remaining
+            self._push(row, column)
+
+            if remaining == 0:
+                self._contradiction = (row, column)
+            else:
+                changed.extend(self._propagate(row, column))
+
+        return "backtrack", changed
+
+    def _repair(self) -> tuple:
+        """Clear the patch around the contradiction and constrain it again.
+
+        Returns:
+            tuple: (strategy used, positions of the changed cells)
+        """
+        changed = []
+
+        while self._contradiction is not None:
+            if self._repairs - self._budget_start[1] >= self._max_repairs:
+                return "restart", changed + self._restart()
+
+            patch = self._repair_patch(*self._contradiction)
+            if patch is None:
+                return "restart", changed + self._restart()
+
+            self._repairs = self._repairs + 1
+            if instrumentation.debug_enabled:
+                logger.debug("Contradiction. Repairing rows {} columns {}", patch[0], patch[1])
+            changed.extend(self._reset(*patch))
+
+        return "repair", changed
+
+    def _repair_patch(self, row: int, column: int) -> tuple:
+        """Patch cleared to repair a contradiction.
+
+        While a region is regenerated the patch is clipped to the region and
+        its mask, so the cells around the region are never changed.
+
+        Args:
+            row (int): row position of the contradiction
+            column (int): column position of the contradiction
+
+        Returns:
+            tuple: (rows, columns, mask) to clear, None when the clipped
+                patch does not hold the contradiction
+        """
+        half = self._repair_size // 2
+        rows = slice(max(row - half, 0), min(row - half + self._repair_size, self._size))
+        columns = slice(max(column - half, 0), min(column - half + self._repair_size, self._size))
+        if self._region is None:
+            return rows, columns, None
+
+        region_rows, region_columns, region_mask = self._region
+        if not (region_rows.start <= row < region_rows.stop and region_columns.start <= column < region_columns.stop):
+            return None
+
+        # the patch and the region both hold the contradiction, so they meet
+        rows = slice(max(rows.start, region_rows.start), min(rows.stop, region_rows.stop))
+        columns = slice(max(columns.start, region_columns.start), min(columns.stop, region_columns.stop))
+        if region_mask is None:
+            return rows, columns, None
+
+        mask = region_mask[
+            rows.start - region_rows.start:rows.stop - region_rows.start,
+            columns.start - region_columns.start:columns.stop - region_columns.start
+        ]
+
+        return (rows, columns, mask) if mask[row - rows.start, column - columns.start] else None
+
+    def _choose(self, row: int, column: int) -> int:
+        """Pick one of the options of a cell at random, according to the weights.
+
+        Args:
+            row (int): row position of the cell
+            column (int): column position of the cell
+
+        Returns:
+            int: the option chosen
+        """
+        return self._tileset.sample(int(self._wave[row, column]), self._rng)
+
+    def _resolve_contradiction(self) -> CollapseEvent:
+        """Bring the wave back to a state without contradiction.
+
+        Returns:
+            CollapseEvent: the contradiction resolved
+        """
+        if instrumentation.debug_enabled:
+            logger.debug("Contradiction in cell {}", self._contradiction)
+        self._contradictions = self._contradictions + 1
+        row, column = self._contradiction
+
+        if self._strategy == "backtrack":
+            kind, changed = self._backtrack()
+        elif self._strategy == "repair":
+            kind, changed = self._repair()
+        else:
+            kind, changed = "restart", self._restart()
+
+        return CollapseEvent(kind, row, column, None, changed)
+
+    def _update(self) -> list:
         """Update grid's cells.
 
         Collapse one cell with the lowest entropy and changes available options
-        of neighbours (makes update according to assigned state).
+        of neighbours (makes update according to assigned state). A cell left
+        without options is handled with the grid's strategy.
+
+        Returns:
+            list: CollapseEvent of the collapse and of the contradiction it
+                caused, if any
         """
+        if self._profiler is not None:
+            return self._profiled_update()
+
         # Chose the cell with lowest entropy
         cell = self._lowest_entropy()
-        # Collapse the cell, select one state for it
-        cell.update_state(method="random")
-        # Propagate entropy to neighbours, change their available options
-        self._update_neighbours(cell)
+
+        if self._wave[cell.row, cell.column] == 0:
+            self._contradiction = (cell.row, cell.column)
+            return [self._resolve_contradiction()]
+
+        self._collapse_cell(cell)
+        changed = self._propagate_collapse(cell)
+        events = [self._record_collapse(cell, changed)]
+
+        if self._contradiction is not None:
+            events.append(self._resolve_contradiction())
+
+        return events
+
+    def _profiled_update(self) -> list:
+        """Update grid's cells like _update, timing every phase.
+
+        Returns:
+            list: CollapseEvent of the collapse and of the contradiction it
+                caused, if any
+        """
+        start = perf_counter()
+        cell = self._lowest_entropy()
+        start = self._lap("select", start)
+
+        if self._wave[cell.row, cell.column] == 0:
+            self._contradiction = (cell.row, cell.column)
+            event = self._resolve_contradiction()
+            self._lap("resolve", start)
+            return [event]
+
+        self._collapse_cell(cell)
+        start = self._lap("collapse", start)
+        changed = self._propagate_collapse(cell)
+        start = self._lap("propagate", start)
+        events = [self._record_collapse(cell, changed)]
+        start = self._lap("bookkeeping", start)
+
+        if self._contradiction is not None:
+            events.append(self._resolve_contradiction())
+            self._lap("resolve", start)
+
+        return events
+
+    def _collapse_cell(self, cell: Cell) -> None:
+        """Collapse a cell, select one state for it.
+
+        Args:
+            cell (Cell): the cell with the lowest entropy
+        """
+        row = cell.row
+        column = cell.column
+
+        if self._strategy == "backtrack":
+            self._decisions.append((len(self._trail), row, column))
+            self._trail.append((row, column, self._wave[row, column]))
+
+        cell.update_state(new_state=self._choose(row, column))
+
+    def _propagate_collapse(self, cell: Cell) -> list:
+        """Propagate entropy to the neighbours of a collapsed cell, change their available options.
+
+        Args:
+            cell (Cell): the collapsed cell
+
+        Returns:
+            list: positions of the cells whose options were reduced
+        """
+        if self._propagation == "arc":
+            return self._propagate(cell.row, cell.column)
+
+        changed = []
+        self._update_neighbours(cell, changed)
+        if self._profiler is not None:
+            self._profiler.add_propagation(len(changed))
+
+        return changed
+
+    def _record_collapse(self, cell: Cell, changed: list) -> CollapseEvent:
+        """Count a collapse.
+
+        Args:
+            cell (Cell): the collapsed cell
+            changed (list): positions of the cells whose options were reduced
+
+        Returns:
+            CollapseEvent: the collapse
+        """
         self._collapsed_cells = self._collapsed_cells + 1
+        self._collapses = self._collapses + 1
+        self._propagations = self._propagations + len(changed)
+
+        return CollapseEvent("collapse", cell.row, cell.column, self.get_state(cell.row, cell.column), changed)
+
+    def _lap(self, phase: str, start: float) -> float:
+        """Record the time spent in a phase since start.
+
+        Args:
+            phase (str): phase of the generation step
+            start (float): perf_counter at the start of the phase
+
+        Returns:
+            float: perf_counter now, the start of the next phase
+        """
+        now = perf_counter()
+        self._profiler.add(phase, now - start)
+
+        return now
+
+    def _populate_map(self, out: np.ndarray = None) -> np.ndarray:
+        """Fill 2D array with the patterns of the cells' states.
+
+        Args:
+            out (np.ndarray, optional): array of shape (3 * size, 3 * size) to
+                render into. Defaults to None.
+
+        Returns:
+            np.ndarray: map array
+        """
+        return self._tileset.render(self._states, out=out)
 
-    def _populate_map(self) -> np.ndarray:
-        map = np.ndarray(shape=(3 * self._size, 3 * self._size))
+    def iter_collapse(self, seed=None):
+        """Generate the wave one step at a time.
 
-        for cell in self._cells.flat:
-            cell: Cell = self._cells[cell.row][cell.column]
-            cell_2d = self._tileset.get_tile(cell.state)
+        Nothing is drawn or rendered, the consumer pulls the steps when it
+        wants them and can stop at any time.
 
-            for width in range(3):
-                for height in range(3):
-                    pos_x = cell.row * 3 + width
-                    pos_y = cell.column * 3 + height
-                    map[pos_x][pos_y] = cell_2d[width][height]
+        Args:
+            seed (optional): seed or np.random.Generator, the grid is reset
+                before generating when given. Defaults to None.
 
-        return map
+        Yields:
+            CollapseEvent: every collapse and every contradiction resolved
+        """
+        if seed is not None:
+            self.reset(seed)
 
-    def generate_map(self, draw_stages=False) -> np.ndarray:
+        max_number_collapsed_cells = self._size * self._size
+
+        while self._collapsed_cells < max_number_collapsed_cells:
+            yield from self._update()
+
+        if instrumentation.stats_enabled:
+            logger.debug("Generated a {0}x{0} map: {1}", self._size, self.stats)
+
+    def generate_map(self, draw_stages=False, seed=None, out=None, connected=False) -> np.ndarray:
         """Generate map.
 
         Args:
             draw_stages (bool, optional): draw in stages. Defaults to False.
+            seed (optional): seed or np.random.Generator, the grid is reset
+                before generating when given. Defaults to None.
+            out (np.ndarray, optional): array of shape (3 * size, 3 * size) to
+                render the map into. Defaults to None.
+            connected (bool, optional): make all the paths a single group,
+                see _connect. Defaults to False.
 
         Returns:
             np.ndarray: map array
         """
         max_number_collapsed_cells = int(self._size * self._size)
         percent_threshold = 10
+        steps = self.iter_collapse(seed=seed)
 
-        while self._collapsed_cells < max_number_collapsed_cells:
-            self._update()
+        if not (draw_stages or instrumentation.debug_enabled):
+            # nothing to report on the way, run the steps without bookkeeping
+            deque(steps, maxlen=0)
+
+        for _ in steps:
             percent = 100 * self._collapsed_cells / max_number_collapsed_cells
 
             if percent > percent_threshold or percent == 100:
 
-                logger.debug(f"The map is generated by {percent:.1f}%")
+                if instrumentation.debug_enabled:
+                    logger.debug(f"The map is generated by {percent:.1f}%")
                 if draw_stages:
                     self.draw_board(
                         include_entropy=True,
+                        tiles="image",
                         title=percent_threshold
                     )
                 percent_threshold = percent_threshold + 10
 
+        if connected:
+            self._connect()
+
         # Fill 2D array to save the whole map
-        self._map = self._populate_map()
+        self._map = self._populate_map(out=out)
+        self._map_current = True
 
         return self._map
 
+    def regenerate_region(self, rows, columns, seed=None, mask: np.ndarray = None) -> np.ndarray:
+        """Solve a region of a solved grid again, keeping the rest of the map.
+
+        The region is cleared and constrained by the collapsed cells around
+        it through the connection rules of the tileset, so the new tiles fit
+        the map. Contradictions are resolved with the grid's strategy, a
+        restart only clears the region again. The work, including rendering
+        the region into the map of the last generate_map, is proportional to
+        the region rather than to the grid; a grid solved another way, e.g.
+        by iter_collapse, has its whole map rendered. The counters of stats
+        then describe the regeneration.
+
+        Args:
+            rows: rows of the region, a slice or (start, stop)
+            columns: columns of the region, a slice or (start, stop)
+            seed (optional): seed or np.random.Generator replacing the random
+                generator. Defaults to None, keeping the current one.
+            mask (np.ndarray, optional): boolean array of the shape of the
+                region, the cells to solve again. Defaults to None, all of
+                them.
+
+        Raises:
+            ValueError: the grid is not solved or the mask does not match
+                the region
+            ContradictionError: the region cannot be solved within the
+                restart budget
+
+        Returns:
+            np.ndarray: the map of the grid
+        """
+        if self._collapsed_cells < self._size * self._size:
+            raise ValueError("Only a solved grid can have a region regenerated")
+
+        rows = rows if isinstance(rows, slice) else slice(*rows)
+        columns = columns if isinstance(columns, slice) else slice(*columns)
+        row_start, row_stop, _ = rows.indices(self._size)
+        column_start, column_stop, _ = columns.indices(self._size)
+        rows = slice(row_start, row_stop)
+        columns = slice(column_start, column_stop)
+        shape = (max(row_stop - row_start, 0), max(column_stop - column_start, 0))
+        if mask is not None:
+            mask = np.asarray(mask, dtype=bool)
+            if mask.shape != shape:
+                raise ValueError(f"Mask of shape {mask.shape} given for a region of shape {shape}")
+
+        # the collapses below clear the flag
+        map_current = self._map_current
+        if seed is not None:
+            self._rng = np.random.default_rng(seed)
+        self._reset_counters()
+        # the heap only holds outdated entries of the solved grid
+        self._heap.clear()
+
+        self._region = (rows, columns, mask)
+        try:
+            self._reset(rows, columns, mask)
+            deque(self.iter_collapse(), maxlen=0)
+        finally:
+            self._region = None
+
+        if map_current:
+            self._tileset.render(
+                self._states[rows, columns],
+                out=self._map[3 * row_start:3 * row_stop, 3 * column_start:3 * column_stop]
+            )
+        else:
+            self._map = self._populate_map(out=self._map)
+        self._map_current = True
+
+        return self._map
+
+    def _connect(self) -> None:
+        """Make the paths of the solved wave a single group.
+
+        The rectangles around the paths apart from the largest group are
+        cleared and solved again, up to CONNECT_ATTEMPTS times. The paths
+        still apart are then filled with walls: their cells become WALL,
+        which keeps the connection rules since the cells next to them only
+        meet them through walls.
+        """
+        for attempt in range(CONNECT_ATTEMPTS + 1):
+            # the centre pixel of a tile is a path for every tile but WALL
+            cell_labels = label(self._populate_map())[1::3, 1::3]
+            groups, cells = np.unique(cell_labels[cell_labels >= 0], return_counts=True)
+            if groups.size <= 1:
+                return
+
+            apart_groups = np.delete(groups, np.argmax(cells))
+            if attempt == CONNECT_ATTEMPTS:
+                break
+
+            if instrumentation.debug_enabled:
+                logger.debug("Paths apart in {} groups. Solving them again", apart_groups.size)
+            for group in apart_groups:
+                rows, columns = np.nonzero(cell_labels == group)
+                self._reset(
+                    slice(max(rows.min() - 1, 0), rows.max() + 2),
+                    slice(max(columns.min() - 1, 0), columns.max() + 2)
+                )
+            deque(self.iter_collapse(), maxlen=0)
+
+        apart = np.isin(cell_labels, apart_groups)
+        if instrumentation.debug_enabled:
+            logger.debug("Filling {} cells of paths apart with walls", int(apart.sum()))
+        self._states[apart] = WALL
+        self._wave[apart] = 1 << WALL
+
     def __repr__(self) -> str:
         return f"<src.grid.Grid size={self._size} cells={list(self._cells)}>"
@@ -0,0 +1,143 @@
+import os
+
+OFF = 0
+STATS = 1
+DEBUG = 2
+
+LEVELS = ("off", "stats", "debug")
+
+# environment variable giving the level of new processes, e.g. the workers
+# of a MazeFarm started by spawn
+ENVIRONMENT_VARIABLE = "WFC_MAZE_INSTRUMENTATION"
+
+# flags read by the generation hot paths before building any log message,
+# plain module attributes so that a disabled level costs one lookup
+debug_enabled = False
+stats_enabled = True
+
+
+def get_level() -> int:
+    """Current instrumentation level.
+
+    Returns:
+        int: OFF, STATS or DEBUG
+    """
+    if debug_enabled:
+        return DEBUG
+
+    return STATS if stats_enabled else OFF
+
+
+def set_level(level) -> int:
+    """Change the instrumentation level.
+
+    OFF logs nothing while generating, STATS logs the counters of every map
+    once it is generated (collapses, propagations, contradictions), DEBUG
+    also logs every step of the generation.
+
+    Args:
+        level: OFF, STATS, DEBUG or their names "off", "stats", "debug"
+
+    Raises:
+        ValueError: unknown level
+
+    Returns:
+        int: the previous level
+    """
+    global debug_enabled, stats_enabled
+
+    if isinstance(level, str) and level.lower() in LEVELS:
+        level = LEVELS.index(level.lower())
+    if level not in (OFF, STATS, DEBUG):
+        raise ValueError(f"Unknown instrumentation level {level!r}, expected one of {LEVELS}")
+
+    previous = get_level()
+    debug_enabled = level >= DEBUG
+    stats_enabled = level >= STATS
+
+    return previous
+
+
+PHASES = ("select", "collapse", "propagate", "resolve", "bookkeeping")
+
+
+class Profiler:
+    """
+    Class Profiler.
+
+    Time and counters of the phases of a generation step, recorded by the
+    grids built with profile=True. Grids without a profiler only pay a check
+    for None per phase.
+
+    seconds - cumulative time per phase: "select" picks the cell with the
+              lowest entropy, "collapse" chooses its state, "propagate"
+              updates the other cells, "resolve" handles contradictions and
+              "bookkeeping" counts and builds the events
+    calls - number of times each phase ran
+    propagations - number of propagations
+    cells_touched - cells whose options were reduced by the propagations
+    max_queue_depth - longest worklist of an arc propagation
+    options_removed - options removed by the propagations
+    """
+
+    seconds: dict
+    calls: dict
+    propagations: int
+    cells_touched: int
+    max_queue_depth: int
+    options_removed: int
+
+    def __init__(self):
+        """Class Profiler constructor."""
+        self.reset()
+
+    def reset(self) -> None:
+        """Set all the counters back to zero."""
+        self.seconds = dict.fromkeys(PHASES, 0.0)
+        self.calls = dict.fromkeys(PHASES, 0)
+        self.propagations = 0
+        self.cells_touched = 0
+        self.max_queue_depth = 0
+        self.options_removed = 0
+
+    def add(self, phase: str, seconds: float) -> None:
+        """Record one run of a phase.
+
+        Args:
+            phase (str): one of PHASES
+            seconds (float): duration of the run
+        """
+        self.seconds[phase] += seconds
+        self.calls[phase] += 1
+
+    def add_propagation(self, cells_touched: int, queue_depth: int = 0) -> None:
+        """Record one propagation.
+
+        Args:
+            cells_touched (int): cells whose options were reduced
+            queue_depth (int, optional): longest worklist. Defaults to 0.
+        """
+        self.propagations += 1
+        self.cells_touched += cells_touched
+        self.max_queue_depth = max(self.max_queue_depth, queue_depth)
+
+    def as_dict(self) -> dict:
+        """Export the counters.
+
+        Returns:
+            dict: phases with their seconds and calls, and the propagation
+                counters
+        """
+        return {
+            "phases": {
+                phase: {"seconds": self.seconds[phase], "calls": self.calls[phase]}
+                for phase in PHASES
+            },
+            "propagations": self.propagations,
+            "cells_touched": self.cells_touched,
+            "max_queue_depth": self.max_queue_depth,
+            "options_removed": self.options_removed,
+        }
+
+
+set_level(os.environ.get(ENVIRONMENT_VARIABLE, "stats"))
@@ -0,0 +1,22 @@
+# logger of the package, loguru takes about as long to import as numpy so it
+# is only imported when something is logged: processes which never log, e.g.
+# the workers of a MazeFarm at the OFF instrumentation level, do not pay for it
+
+
+class _LazyLogger:
+    """
+    Class _LazyLogger.
+
+    Stand-in for the loguru logger, every attribute is looked up on the
+    loguru logger so patching loguru.logger keeps working.
+    """
+
+    __slots__ = ()
+
+    def __getattr__(self, name: str):
+        from loguru import logger as loguru_logger
+
+        return getattr(loguru_logger, name)
+
+
+logger = _LazyLogger()
@@ -0,0 +1,104 @@
+import os
+import numpy as np
+from src.log import logger
+from src.grid import Grid
+
+
+def iter_frames(grid: Grid, seed=None, every: int = None):
+    """Replay the generation of a grid as rendered frames.
+
+    The frame is rendered once, then every collapse event only redraws the
+    tiles whose state may have changed: the collapsed cell, or the cells
+    changed by a contradiction. A frame is yielded before the first event,
+    after every `every` events and once the map is generated.
+
+    Args:
+        grid (Grid): grid to generate
+        seed (optional): seed or np.random.Generator, the grid is reset
+            before generating when given. Defaults to None.
+        every (int, optional): number of events between two frames. Defaults
+            to None, the grid size, which gives about as many frames as the
+            grid has rows.
+
+    Yields:
+        np.ndarray: uint8 frame of shape (3 * size, 3 * size)
+    """
+    if seed is not None:
+        grid.reset(seed)
+
+    steps = grid.iter_collapse()
+    states = grid.states
+    size = len(states)
+    every = every or size
+    frame = np.empty(shape=(3 * size, 3 * size), dtype=np.uint8)
+    # (rows, tile rows, columns, tile columns) view of the frame
+    blocks = frame.reshape(size, 3, size, 3)
+    grid.tileset.render(states, out=frame)
+    patterns = grid.tileset.patterns
+    pending = 0
+
+    yield frame.copy()
+
+    for event in steps:
+        if event.kind == "collapse":
+            blocks[event.row, :, event.column, :] = patterns[event.state]
+        else:
+            rows, columns = np.array([(event.row, event.column), *event.changed]).T
+            blocks[rows, :, columns, :] = patterns[states[rows, columns]]
+
+        pending = pending + 1
+        if pending == every:
+            pending = 0
+            yield frame.copy()
+
+    if pending:
+        yield frame.copy()
+
+
+def record(grid: Grid, seed=None, every: int = None) -> np.ndarray:
+    """Record the generation of a grid.
+
+    Args:
+        grid (Grid): grid to generate
+        seed (optional): seed or np.random.Generator. Defaults to None.
+        every (int, optional): number of events between two frames. Defaults
+            to None, the grid size.
+
+    Returns:
+        np.ndarray: uint8 frames of shape (frames, 3 * size, 3 * size)
+    """
+    return np.stack(list(iter_frames(grid, seed=seed, every=every)))
+
+
+def save_frames(frames, path: str, duration: int = 40, scale: int = 1) -> None:
+    """Save frames as a raw .npy stack or an animated .gif.
+
+    Pillow is only imported to write a GIF.
+
+    Args:
+        frames: frames of shape (3 * size, 3 * size), an array or an iterable
+        path (str): file path ending with .npy or .gif
+        duration (int, optional): milliseconds per GIF frame. Defaults to 40.
+        scale (int, optional): pixels per GIF pixel. Defaults to 1.
+
+    Raises:
+        ValueError: unknown file extension
+    """
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension == ".npy":
+        np.save(path, np.asarray(frames if isinstance(frames, np.ndarray) else list(frames), dtype=np.uint8))
+
+    elif extension == ".gif":
+        from PIL import Image
+
+        images = [
+            Image.fromarray(np.asarray(frame, dtype=np.uint8).repeat(scale, 0).repeat(scale, 1) * 255)
+            for frame in frames
+        ]
+        images[0].save(path, save_all=True, append_images=images[1:], duration=duration, loop=0)
+
+    else:
+        raise ValueError(f"Unknown frame format {path!r}, expected a .npy or .gif file")
+
+    logger.debug("Saved frames to {}", path)
@@ -1,5 +1,12 @@
+import hashlib
+from types import MappingProxyType
 import numpy as np
 
+DIRECTIONS = ("LEFT", "UP", "RIGHT", "DOWN")
+
+# tile id of Tile_10, the state of the cells not collapsed
+UNCOLLAPSED = 7
+
 
 class Tileset:
     """
@@ -7,14 +14,28 @@ class Tileset:
             for Grid World
     """
     _tile_list: list
+    _tile_ids: dict
     _tiles: dict
     _connections: dict
     _connection_rules: dict
+    _popcount: np.ndarray
+    _patterns: np.ndarray
+    _adjacency: np.ndarray
+    _support: np.ndarray
+    _codes: np.ndarray
+    _weights: np.ndarray
+    _entropy: np.ndarray
+    _alias_probability: np.ndarray
+    _alias: np.ndarray
 
-    def __init__(self):
+    def __init__(self, weights=None):
         """
         List of all available tiles where Tile_0 ... Tile_6 are defined tiles
         and Tile_10 is a tile of undefined cells (which are not collapsed)
+
+        weights - relative frequency of the defined tiles, a sequence indexed
+                  by tile id or a dictionary from tile id or name to weight,
+                  missing tiles weigh 1. Defaults to the same weight for all.
         """
         self._tile_list = [
             "Tile_0",
@@ -27,43 +48,53 @@ class Tileset:
             "Tile_10"
         ]
 
+        """
+        Tile ids are the positions in the tile list, states, options and
+        connection rules are tile ids and the names are only used for display
+        and I/O. The ids of the defined tiles double as bit positions in the
+        option bitmask of a cell.
+        """
+        self._tile_ids = {
+            name: index for index, name in enumerate(self._tile_list)
+        }
+
         self._tiles = {
-            "Tile_0": np.array([
+            0: np.array([  # Tile_0
                 [0, 0, 0],
                 [0, 0, 0],
                 [0, 0, 0]
             ]),
-            "Tile_1": np.array([
+            1: np.array([  # Tile_1
                 [0, 1, 0],
                 [0, 1, 1],
                 [0, 1, 0]
             ]),
-            "Tile_2": np.array([
+            2: np.array([  # Tile_2
                 [0, 0, 0],
                 [1, 1, 1],
                 [0, 1, 0]
             ]),
-            "Tile_3": np.array([
+            3: np.array([  # Tile_3
                 [0, 1, 0],
                 [1, 1, 0],
                 [0, 1, 0]
             ]),
-            "Tile_4": np.array([
+            4: np.array([  # Tile_4
                 [0, 1, 0],
                 [1, 1, 1],
                 [0, 0, 0]
             ]),
-            "Tile_5": np.array([
+            5: np.array([  # Tile_5
                 [0, 0, 0],
                 [1, 1, 1],
                 [0, 0, 0]
             ]),
-            "Tile_6": np.array([
+            6: np.array([  # Tile_6
                 [0, 1, 0],
                 [0, 1, 0],
                 [0, 1, 0]
             ]),
-            "Tile_10": np.array([
+            UNCOLLAPSED: np.array([  # Tile_10
                 [1, 1, 1],
                 [1, 1, 1],
                 [1, 1, 1]
@@ -78,57 +109,57 @@ class Tileset:
         """
         self._connections = {
             "wall": {
-                "UP": ["Tile_0", "Tile_4", "Tile_5"],
-                "RIGHT": ["Tile_0", "Tile_1", "Tile_6"],
-                "DOWN": ["Tile_0", "Tile_2", "Tile_5"],
-                "LEFT": ["Tile_0", "Tile_3", "Tile_6"]
+                "UP": [0, 4, 5],
+                "RIGHT": [0, 1, 6],
+                "DOWN": [0, 2, 5],
+                "LEFT": [0, 3, 6]
             },
             "path": {
-                "UP": ["Tile_1", "Tile_2", "Tile_3", "Tile_6"],
-                "RIGHT": ["Tile_2", "Tile_3", "Tile_4", "Tile_5"],
-                "DOWN": ["Tile_1", "Tile_3", "Tile_4", "Tile_6"],
-                "LEFT": ["Tile_1", "Tile_2", "Tile_4", "Tile_5"]
+                "UP": [1, 2, 3, 6],
+                "RIGHT": [2, 3, 4, 5],
+                "DOWN": [1, 3, 4, 6],
+                "LEFT": [1, 2, 4, 5]
             }
         }
 
         self._connection_rules = {
-            "Tile_0": {
+            0: {  # Tile_0
                 "UP": self._connections["wall"]["UP"],
                 "RIGHT": self._connections["wall"]["RIGHT"],
                 "DOWN": self._connections["wall"]["DOWN"],
                 "LEFT": self._connections["wall"]["LEFT"]
             },
-            "Tile_1": {
+            1: {  # Tile_1
                 "UP": self._connections["path"]["UP"],
                 "RIGHT": self._connections["path"]["RIGHT"],
                 "DOWN": self._connections["path"]["DOWN"],
                 "LEFT": self._connections["wall"]["LEFT"]
             },
-            "Tile_2": {
+            2: {  # Tile_2
                 "UP": self._connections["wall"]["UP"],
                 "RIGHT": self._connections["path"]["RIGHT"],
                 "DOWN": self._connections["path"]["DOWN"],
                 "LEFT": self._connections["path"]["LEFT"]
             },
-            "Tile_3": {
+            3: {  # Tile_3
                 "UP": self._connections["path"]["UP"],
                 "RIGHT": self._connections["wall"]["RIGHT"],
                 "DOWN": self._connections["path"]["DOWN"],
                 "LEFT": self._connections["path"]["LEFT"]
             },
-            "Tile_4": {
+            4: {  # Tile_4
                 "UP": self._connections["path"]["UP"],
                 "RIGHT": self._connections["path"]["RIGHT"],
                 "DOWN": self._connections["wall"]["DOWN"],
                 "LEFT": self._connections["path"]["LEFT"]
             },
-            "Tile_5": {
+            5: {  # Tile_5
                 "UP": self._connections["wall"]["UP"],
                 "RIGHT": self._connections["path"]["RIGHT"],
                 "DOWN": self._connections["wall"]["DOWN"],
                 "LEFT": self._connections["path"]["LEFT"]
             },
-            "Tile_6": {
+            6: {  # Tile_6
                 "UP": self._connections["path"]["UP"],
                 "RIGHT": self._connections["wall"]["RIGHT"],
                 "DOWN": self._connections["path"]["DOWN"],
@@ -136,11 +167,108 @@ class Tileset:
             }
         }
 
+        # patterns of all the tiles stacked in tile list order
+        self._patterns = np.stack(
+            [self._tiles[tile_id] for tile_id in range(len(self._tile_list))]
+        ).astype(np.uint8)
+
+        # number of options for every possible bitmask
+        self._popcount = np.array(
+            [bin(mask).count("1") for mask in range(self.full_mask + 1)],
+            dtype=np.uint8
+        )
+
+        # tile id of every 3x3 pattern read as a 9 bit number, 255 if unknown
+        self._codes = np.full(shape=1 << self._patterns[0].size, fill_value=255, dtype=np.uint8)
+        self._codes[self._pattern_codes(self._patterns)] = np.arange(len(self._tile_list))
+
+        # compiled connection rules, built on first use
+        self._adjacency = None
+        self._support = None
+
+        self._weights = self._parse_weights(weights)
+        self._compile_weights()
+
     @property
     def tile_list(self):
         """Tile list property."""
         return self._tile_list
 
+    @property
+    def options_count(self) -> int:
+        """Number of tiles a cell can collapse to (Tile_10 excluded)."""
+        return len(self._tile_list) - 1
+
+    @property
+    def full_mask(self) -> int:
+        """Bitmask with every option set."""
+        return (1 << self.options_count) - 1
+
+    @property
+    def mask_dtype(self) -> type:
+        """Smallest unsigned integer type holding a full bitmask."""
+        return np.uint8 if self.options_count <= 8 else np.uint16
+
+    @property
+    def popcount(self) -> np.ndarray:
+        """Number of options for every bitmask, indexed by the bitmask."""
+        return self._popcount
+
+    @property
+    def weights(self) -> np.ndarray:
+        """Weight of every option, indexed by tile id."""
+        return self._weights
+
+    @property
+    def entropy(self) -> np.ndarray:
+        """Shannon entropy of the weights of every bitmask, indexed by the bitmask.
+
+        A single option has no entropy, the empty bitmask of a cell in
+        contradiction is given -1 so that it comes before any other cell.
+        """
+        return self._entropy
+
+    @property
+    def patterns(self) -> np.ndarray:
+        """Patterns of all the tiles, indexed by tile id."""
+        return self._patterns
+
+    @property
+    def adjacency(self) -> np.ndarray:
+        """Compiled connection rules.
+
+        Array of shape (directions, options): bitmask of the options allowed
+        for the neighbour in a direction of a cell in a given state.
+        """
+        if self._adjacency is None:
+            self._compile()
+
+        return self._adjacency
+
+    @property
+    def support(self) -> np.ndarray:
+        """Compiled connection rules for sets of options.
+
+        Array of shape (directions, 2 ** options): bitmask of the options
+        allowed for the neighbour in a direction of a cell with the given
+        options bitmask.
+        """
+        if self._support is None:
+            self._compile()
+
+        return self._support
+
+    @property
+    def fingerprint(self) -> bytes:
+        """SHA-1 digest of the tile names, patterns, compiled connection rules and weights."""
+        digest = hashlib.sha1(usedforsecurity=False)
+        digest.update(",".join(self._tile_list).encode())
+        digest.update(self._patterns.tobytes())
+        digest.update(self.adjacency.tobytes())
+        digest.update(self._weights.tobytes())
+
+        return digest.digest()
+
     @property
     def tiles(self):
         """Tiles property."""
@@ -151,21 +279,389 @@ class Tileset:
         """Connection Rules property."""
         return self._connection_rules
 
-    def get_tile(self, state: str) -> list:
+    def get_tile(self, state: int) -> list:
         """Get tile pattern by state.
 
         Args:
-            state (str): Cell state
+            state (int): Cell state, a tile id
 
         Returns:
             list: pattern
         """
         return self._tiles[state]
 
-    def get_connection_rules(self, state: str, direction: str) -> list:
+    def render(self, states: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+        """Assemble the patterns of a grid of tile ids into one array.
+
+        Any leading dimension of states is kept, so a batch of grids of shape
+        (batch, rows, columns) gives maps of shape (batch, 3 * rows, 3 * columns).
+
+        Args:
+            states (np.ndarray): tile ids, the last two dimensions are the grid
+            out (np.ndarray, optional): array to render into. Defaults to None.
+
+        Returns:
+            np.ndarray: the map
+        """
+        *batch, rows, columns = states.shape
+        tile_rows, tile_columns = self._patterns.shape[1:]
+        shape = (*batch, rows * tile_rows, columns * tile_columns)
+
+        # (..., rows, columns, tile_rows, tile_columns) -> (..., rows, tile_rows, columns, tile_columns)
+        blocks = np.swapaxes(self._patterns[states], -3, -2)
+
+        if out is None:
+            return blocks.reshape(shape)
+
+        try:
+            # write the blocks straight into out when it can be viewed as blocks
+            view = out.view()
+            view.shape = blocks.shape
+            view[...] = blocks
+        except AttributeError:
+            out[...] = blocks.reshape(shape)
+
+        return out
+
+    def identify(self, maps: np.ndarray) -> np.ndarray:
+        """Find the tile ids of a rendered map, the inverse of render.
+
+        Args:
+            maps (np.ndarray): map of shape (..., 3 * rows, 3 * columns)
+
+        Raises:
+            ValueError: a block of the map is not the pattern of a tile
+
+        Returns:
+            np.ndarray: uint8 tile ids of shape (..., rows, columns)
+        """
+        *batch, height, width = maps.shape
+        tile_rows, tile_columns = self._patterns.shape[1:]
+        blocks = maps.reshape(*batch, height // tile_rows, tile_rows, width // tile_columns, tile_columns)
+
+        states = self._codes[self._pattern_codes(np.swapaxes(blocks, -3, -2))]
+        if (states == 255).any():
+            raise ValueError("The map holds blocks which are not tile patterns")
+
+        return states
+
+    def get_connection_rules(self, state: int, direction: str) -> list:
         """Connection Rules.
 
         Returns:
             list: connection rules depending on cell state and direction
         """
         return self._connection_rules[state][direction]
+
+    def get_tile_id(self, state: str) -> int:
+        """Get tile id by name.
+
+        Args:
+            state (str): tile name
+
+        Returns:
+            int: position of the name in the tile list
+        """
+        return self._tile_ids[state]
+
+    def get_mask(self, options: list) -> int:
+        """Convert a list of options to a bitmask.
+
+        Tile ids which are not options (UNCOLLAPSED) are ignored.
+
+        Args:
+            options (list): tile ids
+
+        Returns:
+            int: bitmask with one bit per option
+        """
+        mask = 0
+        for option in options:
+            if 0 <= option < self.options_count:
+                mask |= 1 << int(option)
+
+        return mask
+
+    def get_options(self, mask: int) -> list:
+        """Convert a bitmask to a list of options.
+
+        Args:
+            mask (int): bitmask with one bit per option
+
+        Returns:
+            list: tile ids in increasing order
+        """
+        return [
+            tile_id
+            for tile_id in range(self.options_count)
+            if mask >> tile_id & 1
+        ]
+
+    def get_adjacency(self, state: int, direction: str) -> int:
+        """Compiled connection rules.
+
+        Args:
+            state (int): Cell state, a tile id
+            direction (str): direction to the neighbour
+
+        Returns:
+            int: bitmask of the options allowed for the neighbour
+        """
+        return int(self.adjacency[DIRECTIONS.index(direction), state])
+
+    def get_support(self, mask: int, direction: str) -> int:
+        """Compiled connection rules for a set of options.
+
+        Args:
+            mask (int): bitmask of the cell options
+            direction (str): direction to the neighbour
+
+        Returns:
+            int: bitmask of the options allowed for the neighbour
+        """
+        return int(self.support[DIRECTIONS.index(direction), mask])
+
+    def sample(self, mask: int, rng: np.random.Generator = None) -> int:
+        """Pick one of the options of a bitmask according to the weights.
+
+        The alias table of the bitmask gives the option in constant time from
+        a single random number.
+
+        Args:
+            mask (int): bitmask of the options, not empty
+            rng (np.random.Generator, optional): random generator. Defaults to
+                None, using the global numpy generator.
+
+        Returns:
+            int: the tile id chosen
+        """
+        draw = (rng.random() if rng is not None else np.random.random()) * self.options_count
+        column = int(draw)
+
+        if draw - column < self._alias_probability[mask, column]:
+            return column
+
+        return int(self._alias[mask, column])
+
+    def sample_many(self, masks: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """Pick one option of every bitmask according to the weights.
+
+        Args:
+            masks (np.ndarray): bitmasks of the options, none empty
+            rng (np.random.Generator): random generator
+
+        Returns:
+            np.ndarray: uint8 tile ids, one per bitmask
+        """
+        draws = rng.random(masks.shape) * self.options_count
+        columns = draws.astype(np.intp)
+        kept = draws - columns < self._alias_probability[masks, columns]
+
+        return np.where(kept, columns, self._alias[masks, columns]).astype(np.uint8)
+
+    def _parse_weights(self, weights) -> np.ndarray:
+        """Convert the weights given to the constructor to an array.
+
+        Raises:
+            ValueError: a weight is not positive or a tile is unknown
+
+        Returns:
+            np.ndarray: float weight of every option, indexed by tile id
+        """
+        parsed = np.ones(shape=self.options_count, dtype=np.float64)
+
+        if isinstance(weights, dict):
+            for tile, weight in weights.items():
+                tile_id = self._tile_ids.get(tile, tile)
+                if tile_id not in range(self.options_count):
+                    raise ValueError(f"Unknown tile {tile!r}")
+                parsed[tile_id] = weight
+        elif weights is not None:
+            if len(weights) != self.options_count:
+                raise ValueError(f"Expected {self.options_count} weights, got {len(weights)}")
+            parsed[:] = weights
+
+        if not (parsed > 0).all():
+            raise ValueError("The weights must be positive")
+
+        return parsed
+
+    def _compile_weights(self) -> None:
+        """Build the entropy and the alias tables of every bitmask.
+
+        A cell only ever holds one of the 2 ** options bitmasks, so the sums
+        of the weights are computed once per bitmask here instead of being
+        kept up to date per cell.
+
+        The alias table of a bitmask has one column per option: drawing a
+        column uniformly, then keeping it with its probability or taking its
+        alias otherwise, picks each option of the bitmask with a probability
+        proportional to its weight (Vose's method). Options outside of the
+        bitmask have no probability and always give their alias.
+        """
+        masks = self.full_mask + 1
+        self._entropy = np.full(shape=masks, fill_value=-1.0)
+        self._alias_probability = np.zeros(shape=(masks, self.options_count))
+        self._alias = np.zeros(shape=(masks, self.options_count), dtype=np.uint8)
+
+        for mask in range(1, masks):
+            options = self.get_options(mask)
+            weights = self._weights[options]
+            total = weights.sum()
+            self._entropy[mask] = np.log(total) - (weights * np.log(weights)).sum() / total
+
+            scaled = dict.fromkeys(range(self.options_count), 0.0)
+            scaled.update(zip(options, (weights * self.options_count / total).tolist()))
+            small = [column for column, value in scaled.items() if value < 1]
+            large = [column for column, value in scaled.items() if value >= 1]
+
+            while small and large:
+                less, more = small.pop(), large.pop()
+                self._alias_probability[mask, less] = scaled[less]
+                self._alias[mask, less] = more
+                scaled[more] = scaled[more] + scaled[less] - 1
+                (small if scaled[more] < 1 else large).append(more)
+
+            # left overs are only off by rounding errors
+            for column in small + large:
+                self._alias_probability[mask, column] = 1.0
+                self._alias[mask, column] = column
+
+        # no entropy for a single option, whatever the rounding
+        self._entropy[self._popcount == 1] = 0.0
+
+    @staticmethod
+    def _pattern_codes(patterns: np.ndarray) -> np.ndarray:
+        """Read 3x3 patterns as 9 bit numbers.
+
+        Args:
+            patterns (np.ndarray): patterns of shape (..., 3, 3)
+
+        Returns:
+            np.ndarray: one number per pattern
+        """
+        *_, tile_rows, tile_columns = patterns.shape
+        weights = (1 << np.arange(tile_rows * tile_columns)).reshape(tile_rows, tile_columns)
+
+        return ((patterns != 0) * weights).sum(axis=(-2, -1))
+
+    def freeze(self) -> "Tileset":
+        """Make the tileset read-only so that it can be shared.
+
+        The connection rules are compiled, the arrays are made read-only, the
+        lists become tuples and the dictionaries read-only mappings.
+
+        Returns:
+            Tileset: the tileset itself
+        """
+        self._compile()
+
+        for array in (
+            self._patterns, self._popcount, self._codes, self._adjacency, self._support,
+            self._weights, self._entropy, self._alias_probability, self._alias,
+            *self._tiles.values()
+        ):
+            array.setflags(write=False)
+
+        self._tile_list = tuple(self._tile_list)
+        self._tile_ids = MappingProxyType(self._tile_ids)
+        self._tiles = MappingProxyType(self._tiles)
+        self._connections = MappingProxyType({
+            kind: MappingProxyType({direction: tuple(rule) for direction, rule in rules.items()})
+            for kind, rules in self._connections.items()
+        })
+        self._connection_rules = MappingProxyType({
+            state: MappingProxyType({direction: tuple(rule) for direction, rule in rules.items()})
+            for state, rules in self._connection_rules.items()
+        })
+
+        return self
+
+    def __getstate__(self) -> dict:
+        """State to pickle, the read-only mappings of a frozen tileset become dicts.
+
+        Returns:
+            dict: attributes of the tileset and whether it is frozen
+        """
+        state = dict(self.__dict__)
+        state["_frozen"] = isinstance(self._tiles, MappingProxyType)
+        state["_tile_list"] = list(self._tile_list)
+        state["_tile_ids"] = dict(self._tile_ids)
+        state["_tiles"] = dict(self._tiles)
+        for name in ("_connections", "_connection_rules"):
+            state[name] = {
+                key: {direction: list(rule) for direction, rule in rules.items()}
+                for key, rules in state[name].items()
+            }
+
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        """Restore a pickled tileset, frozen again if it was.
+
+        Args:
+            state (dict): state given by __getstate__
+        """
+        frozen = state.pop("_frozen")
+        self.__dict__.update(state)
+
+        if frozen:
+            self.freeze()
+
+    def _compile(self) -> None:
+        """Compile the connection rules into bitmask tables."""
+        adjacency = np.zeros(
+            shape=(len(DIRECTIONS), self.options_count), dtype=self.mask_dtype
+        )
+        for tile_id in range(self.options_count):
+            rules = self._connection_rules[tile_id]
+            for direction_index, direction in enumerate(DIRECTIONS):
+                adjacency[direction_index, tile_id] = self.get_mask(rules[direction])
+
+        # the support of a set is the support of the set without its lowest
+        # option OR the support of that option
+        support = np.zeros(
+            shape=(len(DIRECTIONS), self.full_mask + 1), dtype=self.mask_dtype
+        )
+        for mask in range(1, self.full_mask + 1):
+            lowest = (mask & -mask).bit_length() - 1
+            support[:, mask] = support[:, mask & (mask - 1)] | adjacency[:, lowest]
+
+        self._adjacency = adjacency
+        self._support = support
+
+
+# tilesets available by name
+TILESETS = {
+    "default": Tileset,
+}
+
+_shared_tilesets = {}
+
+
+def get_tileset(name: str = "default") -> Tileset:
+    """Get the shared tileset of a name.
+
+    Each tileset is built and frozen once per process, then the same
+    instance is given to every cell, grid and solver. Worker processes
+    started by fork inherit the tilesets already built.
+
+    Args:
+        name (str, optional): name of the tileset. Defaults to "default".
+
+    Raises:
+        ValueError: unknown tileset
+
+    Returns:
+        Tileset: the read-only tileset
+    """
+    tileset = _shared_tilesets.get(name)
+
+    if tileset is None:
+        if name not in TILESETS:
+            raise ValueError(f"Unknown tileset {name!r}, expected one of {tuple(TILESETS)}")
+
+        tileset = TILESETS[name]().freeze()
+        _shared_tilesets[name] = tileset
+
+    return tileset
@@ -0,0 +1,131 @@
+# drawing of the grids, imported by Grid.draw_board on first use so that
+# generating maps never imports matplotlib
+import numpy as np
+import matplotlib.pyplot as plt
+from src.log import logger
+
+
+def draw_board(grid, include_entropy=False, tiles="separate", title=""):
+    """Draw board.
+
+    Args:
+        grid (Grid): grid to draw
+        include_entropy (bool, optional): show entropy. Defaults to False.
+        tiles (str, optional): show borders between tiles. Defaults to "separate".
+            "image" draws the whole board as one image with a grid
+            overlay, updated in place by the next calls and never
+            blocking.
+        title (str, optional): set title. Defaults to "".
+    """
+    if tiles == "separate":
+        counter = 1
+        fig = plt.figure(figsize=(8, 8))
+
+        if isinstance(title, str):
+            fig.suptitle("tiles", fontsize=16)
+        elif isinstance(title, int):
+            fig.suptitle(str(title) + "%", fontsize=16)
+
+        for row_cell in grid._cells:
+            for cell in row_cell:
+                state = cell.state
+
+                ax = fig.add_subplot(grid._size, grid._size, counter)
+                # ax.set_title(state)
+
+                if include_entropy:
+                    plt.text(
+                        0.7,
+                        0.7,
+                        str(cell.entropy),
+                        fontsize=12, color="w"
+                    )
+
+                plt.axis("off")
+                plt.imshow(grid._tileset.get_tile(state))
+
+                counter = counter + 1
+        # fig.tight_layout()
+        plt.show()
+
+    elif tiles == "unite":
+        plt.axis("off")
+        plt.imshow(grid._map)
+        plt.show()
+
+    elif tiles == "image":
+        draw_image(grid, include_entropy, title)
+
+    else:
+        logger.debug("error. Wrong tiles value was given!")
+
+
+def draw_image(grid, include_entropy: bool, title) -> None:
+    """Draw the board as one image, reusing the figure of the last call.
+
+    The cells not collapsed show the pattern of UNCOLLAPSED. The figure
+    is created and shown without blocking on the first call, or when it
+    was closed, the next calls only replace the image data and the texts
+    and let the event loop redraw.
+
+    Args:
+        grid (Grid): grid to draw
+        include_entropy (bool): show the number of options of the cells
+            not collapsed
+        title: a percentage when an int, "tiles" otherwise
+    """
+    board = grid._board
+    if board is None or not plt.fignum_exists(board["figure"].number):
+        board = grid._board = _create_board(grid)
+
+    figure = board["figure"]
+    board["image"].set_data(grid._populate_map())
+    figure.suptitle(f"{title}%" if isinstance(title, int) else "tiles", fontsize=16)
+
+    if include_entropy:
+        if board["texts"] is None:
+            board["texts"] = [
+                board["axes"].text(
+                    3 * column + 1, 3 * row + 1, "", visible=False,
+                    ha="center", va="center", fontsize=8, color="r"
+                )
+                for row in range(grid._size) for column in range(grid._size)
+            ]
+
+        entropy = grid._tileset.popcount[grid._wave].ravel()
+        # hidden texts are skipped when drawing
+        for text, options, collapsed in zip(board["texts"], entropy, grid._collapsed.ravel()):
+            text.set_visible(not collapsed)
+            text.set_text(str(options))
+
+    elif board["texts"] is not None:
+        for text in board["texts"]:
+            text.set_visible(False)
+
+    figure.canvas.draw_idle()
+    figure.canvas.flush_events()
+
+
+def _create_board(grid) -> dict:
+    """Create and show the figure of the "image" drawing.
+
+    Args:
+        grid (Grid): grid to draw
+
+    Returns:
+        dict: figure, axes, image and entropy texts, None until the
+            entropy is drawn
+    """
+    figure, axes = plt.subplots(figsize=(8, 8))
+    image = axes.imshow(grid._populate_map(), cmap="gray", vmin=0, vmax=1, interpolation="nearest")
+
+    # lines between the tiles
+    ticks = np.arange(-0.5, 3 * grid._size, 3)
+    axes.set_xticks(ticks, minor=True)
+    axes.set_yticks(ticks, minor=True)
+    axes.grid(which="minor", color="tab:blue", linewidth=0.5)
+    axes.tick_params(which="both", bottom=False, left=False, labelbottom=False, labelleft=False)
+
+    plt.show(block=False)
+
+    return {"figure": figure, "axes": axes, "image": image, "texts": None}
@@ -0,0 +1,284 @@
+from collections import OrderedDict
+from itertools import combinations
+import numpy as np
+from src import instrumentation
+from src.log import logger
+from src.grid import ContradictionError, Grid
+from src.tileset import DIRECTIONS, Tileset, get_tileset
+
+# cells of each border of a chunk
+_BORDER_CELLS = {
+    "LEFT": (slice(None), 0),
+    "UP": (0, slice(None)),
+    "RIGHT": (slice(None), -1),
+    "DOWN": (-1, slice(None)),
+}
+
+# direction from a chunk to its neighbour and back, with the chunk offset
+_SIDES = (
+    ("LEFT", "RIGHT", (0, -1)),
+    ("UP", "DOWN", (-1, 0)),
+    ("RIGHT", "LEFT", (0, 1)),
+    ("DOWN", "UP", (1, 0)),
+)
+
+
+class World:
+    """
+    Class World.
+
+    Infinite map made of square chunks generated on demand. A chunk is a
+    Grid seeded from the world seed and the chunk coordinates, whose border
+    cells are constrained by the borders of the neighbouring chunks already
+    generated, so the connection rules hold across the seams.
+
+    The tiles of a chunk depend on the world seed, its coordinates and the
+    neighbours generated before it, so on the order the chunks are first
+    visited; the same visits in the same order always give the same world.
+    When the borders of the neighbours cannot all be met, e.g. a small chunk
+    between two chunks already generated, the chunk is generated with as
+    many of them as can be met and the seams of the others may break the
+    connection rules.
+
+    cache - the last chunks used, evicted in least recently used order
+    records - for every chunk ever generated, its four borders and the sides
+              constrained by a neighbour when it was generated; an evicted
+              chunk is generated again from the same seed and the same
+              constraints, which gives the same tiles. Records are never
+              evicted, they take 4 * chunk_size bytes and a few objects per
+              chunk visited
+    """
+
+    _chunk_size: int
+    _seed: int
+    _cache_size: int
+    _grid_options: dict
+    _tileset: Tileset
+    _cache: OrderedDict
+    _records: dict
+
+    def __init__(self, chunk_size: int = 16, seed: int = 0, cache_size: int = 64, **grid_options):
+        """Class World constructor.
+
+        Args:
+            chunk_size (int, optional): number of cells per side of a chunk. Defaults to 16.
+            seed (int, optional): world seed. Defaults to 0.
+            cache_size (int, optional): number of chunks kept in memory. Defaults to 64.
+            grid_options: keyword arguments given to every Grid
+
+        Raises:
+            ValueError: chunk size lower than 1
+        """
+        if chunk_size < 1:
+            raise ValueError(f"Chunk size must be at least 1, got {chunk_size}")
+
+        self._chunk_size = chunk_size
+        self._seed = seed
+        self._cache_size = cache_size
+        self._grid_options = grid_options
+        self._tileset = get_tileset()
+        self._cache = OrderedDict()
+        self._records = {}
+
+    @property
+    def chunk_size(self) -> int:
+        """Chunk size property."""
+        return self._chunk_size
+
+    @property
+    def resident_chunks(self) -> list:
+        """Coordinates of the chunks in memory, least recently used first."""
+        return list(self._cache)
+
+    def get_chunk(self, chunk_row: int, chunk_column: int) -> np.ndarray:
+        """Get the tile ids of a chunk, generating it if needed.
+
+        Args:
+            chunk_row (int): row of the chunk
+            chunk_column (int): column of the chunk
+
+        Returns:
+            np.ndarray: read-only tile ids of shape (chunk_size, chunk_size)
+        """
+        key = (chunk_row, chunk_column)
+
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        states = self._generate(chunk_row, chunk_column)
+        self._cache[key] = states
+
+        while len(self._cache) > self._cache_size:
+            evicted, _ = self._cache.popitem(last=False)
+            if instrumentation.debug_enabled:
+                logger.debug("Evicting chunk {}", evicted)
+
+        return states
+
+    def get_window(self, row: int, column: int, height: int, width: int) -> np.ndarray:
+        """Get the tile ids of a rectangle of cells spanning several chunks.
+
+        Args:
+            row (int): world row of the top left cell
+            column (int): world column of the top left cell
+            height (int): number of rows
+            width (int): number of columns
+
+        Returns:
+            np.ndarray: tile ids of shape (height, width)
+        """
+        size = self._chunk_size
+        window = np.empty(shape=(height, width), dtype=np.uint8)
+
+        for chunk_row in range(row // size, (row + height - 1) // size + 1):
+            for chunk_column in range(column // size, (column + width - 1) // size + 1):
+                states = self.get_chunk(chunk_row, chunk_column)
+
+                top = max(row, chunk_row * size)
+                bottom = min(row + height, (chunk_row + 1) * size)
+                left = max(column, chunk_column * size)
+                right = min(column + width, (chunk_column + 1) * size)
+
+                window[top - row:bottom - row, left - column:right - column] = states[
+                    top - chunk_row * size:bottom - chunk_row * size,
+                    left - chunk_column * size:right - chunk_column * size
+                ]
+
+        return window
+
+    def get_map(self, row: int, column: int, height: int, width: int) -> np.ndarray:
+        """Render a rectangle of cells spanning several chunks.
+
+        Args:
+            row (int): world row of the top left cell
+            column (int): world column of the top left cell
+            height (int): number of rows
+            width (int): number of columns
+
+        Returns:
+            np.ndarray: uint8 map of shape (3 * height, 3 * width)
+        """
+        return self._tileset.render(self.get_window(row, column, height, width))
+
+    def _chunk_seed(self, chunk_row: int, chunk_column: int) -> np.random.SeedSequence:
+        """Seed of a chunk, derived from the world seed and its coordinates.
+
+        Args:
+            chunk_row (int): row of the chunk
+            chunk_column (int): column of the chunk
+
+        Returns:
+            np.random.SeedSequence: the chunk seed
+        """
+        # zigzag encoding, the seed sequence only takes non negative numbers
+        return np.random.SeedSequence([
+            self._seed,
+            2 * chunk_row if chunk_row >= 0 else -2 * chunk_row - 1,
+            2 * chunk_column if chunk_column >= 0 else -2 * chunk_column - 1,
+        ])
+
+    def _generate(self, chunk_row: int, chunk_column: int) -> np.ndarray:
+        """Generate a chunk constrained by the borders of its neighbours.
+
+        Args:
+            chunk_row (int): row of the chunk
+            chunk_column (int): column of the chunk
+
+        Returns:
+            np.ndarray: read-only tile ids of shape (chunk_size, chunk_size)
+        """
+        key = (chunk_row, chunk_column)
+        record = self._records.get(key)
+
+        if record is None:
+            sides = tuple(
+                (chunk_row + offset[0], chunk_column + offset[1]) in self._records
+                for _, _, offset in _SIDES
+            )
+            grid, sides = self._solve_relaxed(chunk_row, chunk_column, sides)
+        else:
+            _, sides = record
+            grid = self._solve(chunk_row, chunk_column, sides)
+
+        states = grid.states.copy()
+        states.setflags(write=False)
+
+        if record is None:
+            borders = tuple(states[_BORDER_CELLS[direction]].copy() for direction in DIRECTIONS)
+            self._records[key] = (borders, sides)
+
+        if instrumentation.stats_enabled:
+            logger.debug("Generated chunk {}", key)
+
+        return states
+
+    def _solve_relaxed(self, chunk_row: int, chunk_column: int, sides: tuple) -> tuple:
+        """Solve a chunk with as many of the borders of its neighbours as possible.
+
+        The chunk is solved with every constrained side first, then with one
+        side less, and so on; the sides are tried in a fixed order so the
+        chunk is reproducible.
+
+        Args:
+            chunk_row (int): row of the chunk
+            chunk_column (int): column of the chunk
+            sides (tuple): whether each side of _SIDES has a neighbour
+
+        Returns:
+            tuple: (solved Grid, sides constrained)
+        """
+        constrained = [index for index, side in enumerate(sides) if side]
+
+        for count in range(len(constrained), 0, -1):
+            for kept in combinations(constrained, count):
+                relaxed = tuple(index in kept for index in range(len(_SIDES)))
+                try:
+                    return self._solve(chunk_row, chunk_column, relaxed), relaxed
+                except ContradictionError:
+                    if instrumentation.debug_enabled:
+                        logger.debug("Chunk {} cannot meet the sides {}", (chunk_row, chunk_column), relaxed)
+
+        relaxed = (False,) * len(_SIDES)
+
+        return self._solve(chunk_row, chunk_column, relaxed), relaxed
+
+    def _solve(self, chunk_row: int, chunk_column: int, sides: tuple) -> Grid:
+        """Solve a chunk constrained by the borders of some of its neighbours.
+
+        Args:
+            chunk_row (int): row of the chunk
+            chunk_column (int): column of the chunk
+            sides (tuple): whether each side of _SIDES is constrained
+
+        Raises:
+            ContradictionError: the borders cannot be met
+
+        Returns:
+            Grid: the solved chunk
+        """
+        adjacency = self._tileset.adjacency
+        masks = np.full(
+            shape=(self._chunk_size, self._chunk_size),
+            fill_value=self._tileset.full_mask,
+            dtype=self._tileset.mask_dtype
+        )
+
+        for constrained, (side, opposite, offset) in zip(sides, _SIDES):
+            if not constrained:
+                continue
+
+            neighbour_borders, _ = self._records[(chunk_row + offset[0], chunk_column + offset[1])]
+            facing = neighbour_borders[DIRECTIONS.index(opposite)]
+            # options allowed next to the facing border, on the side of this chunk
+            masks[_BORDER_CELLS[side]] &= adjacency[DIRECTIONS.index(opposite)][facing]
+
+        grid = Grid(
+            self._chunk_size,
+            seed=np.random.default_rng(self._chunk_seed(chunk_row, chunk_column)),
+            **self._grid_options
+        )
+        grid.constrain(masks)
+        grid.generate_map()
+
+        return grid
@@ -0,0 +1,69 @@
+import json
+from click.testing import CliRunner
+from benchmarks.bench import bench, compare, run_benchmarks
+
+
+class TestBench:
+    def test_run_benchmarks(self):
+        # Arrange
+
+        # Act
+        report = run_benchmarks(sizes=(4, 6), repeat=1)
+
+        # Assert
+        names = {result["name"] for result in report["results"]}
+        assert names == {
+            "import",
+            "grid_construction",
+            "generate_map",
+            "lowest_entropy",
+            "update_neighbours",
+            "propagate",
+            "populate_map",
+            "generate_batch",
+        }
+        assert [result["size"] for result in report["results"] if result["name"] == "generate_map"] == [4, 6]
+        assert all(result["best"] >= 0 for result in report["results"])
+        json.dumps(report)
+
+    def test_run_benchmarks_only(self):
+        # Arrange
+
+        # Act
+        report = run_benchmarks(sizes=(4,), repeat=2, only=("populate_map",))
+
+        # Assert
+        assert len(report["results"]) == 1
+        assert report["results"][0]["repeat"] == 2
+
+    def test_compare(self):
+        # Arrange
+        baseline = {"results": [
+            {"name": "generate_map", "size": 9, "best": 1.0},
+            {"name": "populate_map", "size": 9, "best": 1.0},
+        ]}
+        report = {"results": [
+            {"name": "generate_map", "size": 9, "best": 1.05},
+            {"name": "populate_map", "size": 9, "best": 1.5},
+            {"name": "propagate", "size": 9, "best": 9.0},
+        ]}
+
+        # Act
+        regressions = compare(report, baseline, tolerance=0.1)
+
+        # Assert
+        assert regressions == [("populate_map", 9, 1.0, 1.5)]
+
+    def test_bench_command(self, tmp_path):
+        # Arrange
+        output = tmp_path / "bench.json"
+        runner = CliRunner()
+
+        # Act
+        result = runner.invoke(bench, ["--sizes", "4", "--repeat", "1", "--only", "generate_map",
+                                       "--output", str(output)])
+
+        # Assert
+        assert result.exit_code == 0
+        report = json.loads(output.read_text())
+        assert report["results"][0]["name"] == "generate_map"
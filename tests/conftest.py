@@ -31,4 +31,4 @@ def directions():
 
 @pytest.fixture(autouse=True)
 def cell_with_low_entropy():
-    return Cell(options=["Tile_0"])
+    return Cell(options=[0])
@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+from src.batch import generate_batch, _BatchSolver
+from src.grid import ContradictionError
+from src.tileset import Tileset
+
+
+class TestBatch:
+    @pytest.mark.parametrize("size, count", [(1, 1), (3, 4), (9, 8)])
+    def test_generate_batch_shape(self, size, count):
+        # Arrange
+
+        # Act
+        maps = generate_batch(size=size, count=count, seed=0)
+
+        # Assert
+        assert maps.shape == (count, 3 * size, 3 * size)
+        assert maps.dtype == np.uint8
+        assert maps.flags["C_CONTIGUOUS"]
+
+    def test_generate_batch_seeded(self):
+        # Arrange
+
+        # Act
+        first = generate_batch(size=6, count=5, seed=42)
+        second = generate_batch(size=6, count=5, seed=42)
+
+        # Assert
+        assert (first == second).all()
+
+    def test_generate_batch_consistent(self):
+        # Arrange
+        size = 10
+        solver = _BatchSolver(size=size, count=6, seed=3, max_restarts=100)
+        adjacency = Tileset().adjacency
+
+        # Act
+        maps = solver.solve()
+
+        # Assert
+        assert solver._collapsed.all()
+        assert not solver._open_cells.any()
+        states = solver._nth_option[solver._wave, 0].reshape(6, size, size)
+        assert (maps == Tileset().render(states)).all()
+        assert (adjacency[2][states[:, :, :-1]] >> states[:, :, 1:] & 1).all()
+        assert (adjacency[3][states[:, :-1, :]] >> states[:, 1:, :] & 1).all()
+
+    def test_generate_batch_weights(self):
+        # Arrange
+        tileset = Tileset(weights={0: 20}).freeze()
+
+        # Act
+        uniform = Tileset().identify(generate_batch(size=8, count=8, seed=0))
+        weighted = tileset.identify(generate_batch(size=8, count=8, seed=0, tileset=tileset))
+
+        # Assert
+        assert (weighted == 0).mean() > (uniform == 0).mean()
+
+    def test__restart(self):
+        # Arrange
+        solver = _BatchSolver(size=3, count=2, seed=0, max_restarts=1)
+        solver._wave[9:] = 0
+        solver._collapsed[9:] = True
+        solver._open_cells[1] = 0
+
+        # Act
+        solver._restart(np.array([1]))
+
+        # Assert
+        assert solver._restarts == 1
+        assert (solver._wave[9:] == solver._tileset.full_mask).all()
+        assert not solver._collapsed[9:].any()
+        assert solver._open_cells[1] == 9
+
+    def test__restart_budget(self):
+        # Arrange
+        solver = _BatchSolver(size=3, count=2, seed=0, max_restarts=1)
+
+        # Act / Assert
+        with pytest.raises(ContradictionError):
+            solver._restart(np.array([0, 1]))
+
+    def test__update_contradiction(self):
+        # Arrange
+        solver = _BatchSolver(size=3, count=2, seed=0, max_restarts=1)
+        solver._wave[4] = 0
+        solver._collapsed[4] = True
+
+        # Act
+        solver._update(np.array([4]))
+
+        # Assert
+        assert solver._restarts == 1
+        assert solver._wave[4] == solver._tileset.full_mask
@@ -1,5 +1,7 @@
+import numpy as np
 import pytest
 from src.cell import Cell
+from src.tileset import UNCOLLAPSED
 
 
 class TestCell:
@@ -12,29 +14,54 @@ class TestCell:
 
         # Assert
         assert cell.options == [
-            "Tile_0",
-            "Tile_1",
-            "Tile_2",
-            "Tile_3",
-            "Tile_4",
-            "Tile_5",
-            "Tile_6",
+            0,
+            1,
+            2,
+            3,
+            4,
+            5,
+            6,
         ]
         assert cell.collapsed is False
-        assert cell.state == "Tile_10"
+        assert cell.state == UNCOLLAPSED
         assert cell.entropy == 7
 
     @pytest.mark.repeat(3)
     def test_id(self, faker):
+        # Arrange
+        row_index = faker.random_digit()
+        column_index = faker.random_digit()
+
+        # Act
+        cell = Cell(row=row_index, column=column_index)
+
+        # Assert
+        assert cell.id == (row_index, column_index)
+
+    def test_eq(self):
+        # Arrange
+        cell = Cell(row=1, column=2)
+
+        # Act
+        same = Cell(options=[3], row=1, column=2)
+        other = Cell(row=2, column=1)
+
+        # Assert
+        assert cell == same
+        assert hash(cell) == hash(same)
+        assert cell != other
+        assert cell != (1, 2)
+
+    def test_slots(self):
         # Arrange
         cell = Cell()
-        expected_id = faker.uuid4()
 
         # Act
-        cell._id = expected_id
+        with pytest.raises(AttributeError):
+            cell.extra = 1
 
         # Assert
-        assert cell.id == expected_id
+        assert not hasattr(cell, "__dict__")
 
     @pytest.mark.repeat(3)
     def test_state(self, faker):
@@ -121,59 +148,61 @@ class TestCell:
         actual = cell.update_state()
 
         # Assert
-        assert actual == "Tile_0"
+        assert actual == 0
         assert [] == cell.options
         assert 0 == cell.entropy
         assert cell.collapsed is True
 
     @pytest.mark.parametrize("expected_state", [
-        "Tile_0",
-        "Tile_1",
-        "Tile_2",
-        "Tile_3",
-        "Tile_4",
-        "Tile_5",
-        "Tile_6"
+        0,
+        1,
+        2,
+        3,
+        4,
+        5,
+        6
     ])
     def test_update_state_collapsed(self, expected_state, mocker):
         # Arrange
         cell = Cell()
         logger = mocker.patch("loguru.logger.debug")
+        mocker.patch("src.instrumentation.debug_enabled", True)
 
         # Act
         cell._collapsed = True
         actual = cell.update_state(expected_state)
 
         # Assert
-        assert actual == "Tile_10"
+        assert actual == UNCOLLAPSED
         assert [
-            "Tile_0",
-            "Tile_1",
-            "Tile_2",
-            "Tile_3",
-            "Tile_4",
-            "Tile_5",
-            "Tile_6"
+            0,
+            1,
+            2,
+            3,
+            4,
+            5,
+            6
         ] == cell.options
         assert 7 == cell.entropy
         assert cell.collapsed is True
         logger.assert_called()
 
     @pytest.mark.parametrize("random_option", [
-        "Tile_0",
-        "Tile_1",
-        "Tile_2",
-        "Tile_3",
-        "Tile_4",
-        "Tile_5",
-        "Tile_6"
+        0,
+        1,
+        2,
+        3,
+        4,
+        5,
+        6
     ])
     def test_update_state_random(self, mocker, random_option, complete_tile_list):
         # Arrange
         cell = Cell()
-        choice = mocker.patch("numpy.random.choice")
-        choice.return_value = random_option
+        sample = mocker.patch("src.cell.Tileset.sample")
+        sample.return_value = random_option
         logger = mocker.patch("loguru.logger.debug")
+        mocker.patch("src.instrumentation.debug_enabled", True)
         mocker.patch(
             "src.cell.Tileset.tile_list",
             new_callable=mocker.PropertyMock,
@@ -190,14 +219,54 @@ class TestCell:
         assert cell.collapsed is True
         logger.assert_called()
 
+    def test_update_state_random_not_logged(self, mocker):
+        # Arrange
+        cell = Cell()
+        logger = mocker.patch("loguru.logger.debug")
+        mocker.patch("src.instrumentation.debug_enabled", False)
+
+        # Act
+        cell.update_state(method="random", rng=np.random.default_rng(0))
+
+        # Assert
+        assert cell.collapsed is True
+        logger.assert_not_called()
+
+    def test_update_state_random_rng(self):
+        # Arrange
+        first = Cell(options=[1, 2, 3])
+        second = Cell(options=[1, 2, 3])
+
+        # Act
+        first_state = first.update_state(method="random", rng=np.random.default_rng(7))
+        second_state = second.update_state(method="random", rng=np.random.default_rng(7))
+
+        # Assert
+        assert first_state == second_state
+        assert first_state in [1, 2, 3]
+
+    def test_update_state_random_no_options(self, mocker):
+        # Arrange
+        cell = Cell()
+        cell._options = []
+        logger = mocker.patch("loguru.logger.debug")
+
+        # Act
+        actual = cell.update_state(method="random")
+
+        # Assert
+        assert actual == UNCOLLAPSED
+        assert cell.collapsed is False
+        logger.assert_called()
+
     @pytest.mark.parametrize("new_state", [
-        "Tile_0",
-        "Tile_1",
-        "Tile_2",
-        "Tile_3",
-        "Tile_4",
-        "Tile_5",
-        "Tile_6"
+        0,
+        1,
+        2,
+        3,
+        4,
+        5,
+        6
     ])
     def test_update_state_new_state(self, new_state, mocker, complete_tile_list):
         # Arrange
@@ -217,16 +286,16 @@ class TestCell:
         assert 0 == cell.entropy
         assert cell.collapsed is True
 
-    @pytest.mark.parametrize("state_index, new_state", [
-        (0, "Tile_0"),
-        (1, "Tile_1"),
-        (2, "Tile_2"),
-        (3, "Tile_3"),
-        (4, "Tile_4"),
-        (5, "Tile_5"),
-        (6, "Tile_6"),
+    @pytest.mark.parametrize("state_name, new_state", [
+        ("Tile_0", 0),
+        ("Tile_1", 1),
+        ("Tile_2", 2),
+        ("Tile_3", 3),
+        ("Tile_4", 4),
+        ("Tile_5", 5),
+        ("Tile_6", 6),
     ])
-    def test_update_state_int_ok(self, state_index, new_state, mocker, complete_tile_list):
+    def test_update_state_name_ok(self, state_name, new_state, mocker, complete_tile_list):
         # Arrange
         cell = Cell()
         mocker.patch(
@@ -236,10 +305,11 @@ class TestCell:
         )
 
         # Act
-        result = cell.update_state(new_state=state_index)
+        result = cell.update_state(new_state=state_name)
 
         # Assert
         assert result == new_state
+        assert isinstance(result, int)
 
     @pytest.mark.parametrize("state_index", [
         -1, 7
@@ -292,13 +362,13 @@ class TestCell:
         assert actual == expected_options
 
     @pytest.mark.parametrize("keep_options, expected_options", [
-        (["Tile_0"], ["Tile_0"]),
-        (["Tile_1"], ["Tile_1"]),
-        (["Tile_2"], ["Tile_2"]),
-        (["Tile_3"], ["Tile_3"]),
-        (["Tile_4"], ["Tile_4"]),
-        (["Tile_5"], ["Tile_5"]),
-        (["Tile_6"], ["Tile_6"]),
+        ([0], [0]),
+        ([1], [1]),
+        ([2], [2]),
+        ([3], [3]),
+        ([4], [4]),
+        ([5], [5]),
+        ([6], [6]),
     ])
     def test_update_options_valid(self, keep_options, expected_options):
         # Arrange
@@ -0,0 +1,118 @@
+import numpy as np
+import pytest
+from click.testing import CliRunner
+from src.cli import cli
+from src.dataset import DatasetReader, read_header
+from src.grid import Grid
+from src.tileset import get_tileset
+
+
+def make_runner() -> CliRunner:
+    """Runner capturing stderr apart from stdout, click 8.2 does it by default and drops mix_stderr."""
+    try:
+        return CliRunner(mix_stderr=False)
+    except TypeError:
+        return CliRunner()
+
+
+class TestCli:
+    def test_generate_file(self, tmp_path):
+        # Arrange
+        path = tmp_path / "maps.bin"
+        runner = make_runner()
+
+        # Act
+        result = runner.invoke(cli, [
+            "generate", "--size", "4", "--count", "5", "--seed", "10", "--workers", "2",
+            "--chunk-size", "2", "--tileset", "default", "--out", str(path)
+        ])
+
+        # Assert
+        assert result.exit_code == 0, result.output
+        assert "5/5 maps (100.0%)" in result.stderr
+        assert read_header(path)["fingerprint"] == get_tileset().fingerprint
+        with DatasetReader(path) as reader:
+            assert len(reader) == 5
+            assert reader.seed == 10
+            assert np.array_equal(reader.get_map(3), Grid(4, seed=13).generate_map())
+
+    def test_generate_append(self, tmp_path):
+        # Arrange
+        path = tmp_path / "maps.bin"
+        runner = make_runner()
+        arguments = ["generate", "--size", "3", "--count", "2", "--workers", "1", "--format", "states",
+                     "--out", str(path), "--no-progress"]
+        runner.invoke(cli, arguments)
+
+        # Act
+        result = runner.invoke(cli, [*arguments, "--append", "--seed", "99"])
+
+        # Assert
+        assert result.exit_code == 0, result.output
+        assert result.stderr == ""
+        with DatasetReader(path) as reader:
+            assert len(reader) == 4
+            assert reader.seed == 0
+            assert np.array_equal(reader.get_map(3), Grid(3, seed=3).generate_map())
+
+    @pytest.mark.parametrize("arguments", [["--size", "4"], ["--format", "packed"], []])
+    def test_generate_append_mismatch(self, tmp_path, arguments):
+        # Arrange
+        path = tmp_path / "maps.bin"
+        runner = make_runner()
+        if arguments:
+            runner.invoke(cli, ["generate", "--size", "3", "--format", "states", "--workers", "1", "--out", str(path),
+                                "--no-progress"])
+        else:
+            path.write_bytes(b"not a dataset")
+
+        # Act
+        result = runner.invoke(cli, [
+            "generate", "--size", "3", "--format", "states", *arguments, "--workers", "1", "--out", str(path),
+            "--append", "--no-progress"
+        ])
+
+        # Assert
+        assert result.exit_code == 2
+        assert "Invalid value for '--out'" in result.stderr
+        assert "Traceback" not in result.stderr
+
+    def test_generate_stdout(self, tmp_path):
+        # Arrange
+        path = tmp_path / "maps.bin"
+        runner = make_runner()
+
+        # Act
+        result = runner.invoke(cli, ["generate", "--size", "3", "--count", "3", "--workers", "1", "--seed", "5"])
+        path.write_bytes(result.stdout_bytes)
+
+        # Assert
+        assert result.exit_code == 0, result.output
+        assert read_header(path)["count"] == 3
+        with DatasetReader(path) as reader:
+            assert np.array_equal(reader.get_map(0), Grid(3, seed=5).generate_map())
+
+    def test_generate_logging_off(self, tmp_path, mocker):
+        # Arrange
+        logger = mocker.patch("loguru.logger.debug")
+        runner = make_runner()
+
+        # Act
+        result = runner.invoke(cli, [
+            "generate", "--size", "3", "--count", "2", "--workers", "1", "--out", str(tmp_path / "maps.bin"),
+            "--no-progress"
+        ])
+
+        # Assert
+        assert result.exit_code == 0, result.output
+        logger.assert_not_called()
+
+    def test_generate_invalid_count(self):
+        # Arrange
+        runner = make_runner()
+
+        # Act
+        result = runner.invoke(cli, ["generate", "--count", "0"])
+
+        # Assert
+        assert result.exit_code == 2
@@ -0,0 +1,100 @@
+from collections import deque
+import numpy as np
+import pytest
+from src.batch import generate_batch
+from src.connectivity import analyse, label
+
+
+def components(map: np.ndarray) -> list:
+    """Sizes of the groups of path pixels found by a breadth first search."""
+    height, width = map.shape
+    seen = np.zeros(map.shape, dtype=bool)
+    sizes = []
+
+    for row, column in zip(*np.nonzero(map)):
+        if seen[row, column]:
+            continue
+
+        seen[row, column] = True
+        queue = deque([(row, column)])
+        size = 0
+        while queue:
+            row, column = queue.popleft()
+            size = size + 1
+            for neighbour_row, neighbour_column in (
+                (row - 1, column), (row + 1, column), (row, column - 1), (row, column + 1)
+            ):
+                if (0 <= neighbour_row < height and 0 <= neighbour_column < width
+                        and map[neighbour_row, neighbour_column] and not seen[neighbour_row, neighbour_column]):
+                    seen[neighbour_row, neighbour_column] = True
+                    queue.append((neighbour_row, neighbour_column))
+        sizes.append(size)
+
+    return sizes
+
+
+class TestConnectivity:
+    def test_label(self):
+        # Arrange
+        map = np.array([
+            [1, 1, 0, 1],
+            [0, 0, 0, 1],
+            [1, 1, 1, 1],
+        ])
+
+        # Act
+        labels = label(map)
+
+        # Assert
+        assert labels.tolist() == [
+            [0, 0, -1, 3],
+            [-1, -1, -1, 3],
+            [3, 3, 3, 3],
+        ]
+
+    @pytest.mark.parametrize("map, expected", [
+        ([[1, 1, 0, 1], [0, 0, 0, 1], [1, 1, 1, 1]], (2, 0.75, 4, 0)),
+        ([[1, 1, 1], [1, 0, 1], [1, 1, 1]], (1, 1.0, 0, 1)),
+        ([[0, 0], [0, 0]], (0, 0.0, 0, 0)),
+        ([[0, 1, 0], [1, 1, 1], [0, 1, 0]], (1, 1.0, 4, 0)),
+    ])
+    def test_analyse(self, map, expected):
+        # Arrange
+
+        # Act
+        connectivity = analyse(np.array(map))
+
+        # Assert
+        assert connectivity.components.shape == ()
+        assert (
+            int(connectivity.components),
+            float(connectivity.largest_component),
+            int(connectivity.dead_ends),
+            int(connectivity.loops),
+        ) == expected
+
+    def test_analyse_batch(self):
+        # Arrange
+        maps = generate_batch(size=4, count=12, seed=0).reshape(3, 4, 12, 12)
+
+        # Act
+        connectivity = analyse(maps)
+
+        # Assert
+        assert connectivity.components.shape == (3, 4)
+        for index in np.ndindex(3, 4):
+            single = analyse(maps[index])
+            assert [field[index] for field in connectivity] == list(single)
+
+    def test_analyse_matches_search(self):
+        # Arrange
+        maps = np.random.default_rng(0).random(size=(6, 30, 30)) < 0.6
+
+        # Act
+        connectivity = analyse(maps)
+
+        # Assert
+        for index, map in enumerate(maps):
+            sizes = components(map)
+            assert connectivity.components[index] == len(sizes)
+            assert connectivity.largest_component[index] == max(sizes) / map.sum()
@@ -0,0 +1,198 @@
+import io
+import numpy as np
+import pytest
+from src.batch import generate_batch
+from src.tileset import Tileset
+from src.dataset import HEADER_SIZE, DatasetReader, DatasetWriter, read_header, record_shape
+
+
+class TestDataset:
+    @pytest.mark.parametrize("size, format, expected", [
+        (5, "packed", (15, 2)),
+        (8, "packed", (24, 3)),
+        (5, "states", (5, 5)),
+    ])
+    def test_record_shape(self, size, format, expected):
+        # Arrange
+
+        # Act
+        shape = record_shape(size, format)
+
+        # Assert
+        assert shape == expected
+
+    def test_record_shape_unknown(self):
+        # Arrange
+
+        # Act
+        with pytest.raises(ValueError):
+            record_shape(5, "float64")
+
+        # Assert
+
+    @pytest.mark.parametrize("format", ["packed", "states"])
+    def test_round_trip(self, tmp_path, format):
+        # Arrange
+        path = tmp_path / "maps.bin"
+        maps = generate_batch(size=5, count=6, seed=0)
+
+        # Act
+        with DatasetWriter(path, size=5, seed=10, format=format) as writer:
+            writer.append(maps[:4])
+            writer.append(maps[4:])
+
+        # Assert
+        with DatasetReader(path) as reader:
+            assert len(reader) == 6
+            assert reader.seed == 10
+            assert reader.format == format
+            assert (reader.get_map(slice(None)) == maps).all()
+            assert (reader.get_map(3) == maps[3]).all()
+
+    def test_file_size(self, tmp_path):
+        # Arrange
+        path = tmp_path / "maps.bin"
+
+        # Act
+        with DatasetWriter(path, size=8, format="packed") as writer:
+            writer.append(generate_batch(size=8, count=3, seed=1))
+
+        # Assert
+        assert path.stat().st_size == HEADER_SIZE + 3 * 24 * 3
+
+    def test_records_are_views(self, tmp_path):
+        # Arrange
+        path = tmp_path / "maps.bin"
+        with DatasetWriter(path, size=4, format="states") as writer:
+            writer.append(generate_batch(size=4, count=2, seed=2))
+
+        # Act
+        reader = DatasetReader(path)
+        record = reader[1]
+
+        # Assert
+        assert isinstance(reader.records, np.memmap)
+        assert record.base is not None
+        assert not record.flags.writeable
+        assert record.shape == (4, 4)
+        reader.close()
+
+    def test_append(self, tmp_path):
+        # Arrange
+        path = tmp_path / "maps.bin"
+        maps = generate_batch(size=4, count=5, seed=3)
+        with DatasetWriter(path, size=4, seed=7) as writer:
+            writer.append(maps[:2])
+
+        # Act
+        with DatasetWriter(path, size=4, seed=0, append=True) as writer:
+            writer.append(maps[2:])
+
+        # Assert
+        assert read_header(path)["seed"] == 7
+        with DatasetReader(path) as reader:
+            assert (reader.get_map(slice(None)) == maps).all()
+
+    def test_append_drops_unflushed_records(self, tmp_path):
+        # Arrange
+        path = tmp_path / "maps.bin"
+        maps = generate_batch(size=4, count=3, seed=4)
+        with DatasetWriter(path, size=4) as writer:
+            writer.append(maps[:1])
+            writer.flush()
+            writer.append(maps[1:2])
+            # the file is closed before the last record is counted, as if
+            # the process stopped
+            writer._file.close()
+
+        # Act
+        with DatasetReader(path) as reader:
+            assert len(reader) == 1
+        with DatasetWriter(path, size=4, append=True) as appended:
+            appended.append(maps[2:])
+
+        # Assert
+        with DatasetReader(path) as reader:
+            assert (reader.get_map(slice(None)) == maps[[0, 2]]).all()
+
+    def test_append_mismatch(self, tmp_path):
+        # Arrange
+        path = tmp_path / "maps.bin"
+        DatasetWriter(path, size=4).close()
+
+        # Act
+        with pytest.raises(ValueError):
+            DatasetWriter(path, size=5, append=True)
+
+        # Assert
+
+    def test_tileset(self, tmp_path):
+        # Arrange
+        path = tmp_path / "maps.bin"
+        tileset = Tileset(weights={0: 3}).freeze()
+        maps = generate_batch(size=4, count=2, seed=1, tileset=tileset)
+
+        # Act
+        with DatasetWriter(path, size=4, format="states", tileset=tileset) as writer:
+            writer.append(maps)
+
+        # Assert
+        assert read_header(path)["fingerprint"] == tileset.fingerprint
+        with DatasetReader(path, tileset=tileset) as reader:
+            assert (reader.get_map(slice(None)) == maps).all()
+        with DatasetReader(path) as reader:
+            with pytest.raises(ValueError):
+                reader.get_map(0)
+        with pytest.raises(ValueError):
+            DatasetWriter(path, size=4, format="states", append=True)
+
+    def test_empty(self, tmp_path):
+        # Arrange
+        path = tmp_path / "maps.bin"
+        DatasetWriter(path, size=4).close()
+
+        # Act
+        reader = DatasetReader(path)
+
+        # Assert
+        assert len(reader) == 0
+        assert reader.get_map(slice(None)).shape == (0, 12, 12)
+
+    def test_not_a_dataset(self, tmp_path):
+        # Arrange
+        path = tmp_path / "maps.bin"
+        path.write_bytes(b"\0" * 100)
+
+        # Act
+        with pytest.raises(ValueError):
+            DatasetReader(path)
+
+        # Assert
+
+    def test_stream(self, tmp_path):
+        # Arrange
+        path = tmp_path / "maps.bin"
+        maps = generate_batch(size=4, count=3, seed=0)
+        stream = io.BytesIO()
+
+        # Act
+        with DatasetWriter(stream, size=4, seed=6, expected_count=3) as writer:
+            writer.append(maps[:2])
+            writer.append(maps[2:])
+        path.write_bytes(stream.getvalue())
+
+        # Assert
+        assert not stream.closed
+        assert len(stream.getvalue()) == HEADER_SIZE + 3 * writer.record_size
+        with DatasetReader(path) as reader:
+            assert reader.seed == 6
+            assert (reader.get_map(slice(None)) == maps).all()
+
+    def test_stream_without_expected_count(self):
+        # Arrange
+
+        # Act
+        with pytest.raises(ValueError):
+            DatasetWriter(io.BytesIO(), size=4)
+
+        # Assert
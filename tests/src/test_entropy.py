@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from src.entropy import EntropyHeap
+
+
+class TestEntropyHeap:
+    def test_constructor(self):
+        # Arrange
+
+        # Act
+        heap = EntropyHeap(size=4)
+
+        # Assert
+        assert len(heap) == 0
+        assert heap.pop() is None
+
+    def test_pop_lowest(self):
+        # Arrange
+        heap = EntropyHeap(size=4)
+        heap.push(0, 7)
+        heap.push(1, 3)
+        heap.push(2, 5)
+
+        # Act
+        actual = [heap.pop(), heap.pop(), heap.pop()]
+
+        # Assert
+        assert actual == [(3, 1), (5, 2), (7, 0)]
+        assert len(heap) == 0
+
+    def test_rebuild(self):
+        # Arrange
+        heap = EntropyHeap(size=4)
+        heap.push(3, 1)
+
+        # Act
+        heap.rebuild(np.array([4, 2, 6]), np.array([0, 1, 2]))
+
+        # Assert
+        assert len(heap) == 3
+        assert heap.pop() == (2, 1)
+
+    @pytest.mark.parametrize("seed", [0, 1, 2])
+    def test_ties_seeded(self, seed):
+        # Arrange
+        first = EntropyHeap(size=10, rng=np.random.default_rng(seed))
+        second = EntropyHeap(size=10, rng=np.random.default_rng(seed))
+
+        # Act
+        first.rebuild(np.full(10, 7), np.arange(10))
+        second.rebuild(np.full(10, 7), np.arange(10))
+
+        # Assert
+        assert [first.pop() for _ in range(10)] == [second.pop() for _ in range(10)]
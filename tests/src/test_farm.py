@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from src.farm import MazeFarm
+from src.grid import Grid
+from src.tileset import Tileset
+
+
+class TestMazeFarm:
+    def test_constructor(self):
+        # Arrange
+
+        # Act
+        farm = MazeFarm(size=5, workers=2, chunk_size=3)
+
+        # Assert
+        assert farm._workers == 2
+        assert farm._chunk_size == 3
+        assert farm._max_in_flight == 4
+        assert farm.map_shape == (15, 15)
+
+    @pytest.mark.parametrize("count, chunk_size", [(7, 3), (6, 3), (2, 8)])
+    def test_generate_in_order(self, count, chunk_size):
+        # Arrange
+        farm = MazeFarm(size=4, workers=2, chunk_size=chunk_size, max_in_flight=2)
+
+        # Act
+        chunks = list(farm.generate(count=count, seed=100))
+
+        # Assert
+        assert [seed for seed, _ in chunks] == list(range(100, 100 + count, chunk_size))
+        maps = np.concatenate([maps for _, maps in chunks])
+        assert maps.shape == (count, 12, 12)
+        assert maps.dtype == np.uint8
+
+    def test_generate_matches_grid(self):
+        # Arrange
+        farm = MazeFarm(size=5, workers=2, chunk_size=2, strategy="restart")
+
+        # Act
+        chunks = list(farm.generate(count=4, seed=7))
+
+        # Assert
+        for first_seed, maps in chunks:
+            for index, map in enumerate(maps):
+                expected = Grid(5, seed=first_seed + index, strategy="restart").generate_map()
+                assert (map == expected).all()
+
+    def test_generate_frozen_tileset(self):
+        # Arrange
+        tileset = Tileset(weights={0: 4}).freeze()
+        farm = MazeFarm(size=5, workers=2, chunk_size=2, tileset=tileset)
+
+        # Act
+        chunks = list(farm.generate(count=4, seed=3))
+
+        # Assert
+        for first_seed, maps in chunks:
+            for index, map in enumerate(maps):
+                assert (map == Grid(5, seed=first_seed + index, tileset=tileset).generate_map()).all()
+
+    def test_generate_stop_early(self):
+        # Arrange
+        farm = MazeFarm(size=4, workers=2, chunk_size=2, max_in_flight=2)
+        chunks = farm.generate(count=20)
+
+        # Act
+        first_seed, maps = next(chunks)
+        chunks.close()
+
+        # Assert
+        assert first_seed == 0
+        assert maps.shape == (2, 12, 12)
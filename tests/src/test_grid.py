@@ -1,11 +1,18 @@
+import subprocess
+import sys
+from collections import deque
+from pathlib import Path
 import pytest
 import pandas as pd
 import numpy as np
+import matplotlib.pyplot as plt
 from loguru import logger
 
-from src.grid import Grid
+from src.grid import Grid, OFFSETS, ContradictionError
 from src.cell import Cell
-from src.tileset import Tileset
+from src import visual
+from src.connectivity import analyse
+from src.tileset import UNCOLLAPSED, Tileset
 
 
 class TestGrid:
@@ -25,10 +32,54 @@ class TestGrid:
             assert isinstance(cell, Cell)
 
         assert grid._collapsed_cells == 0
+        assert grid._wave.shape == (size, size)
+        assert (grid._wave == grid._tileset.full_mask).all()
+        assert not grid._collapsed.any()
 
         for item in grid._map.flat:
             assert item == 0
 
+    def test_restrict(self):
+        # Arrange
+        grid = Grid(size=3)
+
+        # Act
+        mask = grid.restrict(1, 2, [1, 6])
+
+        # Assert
+        assert mask == 0b1000010
+        assert grid.get_options(1, 2) == [1, 6]
+        assert grid._cells[1, 2].options == [1, 6]
+        assert grid._cells[1, 2].entropy == 2
+
+    def test_collapse(self):
+        # Arrange
+        grid = Grid(size=3)
+
+        # Act
+        grid.collapse(2, 0, 4)
+
+        # Assert
+        assert grid.is_collapsed(2, 0)
+        assert grid.get_state(2, 0) == 4
+        assert grid._wave[2, 0] == 0b0010000
+        assert grid._cells[2, 0].state == 4
+        assert grid._cells[2, 0].options == []
+        assert grid._cells[2, 0].entropy == 0
+
+    def test_cell_view_update_state(self):
+        # Arrange
+        grid = Grid(size=3)
+        cell = grid._cells[0, 1]
+
+        # Act
+        actual = cell.update_state(2)
+
+        # Assert
+        assert actual == 2
+        assert grid.is_collapsed(0, 1)
+        assert grid._states[0, 1] == 2
+
     @pytest.mark.skip("not implemented yet.")
     def test_draw_board(self):
         # Arrange
@@ -38,6 +89,269 @@ class TestGrid:
         # Assert
         assert False
 
+    def test_import_headless(self):
+        # Arrange
+        code = (
+            "import sys; import src.grid, src.batch, src.farm, src.world, src.dataset, src.recorder; "
+            "print('matplotlib' in sys.modules, 'loguru' in sys.modules)"
+        )
+
+        # Act
+        result = subprocess.run(
+            [sys.executable, "-c", code], cwd=Path(__file__).parents[2], capture_output=True, text=True, check=True
+        )
+
+        # Assert
+        assert result.stdout.split() == ["False", "False"]
+
+    @pytest.mark.parametrize("attempts", [10, 0])
+    def test_generate_map_connected(self, mocker, attempts):
+        # Arrange
+        mocker.patch("src.grid.CONNECT_ATTEMPTS", attempts)
+        # seeds giving paths apart without the connected option
+        seeds = [2, 4, 29, 30]
+
+        for seed in seeds:
+            grid = Grid(size=4, seed=seed)
+
+            # Act
+            map = grid.generate_map(connected=True)
+
+            # Assert
+            assert analyse(Grid(size=4, seed=seed).generate_map()).components > 1
+            assert analyse(map).components == 1
+            assert np.array_equal(map, grid.tileset.render(grid.states))
+            adjacency = grid.tileset.adjacency
+            assert (adjacency[2][grid.states[:, :-1]] >> grid.states[:, 1:] & 1).all()
+            assert (adjacency[3][grid.states[:-1, :]] >> grid.states[1:, :] & 1).all()
+
+    @pytest.mark.parametrize("strategy", ["backtrack", "restart", "repair"])
+    def test_regenerate_region(self, strategy):
+        # Arrange
+        grid = Grid(size=16, strategy=strategy, seed=0)
+        before = grid.generate_map().copy()
+        states = grid.states.copy()
+        rows, columns = slice(4, 10), slice(3, 12)
+        outside = np.ones(shape=(16, 16), dtype=bool)
+        outside[rows, columns] = False
+
+        for seed in range(5):
+            # Act
+            map = grid.regenerate_region((4, 10), (3, 12), seed=seed)
+
+            # Assert
+            assert map is grid._map
+            assert np.array_equal(map, grid.tileset.render(grid.states))
+            assert np.array_equal(grid.states[outside], states[outside])
+            assert (grid.states != UNCOLLAPSED).all()
+            adjacency = grid.tileset.adjacency
+            assert (adjacency[2][grid.states[:, :-1]] >> grid.states[:, 1:] & 1).all()
+            assert (adjacency[3][grid.states[:-1, :]] >> grid.states[1:, :] & 1).all()
+
+        assert not np.array_equal(map, before)
+
+    @pytest.mark.parametrize("propagation", ["arc", "neighbours"])
+    def test_regenerate_region_repair(self, propagation):
+        # Arrange
+        rng = np.random.default_rng(0)
+        grid = Grid(size=20, propagation=propagation, strategy="repair", seed=0)
+        grid.generate_map()
+
+        for seed in range(20):
+            states = grid.states.copy()
+            row, column = rng.integers(0, 12, size=2)
+            height, width = rng.integers(3, 9, size=2)
+            mask = rng.random((height, width)) < 0.6
+            kept = np.ones(shape=(20, 20), dtype=bool)
+            kept[row:row + height, column:column + width] = ~mask
+
+            # Act
+            map = grid.regenerate_region((row, row + height), (column, column + width), seed=seed, mask=mask)
+
+            # Assert
+            assert np.array_equal(grid.states[kept], states[kept])
+            assert np.array_equal(map, grid.tileset.render(grid.states))
+
+    def test_regenerate_region_seeded(self):
+        # Arrange
+        grid = Grid(size=12, seed=0)
+        other = Grid(size=12, seed=0)
+        grid.generate_map()
+        other.generate_map()
+
+        # Act
+        grid.regenerate_region(slice(2, 8), slice(2, 8), seed=7)
+        other.regenerate_region(slice(2, 8), slice(2, 8), seed=7)
+
+        # Assert
+        assert np.array_equal(grid.states, other.states)
+
+    def test_regenerate_region_mask(self):
+        # Arrange
+        grid = Grid(size=12, seed=0)
+        grid.generate_map()
+        states = grid.states.copy()
+        mask = np.zeros(shape=(6, 6), dtype=bool)
+        mask[1:5, 2] = True
+        mask[3, :] = True
+        kept = np.ones(shape=(12, 12), dtype=bool)
+        kept[3:9, 3:9] = ~mask
+
+        for seed in range(5):
+            # Act
+            map = grid.regenerate_region(slice(3, 9), slice(3, 9), seed=seed, mask=mask)
+
+            # Assert
+            assert np.array_equal(grid.states[kept], states[kept])
+            assert np.array_equal(map, grid.tileset.render(grid.states))
+            adjacency = grid.tileset.adjacency
+            assert (adjacency[2][grid.states[:, :-1]] >> grid.states[:, 1:] & 1).all()
+            assert (adjacency[3][grid.states[:-1, :]] >> grid.states[1:, :] & 1).all()
+
+    def test_regenerate_region_local(self, mocker):
+        # Arrange
+        grid = Grid(size=64, strategy="restart", seed=0)
+        grid.generate_map()
+        rebuild = mocker.spy(grid, "_rebuild_heap")
+        push = mocker.spy(grid._heap, "push")
+
+        # Act
+        grid.regenerate_region(slice(30, 34), slice(30, 34), seed=1)
+
+        # Assert
+        rebuild.assert_not_called()
+        # only the cells of the region enter the heap, restarts included
+        rows, columns = np.divmod([call.args[0] for call in push.call_args_list], 64)
+        assert ((rows >= 30) & (rows < 34) & (columns >= 30) & (columns < 34)).all()
+        assert grid.stats["collapses"] <= 16 * (grid.restarts + 1)
+
+    def test_regenerate_region_after_iter_collapse(self):
+        # Arrange
+        grid = Grid(size=8, seed=0)
+        deque(grid.iter_collapse(), maxlen=0)
+
+        # Act
+        map = grid.regenerate_region((2, 4), (2, 4), seed=1)
+
+        # Assert
+        assert np.array_equal(map, grid.tileset.render(grid.states))
+        assert map.any(axis=1)[:6].all()
+
+    def test_regenerate_region_after_new_generation(self):
+        # Arrange
+        grid = Grid(size=8, seed=0)
+        grid.generate_map()
+        deque(grid.iter_collapse(seed=5), maxlen=0)
+
+        # Act
+        map = grid.regenerate_region((2, 4), (2, 4), seed=1)
+
+        # Assert
+        assert np.array_equal(map, grid.tileset.render(grid.states))
+
+    def test_regenerate_region_invalid(self):
+        # Arrange
+        grid = Grid(size=8, seed=0)
+
+        # Act / Assert
+        with pytest.raises(ValueError):
+            grid.regenerate_region(slice(0, 2), slice(0, 2))
+
+        grid.generate_map()
+        with pytest.raises(ValueError):
+            grid.regenerate_region(slice(0, 2), slice(0, 2), mask=np.ones(shape=(3, 2), dtype=bool))
+
+    def test_draw_board_image(self):
+        # Arrange
+        grid = Grid(size=4, seed=0)
+
+        # Act
+        grid.draw_board(tiles="image", title=10)
+
+        # Assert
+        image = grid._board["image"]
+        assert np.array_equal(image.get_array(), grid._populate_map())
+        assert np.all(image.get_array()[:3, :3] == grid.tileset.get_tile(UNCOLLAPSED))
+        assert grid._board["figure"]._suptitle.get_text() == "10%"
+        assert grid._board["texts"] is None
+        plt.close(grid._board["figure"])
+
+    def test_draw_board_image_updates_in_place(self):
+        # Arrange
+        grid = Grid(size=4, seed=0)
+        grid.draw_board(include_entropy=True, tiles="image")
+        figure = grid._board["figure"]
+        image = grid._board["image"]
+        texts = grid._board["texts"]
+
+        # Act
+        grid.collapse(0, 0, 2)
+        grid.restrict(0, 1, [0, 1])
+        grid.draw_board(include_entropy=True, tiles="image")
+
+        # Assert
+        assert grid._board["figure"] is figure
+        assert grid._board["image"] is image
+        assert grid._board["texts"] is texts
+        assert len(figure.axes) == 1
+        assert np.array_equal(image.get_array()[:3, :3], grid.tileset.get_tile(2))
+        assert texts[0].get_visible() is False
+        assert texts[1].get_text() == "2"
+        assert texts[2].get_text() == "7"
+        plt.close(figure)
+
+    def test_draw_board_image_closed_figure(self):
+        # Arrange
+        grid = Grid(size=3, seed=0)
+        grid.draw_board(tiles="image")
+        figure = grid._board["figure"]
+        plt.close(figure)
+
+        # Act
+        grid.draw_board(tiles="image")
+
+        # Assert
+        assert grid._board["figure"] is not figure
+        plt.close(grid._board["figure"])
+
+    def test_generate_map_draw_stages(self, mocker):
+        # Arrange
+        grid = Grid(size=5, seed=0)
+        spy = mocker.spy(visual, "draw_image")
+
+        # Act
+        actual = grid.generate_map(draw_stages=True)
+
+        # Assert
+        assert spy.call_count == 10
+        assert np.array_equal(grid._board["image"].get_array(), actual)
+        assert not any(text.get_visible() for text in grid._board["texts"])
+        plt.close(grid._board["figure"])
+
+    def test_tileset_weights(self):
+        # Arrange
+        tileset = Tileset(weights={"Tile_0": 20})
+
+        # Act
+        uniform = Grid(size=12, seed=0).generate_map()
+        weighted = Grid(size=12, seed=0, tileset=tileset).generate_map()
+
+        # Assert
+        assert (tileset.identify(weighted) == 0).mean() > (tileset.identify(uniform) == 0).mean()
+
+    def test__lowest_entropy_weights(self):
+        # Arrange
+        grid = Grid(size=3, tileset=Tileset(weights={0: 100}))
+        grid.restrict(0, 0, [0, 1, 2])
+        grid.restrict(1, 1, [3, 4])
+
+        # Act
+        cell = grid._lowest_entropy()
+
+        # Assert
+        # three options dominated by one weight are less uncertain than two even ones
+        assert (cell.row, cell.column) == (0, 0)
+
     @pytest.mark.repeat(3)
     def test__lowest_entropy_default(self, faker):
         # Arrange
@@ -47,7 +361,9 @@ class TestGrid:
         cell = grid._lowest_entropy()
 
         # Assert
-        assert cell == grid._cells[0][0]
+        assert cell == grid._cells[cell.row][cell.column]
+        assert cell.collapsed is False
+        assert cell.entropy == 7
 
     @pytest.mark.repeat(3)
     def test__lowest_entropy_one_lower(self, faker):
@@ -57,7 +373,7 @@ class TestGrid:
         column = faker.random_choices(elements=tuple(elements), length=1)[0]
 
         grid = Grid(size=len(elements))
-        grid._cells[row, column] = Cell(options=["Tile_0"])
+        grid._cells[row, column].update_options([0])
 
         # Act
         cell = grid._lowest_entropy()
@@ -65,6 +381,34 @@ class TestGrid:
         # Assert
         assert cell == grid._cells[row, column]
 
+    def test__lowest_entropy_skips_outdated(self):
+        # Arrange
+        grid = Grid(size=3)
+        grid.restrict(0, 0, [0, 1])
+        grid.restrict(2, 2, [0])
+        grid.collapse(2, 2, 0)
+        grid._heap.push(4, 1)
+
+        # Act
+        cell = grid._lowest_entropy()
+
+        # Assert
+        assert (cell.row, cell.column) == (0, 0)
+        assert cell.entropy == 2
+
+    def test__lowest_entropy_all_collapsed(self):
+        # Arrange
+        grid = Grid(size=2)
+        for row in range(2):
+            for column in range(2):
+                grid.collapse(row, column, 0)
+
+        # Act
+        cell = grid._lowest_entropy()
+
+        # Assert
+        assert cell == grid._cells[0, 0]
+
     @pytest.mark.parametrize(
         "row, column, neighbours",
         [
@@ -109,7 +453,7 @@ class TestGrid:
         # Arrange
         grid = Grid(size=3)
         collapsed_cell: Cell = grid._cells[row, column]
-        collapsed_cell._state = "Tile_0"
+        collapsed_cell.update_state(0)
         logger.debug("Cell: {}", collapsed_cell)
 
         expected = {}
@@ -143,16 +487,10 @@ class TestGrid:
         column = faker.random_choices(elements=tuple(elements), length=1)[0]
 
         grid = Grid(size=len(elements))
-        available_options = [faker.word()
-                             for _ in range(faker.random_digit_not_null())]
-
-        mocker.patch(
-            "src.tileset.Tileset.get_connection_rules",
-            return_value=available_options
-        )
+        available_options = faker.random_int(min=0, max=grid._tileset.full_mask)
 
         mocker.patch(
-            "src.cell.Cell.update_options",
+            "src.tileset.Tileset.get_adjacency",
             return_value=available_options
         )
         direction = faker.random_choices(
@@ -163,6 +501,290 @@ class TestGrid:
 
         # Assert
         assert actual == grid._cells[row, column]
+        assert grid._wave[row, column] == available_options
+
+    def test_constructor_unknown_propagation(self):
+        # Arrange
+
+        # Act / Assert
+        with pytest.raises(ValueError, match="propagation"):
+            Grid(size=3, propagation="unknown")
+
+    def test__propagate_cascades(self):
+        # Arrange
+        grid = Grid(size=3)
+        grid.collapse(0, 0, 0)
+        grid._propagate(0, 0)
+        grid.collapse(0, 2, 2)
+
+        # Act
+        changed = grid._propagate(0, 2)
+
+        # Assert
+        assert grid.get_options(0, 1) == [1]
+        assert grid.get_options(1, 1) == [1, 3, 4, 6]
+        assert (1, 1) in changed
+
+    def test__propagate_arc_consistent(self, faker):
+        # Arrange
+        size = 6
+        grid = Grid(size=size)
+        support = grid._tileset.support
+
+        # Act
+        for _ in range(4):
+            row = faker.random_int(min=0, max=size - 1)
+            column = faker.random_int(min=0, max=size - 1)
+            options = grid.get_options(row, column)
+            if grid.is_collapsed(row, column) or not options:
+                continue
+            grid.collapse(row, column, options[0])
+            grid._propagate(row, column)
+
+        # Assert
+        for row in range(size):
+            for column in range(size):
+                for direction_index, (row_offset, column_offset) in enumerate(OFFSETS):
+                    neighbour_row = row + row_offset
+                    neighbour_column = column + column_offset
+                    if not (0 <= neighbour_row < size and 0 <= neighbour_column < size):
+                        continue
+                    allowed = support[direction_index, grid._wave[row, column]]
+                    assert grid._wave[neighbour_row, neighbour_column] & ~allowed == 0
+
+    def collapse_to_contradiction(self, grid: Grid, mocker, collapses: list):
+        """Collapse the given cells in order through Grid._update."""
+        mocker.patch(
+            "src.grid.Grid._lowest_entropy",
+            side_effect=[grid._cells[row, column] for row, column, _ in collapses]
+        )
+        mocker.patch(
+            "src.grid.Grid._choose",
+            side_effect=[state for _, _, state in collapses]
+        )
+
+        events = []
+        for _ in collapses:
+            events.extend(grid._update())
+
+        return events
+
+    def test__update_backtrack(self, mocker):
+        # Arrange
+        grid = Grid(size=3, propagation="neighbours", strategy="backtrack")
+
+        # Act
+        events = self.collapse_to_contradiction(grid, mocker, [
+            (0, 1, 0), (1, 0, 5), (1, 2, 0)
+        ])
+
+        # Assert
+        assert [event.kind for event in events] == ["collapse", "collapse", "collapse", "backtrack"]
+        assert events[-1][1:4] == (1, 1, None)
+        assert (1, 2) in events[-1].changed
+        assert grid.backtracks == 1
+        assert grid.restarts == 0
+        assert grid._collapsed_cells == 2
+        assert not grid.is_collapsed(1, 2)
+        assert 0 not in grid.get_options(1, 2)
+        assert grid.get_options(1, 1) == [2, 5]
+        assert grid._contradiction is None
+
+    def test__update_restart(self, mocker):
+        # Arrange
+        grid = Grid(size=3, propagation="neighbours", strategy="restart")
+
+        # Act
+        events = self.collapse_to_contradiction(grid, mocker, [
+            (0, 1, 0), (1, 0, 5), (1, 2, 0)
+        ])
+
+        # Assert
+        assert events[-1].kind == "restart"
+        assert len(events[-1].changed) == 9
+        assert grid.restarts == 1
+        assert grid._collapsed_cells == 0
+        assert not grid._collapsed.any()
+        assert (grid._wave == grid._tileset.full_mask).all()
+
+    def test__update_restart_budget(self, mocker):
+        # Arrange
+        grid = Grid(size=3, propagation="neighbours", strategy="restart", max_restarts=0)
+
+        # Act / Assert
+        with pytest.raises(ContradictionError):
+            self.collapse_to_contradiction(grid, mocker, [
+                (0, 1, 0), (1, 0, 5), (1, 2, 0)
+            ])
+
+    def test__update_repair(self, mocker):
+        # Arrange
+        grid = Grid(size=5, propagation="neighbours", strategy="repair")
+
+        # Act
+        events = self.collapse_to_contradiction(grid, mocker, [
+            (4, 4, 0), (1, 2, 0), (2, 1, 5), (2, 3, 0)
+        ])
+
+        # Assert
+        assert events[-1].kind == "repair"
+        assert grid.repairs == 1
+        assert grid.restarts == 0
+        assert grid._collapsed_cells == 1
+        assert grid.is_collapsed(4, 4)
+        assert not grid._collapsed[1:4, 1:4].any()
+        assert (grid._wave[1:4, 1:4] != 0).all()
+
+    def test__update_repair_budget(self, mocker):
+        # Arrange
+        grid = Grid(size=5, propagation="neighbours", strategy="repair", repair_size=1, max_repairs=2)
+
+        # Act
+        self.collapse_to_contradiction(grid, mocker, [
+            (1, 2, 0), (2, 1, 5), (2, 3, 0)
+        ])
+
+        # Assert
+        assert grid.repairs == 2
+        assert grid.restarts == 1
+        assert grid._collapsed_cells == 0
+
+    @pytest.mark.parametrize("strategy", ["backtrack", "restart", "repair"])
+    def test_generate_map_consistent(self, strategy):
+        # Arrange
+        size = 8
+        grid = Grid(size=size, strategy=strategy)
+        adjacency = grid._tileset.adjacency
+
+        # Act
+        grid.generate_map()
+
+        # Assert
+        assert grid._collapsed.all()
+        assert grid._collapsed_cells == size * size
+        states = grid._states
+        for row in range(size):
+            for column in range(size - 1):
+                assert adjacency[2, states[row, column]] >> states[row, column + 1] & 1
+        for row in range(size - 1):
+            for column in range(size):
+                assert adjacency[3, states[row, column]] >> states[row + 1, column] & 1
+
+    def test__choose(self):
+        # Arrange
+        grid = Grid(size=3, seed=0)
+        grid.restrict(1, 1, [2, 5])
+
+        # Act
+        choices = {grid._choose(1, 1) for _ in range(20)}
+
+        # Assert
+        assert choices == {2, 5}
+
+    def test_iter_collapse(self):
+        # Arrange
+        grid = Grid(size=5, seed=11)
+        states = {}
+
+        # Act
+        for event in grid.iter_collapse():
+            if event.kind == "collapse":
+                states[(event.row, event.column)] = event.state
+            else:
+                for position in event.changed:
+                    states.pop(position, None)
+
+        # Assert
+        assert len(states) == 25
+        for (row, column), state in states.items():
+            assert grid.get_state(row, column) == state
+
+    def test_iter_collapse_neighbours_changed(self):
+        # Arrange
+        grid = Grid(size=4, propagation="neighbours", strategy="restart", seed=0)
+        steps = grid.iter_collapse()
+        events = 0
+
+        # Act
+        while True:
+            wave = grid.wave.copy()
+            event = next(steps, None)
+            if event is None:
+                break
+            events = events + 1
+
+            # Assert
+            narrowed = {(int(row), int(column)) for row, column in np.argwhere(grid.wave != wave)}
+            narrowed.discard((event.row, event.column))
+            assert sorted(event.changed) == sorted(narrowed)
+
+        assert grid.stats["contradictions"] == 0
+        assert events == 16
+
+    def test_iter_collapse_stop_early(self):
+        # Arrange
+        grid = Grid(size=5, seed=11)
+        events = grid.iter_collapse()
+
+        # Act
+        event = next(events)
+        events.close()
+
+        # Assert
+        assert event.kind == "collapse"
+        assert grid._collapsed_cells == 1
+        assert grid.is_collapsed(event.row, event.column)
+        assert all(not grid.is_collapsed(row, column) for row, column in event.changed)
+
+    def test_iter_collapse_seeded(self):
+        # Arrange
+        grid = Grid(size=4, seed=1)
+        grid.generate_map()
+
+        # Act
+        events = list(grid.iter_collapse(seed=5))
+
+        # Assert
+        assert events == list(Grid(size=4, seed=5).iter_collapse())
+
+    @pytest.mark.repeat(3)
+    def test_generate_map_seeded(self, faker):
+        # Arrange
+        seed = faker.random_int()
+
+        # Act
+        first = Grid(size=6, seed=seed).generate_map()
+        second = Grid(size=6, seed=seed).generate_map()
+
+        # Assert
+        assert (first == second).all()
+
+    def test_generate_map_reseed(self):
+        # Arrange
+        grid = Grid(size=6, seed=1)
+        grid.generate_map()
+
+        # Act
+        actual = grid.generate_map(seed=2)
+
+        # Assert
+        assert (actual == Grid(size=6, seed=2).generate_map()).all()
+        assert grid._collapsed_cells == 36
+
+    def test_reset(self):
+        # Arrange
+        grid = Grid(size=4, seed=3)
+        grid.generate_map()
+
+        # Act
+        grid.reset()
+
+        # Assert
+        assert grid._collapsed_cells == 0
+        assert not grid._collapsed.any()
+        assert (grid._wave == grid._tileset.full_mask).all()
+        assert grid.restarts == grid.backtracks == grid.repairs == 0
+        assert len(grid._heap) == 16
 
     @pytest.mark.repeat(3)
     def test__update(self, mocker, faker):
@@ -196,14 +818,9 @@ class TestGrid:
         expected = np.ndarray(shape=(size * 3, size * 3), dtype=float)
         expected.fill(0.)
 
-        mocker.patch(
-            "src.tileset.Tileset.get_tile",
-            return_value=[
-                [0, 0, 0],
-                [0, 0, 0],
-                [0, 0, 0]
-            ]
-        )
+        for row in range(size):
+            for column in range(size):
+                grid.collapse(row, column, 0)
 
         # Act
         map = grid._populate_map()
@@ -211,6 +828,232 @@ class TestGrid:
         # Assert
         assert (map == expected).all()
 
+    @pytest.mark.repeat(3)
+    def test__populate_map_patterns(self, faker):
+        # Arrange
+        size = faker.random_digit_not_null()
+        grid = Grid(size=size)
+        grid._states[...] = np.random.default_rng(size).integers(0, 8, size=(size, size))
+
+        # Act
+        map = grid._populate_map()
+
+        # Assert
+        assert map.shape == (size * 3, size * 3)
+        assert map.dtype == np.uint8
+        for row in range(size):
+            for column in range(size):
+                state = grid._states[row, column]
+                tile = map[row * 3:row * 3 + 3, column * 3:column * 3 + 3]
+                assert (tile == grid._tileset.get_tile(state)).all()
+
+    def test__populate_map_out(self):
+        # Arrange
+        grid = Grid(size=4, seed=0)
+        grid.generate_map()
+        out = np.zeros(shape=(12, 12), dtype=np.uint8)
+
+        # Act
+        map = grid._populate_map(out=out)
+
+        # Assert
+        assert map is out
+        assert (out == grid._populate_map()).all()
+
+    def test_generate_map_out(self):
+        # Arrange
+        out = np.zeros(shape=(2, 15, 15), dtype=np.uint8)
+
+        # Act
+        map = Grid(size=5, seed=4).generate_map(out=out[1])
+
+        # Assert
+        assert (out[1] == map).all()
+        assert (out[1] == Grid(size=5, seed=4).generate_map()).all()
+        assert not out[0].any()
+
+    def test_cell_views(self):
+        # Arrange
+        grid = Grid(size=3)
+
+        # Act
+        cell = grid._cells[1, 2]
+
+        # Assert
+        assert cell == grid._cells[1][2]
+        assert cell == grid._cells[-2, -1]
+        assert cell != grid._cells[2, 1]
+        assert cell != Grid(size=3)._cells[1, 2]
+        assert len({*grid._cells.flat}) == 9
+        assert [len(row) for row in grid._cells] == [3, 3, 3]
+        assert grid._cells.shape == (3, 3)
+        with pytest.raises(IndexError):
+            grid._cells[3, 0]
+
+    def test_stats(self):
+        # Arrange
+        grid = Grid(size=5, seed=3)
+
+        # Act
+        grid.generate_map()
+
+        # Assert
+        stats = grid.stats
+        assert stats["collapses"] >= 25
+        assert stats["propagations"] > 0
+        assert stats["contradictions"] >= stats["restarts"]
+        grid.reset()
+        assert grid.stats["collapses"] == 0
+
+    def test_stats_neighbours(self):
+        # Arrange
+        grid = Grid(size=3, propagation="neighbours", seed=0)
+
+        # Act
+        grid.generate_map()
+
+        # Assert
+        # every adjacent pair narrows its second cell once, collapsed cells
+        # visited again are not counted
+        assert grid.stats["contradictions"] == 0
+        assert grid.stats["propagations"] == 12
+
+    @pytest.mark.parametrize("level, expected_calls", [("off", 0), ("stats", 1)])
+    def test_generate_map_logging(self, mocker, level, expected_calls):
+        # Arrange
+        grid = Grid(size=6, seed=1)
+        logger = mocker.patch("loguru.logger.debug")
+        mocker.patch("src.instrumentation.debug_enabled", False)
+        mocker.patch("src.instrumentation.stats_enabled", level == "stats")
+
+        # Act
+        grid.generate_map()
+
+        # Assert
+        assert logger.call_count == expected_calls
+
+    def test_generate_map_logging_debug(self, mocker):
+        # Arrange
+        grid = Grid(size=6, seed=1)
+        logger = mocker.patch("loguru.logger.debug")
+        mocker.patch("src.instrumentation.debug_enabled", True)
+
+        # Act
+        grid.generate_map()
+
+        # Assert
+        assert logger.call_count > 36
+
+    def test_profiler_disabled(self):
+        # Arrange
+
+        # Act
+        grid = Grid(size=4, seed=0)
+
+        # Assert
+        assert grid.profiler is None
+
+    @pytest.mark.parametrize("propagation", ["arc", "neighbours"])
+    def test_profiler(self, propagation):
+        # Arrange
+        grid = Grid(size=6, propagation=propagation, seed=2, profile=True)
+
+        # Act
+        map = grid.generate_map()
+
+        # Assert
+        profile = grid.profiler.as_dict()
+        assert profile["phases"]["select"]["calls"] >= 36
+        assert profile["phases"]["collapse"]["calls"] == grid.stats["collapses"]
+        assert profile["phases"]["propagate"]["seconds"] > 0
+        assert profile["propagations"] >= grid.stats["collapses"]
+        assert profile["options_removed"] > 0
+        assert (map == Grid(size=6, propagation=propagation, seed=2).generate_map()).all()
+
+    def test_profiler_queue_depth(self):
+        # Arrange
+        grid = Grid(size=5, seed=0, profile=True)
+
+        # Act
+        grid.collapse(2, 2, 0)
+        changed = grid._propagate(2, 2)
+
+        # Assert
+        assert grid.profiler.cells_touched == len(changed)
+        assert grid.profiler.max_queue_depth >= 1
+
+    @pytest.mark.parametrize("strategy", ["backtrack", "restart"])
+    def test_profiler_options_removed(self, strategy):
+        # Arrange
+        grid = Grid(size=5, strategy=strategy, seed=0, profile=True)
+        grid.collapse(2, 2, 0)
+
+        # Act
+        grid._propagate(2, 2)
+
+        # Assert
+        options = grid.tileset.popcount[grid.wave].astype(int)
+        options[2, 2] = 7
+        assert grid.profiler.options_removed == (7 - options).sum()
+
+    def test_shared_tileset(self):
+        # Arrange
+
+        # Act
+        first = Grid(size=3)
+        second = Grid(size=4)
+
+        # Assert
+        assert first.tileset is second.tileset
+        assert first._cells[0, 0]._get_tileset() is first.tileset
+
+    def test_constrain(self):
+        # Arrange
+        grid = Grid(size=3, seed=0)
+        tileset = grid.tileset
+        masks = np.full(shape=(3, 3), fill_value=tileset.full_mask, dtype=tileset.mask_dtype)
+        masks[0, 0] = tileset.get_mask([0])
+
+        # Act
+        changed = grid.constrain(masks)
+
+        # Assert
+        assert (0, 0) in changed
+        assert grid.wave[0, 0] == tileset.get_mask([0])
+        assert grid.wave[0, 1] == tileset.get_adjacency(0, "RIGHT")
+
+    def test_constrain_kept_after_reset(self):
+        # Arrange
+        grid = Grid(size=3, seed=0)
+        tileset = grid.tileset
+        masks = np.full(shape=(3, 3), fill_value=tileset.full_mask, dtype=tileset.mask_dtype)
+        masks[1, 1] = tileset.get_mask([5])
+        grid.constrain(masks)
+
+        # Act
+        grid.generate_map()
+        grid.reset()
+
+        # Assert
+        assert grid.get_state(1, 1) == UNCOLLAPSED
+        assert grid.wave[1, 1] == tileset.get_mask([5])
+        grid.generate_map()
+        assert grid.get_state(1, 1) == 5
+
+    def test_constrain_contradiction(self):
+        # Arrange
+        grid = Grid(size=3, seed=0)
+        tileset = grid.tileset
+        masks = np.full(shape=(3, 3), fill_value=tileset.full_mask, dtype=tileset.mask_dtype)
+        masks[0, 0] = 0
+
+        # Act
+        with pytest.raises(ContradictionError):
+            grid.constrain(masks)
+
+        # Assert
+        assert grid._contradiction is None
+
     @pytest.mark.skip("not implemented yet.")
     def test_generate_map(self):
         # Arrange
@@ -0,0 +1,96 @@
+import pytest
+from src import instrumentation
+
+
+class TestInstrumentation:
+    @pytest.fixture(autouse=True)
+    def restore_level(self):
+        level = instrumentation.get_level()
+        yield
+        instrumentation.set_level(level)
+
+    @pytest.mark.parametrize("level, debug_enabled, stats_enabled", [
+        (instrumentation.OFF, False, False),
+        (instrumentation.STATS, False, True),
+        (instrumentation.DEBUG, True, True),
+        ("off", False, False),
+        ("STATS", False, True),
+        ("debug", True, True),
+    ])
+    def test_set_level(self, level, debug_enabled, stats_enabled):
+        # Arrange
+
+        # Act
+        instrumentation.set_level(level)
+
+        # Assert
+        assert instrumentation.debug_enabled is debug_enabled
+        assert instrumentation.stats_enabled is stats_enabled
+
+    def test_set_level_previous(self):
+        # Arrange
+        instrumentation.set_level("debug")
+
+        # Act
+        previous = instrumentation.set_level("off")
+
+        # Assert
+        assert previous == instrumentation.DEBUG
+        assert instrumentation.get_level() == instrumentation.OFF
+
+    @pytest.mark.parametrize("level", ["verbose", 3, -1])
+    def test_set_level_unknown(self, level):
+        # Arrange
+
+        # Act
+        with pytest.raises(ValueError):
+            instrumentation.set_level(level)
+
+        # Assert
+
+
+class TestProfiler:
+    def test_add(self):
+        # Arrange
+        profiler = instrumentation.Profiler()
+
+        # Act
+        profiler.add("select", 0.5)
+        profiler.add("select", 0.25)
+        profiler.add("propagate", 1.0)
+
+        # Assert
+        assert profiler.seconds["select"] == 0.75
+        assert profiler.calls["select"] == 2
+        assert profiler.calls["propagate"] == 1
+        assert profiler.calls["resolve"] == 0
+
+    def test_add_propagation(self):
+        # Arrange
+        profiler = instrumentation.Profiler()
+
+        # Act
+        profiler.add_propagation(4, queue_depth=3)
+        profiler.add_propagation(2, queue_depth=1)
+
+        # Assert
+        assert profiler.propagations == 2
+        assert profiler.cells_touched == 6
+        assert profiler.max_queue_depth == 3
+
+    def test_as_dict_and_reset(self):
+        # Arrange
+        profiler = instrumentation.Profiler()
+        profiler.add("collapse", 0.1)
+        profiler.add_propagation(1)
+        profiler.options_removed = 5
+
+        # Act
+        exported = profiler.as_dict()
+        profiler.reset()
+
+        # Assert
+        assert set(exported["phases"]) == set(instrumentation.PHASES)
+        assert exported["phases"]["collapse"] == {"seconds": 0.1, "calls": 1}
+        assert exported["options_removed"] == 5
+        assert profiler.as_dict()["propagations"] == 0
@@ -0,0 +1,15 @@
+import sys
+from src.log import logger
+
+
+class TestLog:
+    def test_logger(self, mocker):
+        # Arrange
+        debug = mocker.patch("loguru.logger.debug")
+
+        # Act
+        logger.debug("Cell {}", 1)
+
+        # Assert
+        debug.assert_called_once_with("Cell {}", 1)
+        assert "loguru" in sys.modules
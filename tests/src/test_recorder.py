@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+from PIL import Image
+from src.grid import Grid
+from src.recorder import iter_frames, record, save_frames
+from src.tileset import UNCOLLAPSED
+
+
+class TestRecorder:
+    def test_record(self):
+        # Arrange
+        grid = Grid(size=6, seed=0)
+        expected = Grid(size=6, seed=0).generate_map()
+
+        # Act
+        frames = record(grid)
+
+        # Assert
+        assert frames.shape == (7, 18, 18)
+        assert frames.dtype == np.uint8
+        assert np.all(frames[0] == np.tile(grid.tileset.get_tile(UNCOLLAPSED), (6, 6)))
+        assert np.array_equal(frames[-1], expected)
+
+    @pytest.mark.parametrize("every, expected", [(1, 26), (10, 4), (25, 2), (100, 2)])
+    def test_record_every(self, every, expected):
+        # Arrange
+        grid = Grid(size=5, seed=0)
+
+        # Act
+        frames = record(grid, every=every)
+
+        # Assert
+        assert len(frames) == expected
+
+    @pytest.mark.parametrize("strategy", ["backtrack", "restart", "repair"])
+    def test_iter_frames_contradiction(self, mocker, strategy):
+        # Arrange
+        grid = Grid(size=3, propagation="neighbours", strategy=strategy, seed=0)
+        lowest_entropy = Grid._lowest_entropy
+        choose = Grid._choose
+        # the three first collapses leave the cell (1, 1) without options
+        forced = iter([(0, 1, 0), (1, 0, 5), (1, 2, 0)])
+        steps = []
+
+        def forced_lowest_entropy(self):
+            steps.append(next(forced, None))
+            return lowest_entropy(self) if steps[-1] is None else self._cells[steps[-1][:2]]
+
+        def forced_choose(self, row, column):
+            return choose(self, row, column) if steps[-1] is None else steps[-1][2]
+
+        mocker.patch.object(Grid, "_lowest_entropy", forced_lowest_entropy)
+        mocker.patch.object(Grid, "_choose", forced_choose)
+        update = mocker.spy(grid, "_update")
+
+        # Act
+        for events, frame in enumerate(iter_frames(grid, every=1)):
+
+            # Assert
+            # the grid is only up to date with the frame once all the events
+            # of a step were drawn
+            if events == sum(map(len, update.spy_return_list)):
+                assert np.array_equal(frame, grid._populate_map())
+
+        assert grid.stats["contradictions"] >= 1
+        assert np.all(grid._collapsed)
+
+    def test_save_frames_npy(self, tmp_path):
+        # Arrange
+        path = tmp_path / "frames.npy"
+        frames = record(Grid(size=4, seed=0))
+
+        # Act
+        save_frames(frames, path)
+
+        # Assert
+        assert np.array_equal(np.load(path), frames)
+
+    def test_save_frames_gif(self, tmp_path):
+        # Arrange
+        path = tmp_path / "frames.gif"
+        frames = record(Grid(size=4, seed=0), every=4)
+
+        # Act
+        save_frames(iter(frames), path, scale=2)
+
+        # Assert
+        with Image.open(path) as image:
+            assert image.n_frames == len(frames)
+            assert image.size == (24, 24)
+            image.seek(len(frames) - 1)
+            last = np.asarray(image.convert("L"))
+        assert np.array_equal(last[::2, ::2] > 127, frames[-1] == 1)
+
+    def test_save_frames_unknown_format(self, tmp_path):
+        # Arrange
+        frames = record(Grid(size=3, seed=0))
+
+        # Act
+        with pytest.raises(ValueError):
+            save_frames(frames, tmp_path / "frames.mp4")
+
+        # Assert
@@ -1,6 +1,7 @@
+import pickle
 import numpy as np
 import pytest
-from src.tileset import Tileset
+from src.tileset import UNCOLLAPSED, Tileset, get_tileset
 
 
 class TestTileset:
@@ -40,42 +41,42 @@ class TestTileset:
         # Act
 
         # Assert
-        assert (tileset.tiles["Tile_0"] == np.array([
+        assert (tileset.tiles[0] == np.array([
             [0, 0, 0],
             [0, 0, 0],
             [0, 0, 0]
         ])).all()
-        assert (tileset.tiles["Tile_1"] == np.array([
+        assert (tileset.tiles[1] == np.array([
             [0, 1, 0],
             [0, 1, 1],
             [0, 1, 0]
         ])).all()
-        assert (tileset.tiles["Tile_2"] == np.array([
+        assert (tileset.tiles[2] == np.array([
             [0, 0, 0],
             [1, 1, 1],
             [0, 1, 0]
         ])).all()
-        assert (tileset.tiles["Tile_3"] == np.array([
+        assert (tileset.tiles[3] == np.array([
             [0, 1, 0],
             [1, 1, 0],
             [0, 1, 0]
         ])).all()
-        assert (tileset.tiles["Tile_4"] == np.array([
+        assert (tileset.tiles[4] == np.array([
             [0, 1, 0],
             [1, 1, 1],
             [0, 0, 0]
         ])).all()
-        assert (tileset.tiles["Tile_5"] == np.array([
+        assert (tileset.tiles[5] == np.array([
             [0, 0, 0],
             [1, 1, 1],
             [0, 0, 0]
         ])).all()
-        assert (tileset.tiles["Tile_6"] == np.array([
+        assert (tileset.tiles[6] == np.array([
             [0, 1, 0],
             [0, 1, 0],
             [0, 1, 0]
         ])).all()
-        assert (tileset.tiles["Tile_10"] == np.array([
+        assert (tileset.tiles[UNCOLLAPSED] == np.array([
             [1, 1, 1],
             [1, 1, 1],
             [1, 1, 1]
@@ -83,56 +84,56 @@ class TestTileset:
 
     @pytest.mark.parametrize("state, pattern", [
         (
-            "Tile_0", np.array([
+            0, np.array([
                 [0, 0, 0],
                 [0, 0, 0],
                 [0, 0, 0]
             ])
         ),
         (
-            "Tile_1", np.array([
+            1, np.array([
                 [0, 1, 0],
                 [0, 1, 1],
                 [0, 1, 0]
             ])
         ),
         (
-            "Tile_2", np.array([
+            2, np.array([
                 [0, 0, 0],
                 [1, 1, 1],
                 [0, 1, 0]
             ])
         ),
         (
-            "Tile_3", np.array([
+            3, np.array([
                 [0, 1, 0],
                 [1, 1, 0],
                 [0, 1, 0]
             ])
         ),
         (
-            "Tile_4", np.array([
+            4, np.array([
                 [0, 1, 0],
                 [1, 1, 1],
                 [0, 0, 0]
             ])
         ),
         (
-            "Tile_5", np.array([
+            5, np.array([
                 [0, 0, 0],
                 [1, 1, 1],
                 [0, 0, 0]
             ])
         ),
         (
-            "Tile_6", np.array([
+            6, np.array([
                 [0, 1, 0],
                 [0, 1, 0],
                 [0, 1, 0]
             ])
         ),
         (
-            "Tile_10", np.array([
+            UNCOLLAPSED, np.array([
                 [1, 1, 1],
                 [1, 1, 1],
                 [1, 1, 1]
@@ -150,34 +151,34 @@ class TestTileset:
         assert (actual == pattern).all()
 
     @ pytest.mark.parametrize("state, direction, expected_options", [
-        ("Tile_0", "UP", ["Tile_0", "Tile_4", "Tile_5"]),
-        ("Tile_0", "RIGHT", ["Tile_0", "Tile_1", "Tile_6"]),
-        ("Tile_0", "DOWN", ["Tile_0", "Tile_2", "Tile_5"]),
-        ("Tile_0", "LEFT", ["Tile_0", "Tile_3", "Tile_6"]),
-        ("Tile_1", "UP", ["Tile_1", "Tile_2", "Tile_3", "Tile_6"]),
-        ("Tile_1", "RIGHT", ["Tile_2", "Tile_3", "Tile_4", "Tile_5"]),
-        ("Tile_1", "DOWN", ["Tile_1", "Tile_3", "Tile_4", "Tile_6"]),
-        ("Tile_1", "LEFT", ["Tile_0", "Tile_3", "Tile_6"]),
-        ("Tile_2", "UP", ["Tile_0", "Tile_4", "Tile_5"]),
-        ("Tile_2", "RIGHT", ["Tile_2", "Tile_3", "Tile_4", "Tile_5"]),
-        ("Tile_2", "DOWN", ["Tile_1", "Tile_3", "Tile_4", "Tile_6"]),
-        ("Tile_2", "LEFT", ["Tile_1", "Tile_2", "Tile_4", "Tile_5"]),
-        ("Tile_3", "UP", ["Tile_1", "Tile_2", "Tile_3", "Tile_6"]),
-        ("Tile_3", "RIGHT", ["Tile_0", "Tile_1", "Tile_6"]),
-        ("Tile_3", "DOWN", ["Tile_1", "Tile_3", "Tile_4", "Tile_6"]),
-        ("Tile_3", "LEFT", ["Tile_1", "Tile_2", "Tile_4", "Tile_5"]),
-        ("Tile_4", "UP", ["Tile_1", "Tile_2", "Tile_3", "Tile_6"]),
-        ("Tile_4", "RIGHT", ["Tile_2", "Tile_3", "Tile_4", "Tile_5"]),
-        ("Tile_4", "DOWN", ["Tile_0", "Tile_2", "Tile_5"]),
-        ("Tile_4", "LEFT", ["Tile_1", "Tile_2", "Tile_4", "Tile_5"]),
-        ("Tile_5", "UP", ["Tile_0", "Tile_4", "Tile_5"]),
-        ("Tile_5", "RIGHT", ["Tile_2", "Tile_3", "Tile_4", "Tile_5"]),
-        ("Tile_5", "DOWN", ["Tile_0", "Tile_2", "Tile_5"]),
-        ("Tile_5", "LEFT", ["Tile_1", "Tile_2", "Tile_4", "Tile_5"]),
-        ("Tile_6", "UP", ["Tile_1", "Tile_2", "Tile_3", "Tile_6"]),
-        ("Tile_6", "RIGHT", ["Tile_0", "Tile_1", "Tile_6"]),
-        ("Tile_6", "DOWN", ["Tile_1", "Tile_3", "Tile_4", "Tile_6"]),
-        ("Tile_6", "LEFT", ["Tile_0", "Tile_3", "Tile_6"])
+        (0, "UP", [0, 4, 5]),
+        (0, "RIGHT", [0, 1, 6]),
+        (0, "DOWN", [0, 2, 5]),
+        (0, "LEFT", [0, 3, 6]),
+        (1, "UP", [1, 2, 3, 6]),
+        (1, "RIGHT", [2, 3, 4, 5]),
+        (1, "DOWN", [1, 3, 4, 6]),
+        (1, "LEFT", [0, 3, 6]),
+        (2, "UP", [0, 4, 5]),
+        (2, "RIGHT", [2, 3, 4, 5]),
+        (2, "DOWN", [1, 3, 4, 6]),
+        (2, "LEFT", [1, 2, 4, 5]),
+        (3, "UP", [1, 2, 3, 6]),
+        (3, "RIGHT", [0, 1, 6]),
+        (3, "DOWN", [1, 3, 4, 6]),
+        (3, "LEFT", [1, 2, 4, 5]),
+        (4, "UP", [1, 2, 3, 6]),
+        (4, "RIGHT", [2, 3, 4, 5]),
+        (4, "DOWN", [0, 2, 5]),
+        (4, "LEFT", [1, 2, 4, 5]),
+        (5, "UP", [0, 4, 5]),
+        (5, "RIGHT", [2, 3, 4, 5]),
+        (5, "DOWN", [0, 2, 5]),
+        (5, "LEFT", [1, 2, 4, 5]),
+        (6, "UP", [1, 2, 3, 6]),
+        (6, "RIGHT", [0, 1, 6]),
+        (6, "DOWN", [1, 3, 4, 6]),
+        (6, "LEFT", [0, 3, 6])
     ])
     def test_connection_rules(self, state, direction, expected_options):
         # Arrange
@@ -189,3 +190,353 @@ class TestTileset:
         # Assert
         assert isinstance(rule, list)
         assert rule == expected_options
+
+    @pytest.mark.parametrize("state, tile_id", [
+        ("Tile_0", 0),
+        ("Tile_3", 3),
+        ("Tile_6", 6),
+        ("Tile_10", UNCOLLAPSED),
+    ])
+    def test_get_tile_id(self, state, tile_id):
+        # Arrange
+        tileset = Tileset()
+
+        # Act
+        actual = tileset.get_tile_id(state)
+
+        # Assert
+        assert actual == tile_id
+
+    @pytest.mark.parametrize("options, mask", [
+        ([], 0b0000000),
+        ([0], 0b0000001),
+        ([1, 6], 0b1000010),
+        ([0, 4, 5], 0b0110001),
+        ([UNCOLLAPSED, -1], 0b0000000),
+    ])
+    def test_get_mask(self, options, mask):
+        # Arrange
+        tileset = Tileset()
+
+        # Act
+        actual = tileset.get_mask(options)
+
+        # Assert
+        assert actual == mask
+
+    @pytest.mark.parametrize("mask, options", [
+        (0b0000000, []),
+        (0b0000001, [0]),
+        (0b1000010, [1, 6]),
+        (0b1111111, [0, 1, 2, 3, 4, 5, 6]),
+    ])
+    def test_get_options(self, mask, options):
+        # Arrange
+        tileset = Tileset()
+
+        # Act
+        actual = tileset.get_options(mask)
+
+        # Assert
+        assert actual == options
+
+    def test_popcount(self):
+        # Arrange
+        tileset = Tileset()
+
+        # Act
+        popcount = tileset.popcount
+
+        # Assert
+        assert tileset.options_count == 7
+        assert tileset.full_mask == 0b1111111
+        assert len(popcount) == 128
+        assert popcount[0] == 0
+        assert popcount[0b1000010] == 2
+        assert popcount[tileset.full_mask] == 7
+
+    @pytest.mark.parametrize("state, direction, expected_options", [
+        (0, "UP", [0, 4, 5]),
+        (1, "LEFT", [0, 3, 6]),
+        (2, "DOWN", [1, 3, 4, 6]),
+        (5, "RIGHT", [2, 3, 4, 5]),
+    ])
+    def test_get_adjacency(self, state, direction, expected_options):
+        # Arrange
+        tileset = Tileset()
+
+        # Act
+        mask = tileset.get_adjacency(state, direction)
+
+        # Assert
+        assert tileset.get_options(mask) == expected_options
+
+    def test_adjacency_matches_connection_rules(self, directions):
+        # Arrange
+        tileset = Tileset()
+
+        # Act
+        adjacency = tileset.adjacency
+
+        # Assert
+        assert adjacency.shape == (4, 7)
+        for state, rules in tileset.connection_rules.items():
+            for direction in directions:
+                mask = tileset.get_adjacency(state, direction)
+                assert tileset.get_options(mask) == rules[direction]
+
+    @pytest.mark.parametrize("options, direction, expected_options", [
+        ([], "UP", []),
+        ([0], "UP", [0, 4, 5]),
+        ([0, 1], "UP", [0, 1, 2, 3, 4, 5, 6]),
+        ([0, 3], "RIGHT", [0, 1, 6]),
+        ([2, 5], "DOWN", [0, 1, 2, 3, 4, 5, 6]),
+    ])
+    def test_get_support(self, options, direction, expected_options):
+        # Arrange
+        tileset = Tileset()
+
+        # Act
+        mask = tileset.get_support(tileset.get_mask(options), direction)
+
+        # Assert
+        assert tileset.get_options(mask) == expected_options
+
+    def test_support_is_cached(self):
+        # Arrange
+        tileset = Tileset()
+
+        # Act
+        support = tileset.support
+
+        # Assert
+        assert support.shape == (4, 128)
+        assert tileset.support is support
+
+    def test_patterns(self):
+        # Arrange
+        tileset = Tileset()
+
+        # Act
+        patterns = tileset.patterns
+
+        # Assert
+        assert patterns.shape == (8, 3, 3)
+        assert patterns.dtype == np.uint8
+        for tile_id in range(len(tileset.tile_list)):
+            assert (patterns[tile_id] == tileset.get_tile(tile_id)).all()
+
+    def test_render_batch(self):
+        # Arrange
+        tileset = Tileset()
+        states = np.array([
+            [[0, 1], [2, 3]],
+            [[4, 5], [6, 7]],
+        ])
+
+        # Act
+        maps = tileset.render(states)
+
+        # Assert
+        assert maps.shape == (2, 6, 6)
+        assert (maps[1, 3:6, 0:3] == tileset.get_tile(6)).all()
+        assert (maps[0, 0:3, 3:6] == tileset.get_tile(1)).all()
+
+    def test_identify(self):
+        # Arrange
+        tileset = Tileset()
+        states = np.array([
+            [[0, 1], [2, 3]],
+            [[4, 5], [6, 7]],
+        ])
+
+        # Act
+        identified = tileset.identify(tileset.render(states))
+
+        # Assert
+        assert (identified == states).all()
+
+    def test_identify_unknown_block(self):
+        # Arrange
+        tileset = Tileset()
+        map = np.zeros(shape=(3, 6), dtype=np.uint8)
+        map[0, 0] = 1
+
+        # Act
+        with pytest.raises(ValueError):
+            tileset.identify(map)
+
+        # Assert
+
+    def test_fingerprint(self, mocker):
+        # Arrange
+        fingerprint = Tileset().fingerprint
+        tileset = Tileset()
+        mocker.patch.object(tileset, "_patterns", tileset.patterns[::-1].copy())
+
+        # Act
+        changed = tileset.fingerprint
+
+        # Assert
+        assert len(fingerprint) == 20
+        assert Tileset().fingerprint == fingerprint
+        assert changed != fingerprint
+
+    def test_fingerprint_weights(self):
+        # Arrange
+        fingerprint = Tileset().fingerprint
+
+        # Act
+        weighted = Tileset(weights={0: 2}).fingerprint
+
+        # Assert
+        assert weighted != fingerprint
+
+    @pytest.mark.parametrize("weights, expected", [
+        (None, [1, 1, 1, 1, 1, 1, 1]),
+        ({0: 4, "Tile_5": 0.5}, [4, 1, 1, 1, 1, 0.5, 1]),
+        ([1, 2, 3, 4, 5, 6, 7], [1, 2, 3, 4, 5, 6, 7]),
+    ])
+    def test_weights(self, weights, expected):
+        # Arrange
+
+        # Act
+        tileset = Tileset(weights=weights)
+
+        # Assert
+        assert tileset.weights.tolist() == expected
+
+    @pytest.mark.parametrize("weights", [{UNCOLLAPSED: 1}, {"Tile_42": 1}, [1, 2], {0: 0}, {1: -1}])
+    def test_weights_invalid(self, weights):
+        # Arrange
+
+        # Act
+        with pytest.raises(ValueError):
+            Tileset(weights=weights)
+
+        # Assert
+
+    def test_entropy(self):
+        # Arrange
+        tileset = Tileset(weights={0: 3})
+
+        # Act
+        entropy = tileset.entropy
+
+        # Assert
+        assert entropy[0] == -1
+        assert entropy[tileset.get_mask([4])] == 0
+        assert entropy[tileset.get_mask([1, 2])] == pytest.approx(np.log(2))
+        assert entropy[tileset.get_mask([0, 1])] == pytest.approx(-(0.75 * np.log(0.75) + 0.25 * np.log(0.25)))
+        assert np.allclose(Tileset().entropy[1:], np.log(Tileset().popcount[1:].astype(float)))
+
+    @pytest.mark.parametrize("options", [[0], [2, 5], [0, 1, 3], [0, 1, 2, 3, 4, 5, 6]])
+    def test_sample(self, options):
+        # Arrange
+        tileset = Tileset(weights=[1, 2, 3, 4, 5, 6, 7])
+        mask = tileset.get_mask(options)
+        rng = np.random.default_rng(0)
+
+        # Act
+        samples = [tileset.sample(mask, rng) for _ in range(20000)]
+
+        # Assert
+        frequencies = np.bincount(samples, minlength=7) / len(samples)
+        expected = np.zeros(7)
+        expected[options] = tileset.weights[options] / tileset.weights[options].sum()
+        assert np.allclose(frequencies, expected, atol=0.02)
+
+    def test_sample_many(self):
+        # Arrange
+        tileset = Tileset(weights={0: 6})
+        masks = np.full(shape=20000, fill_value=tileset.get_mask([0, 5, 6]), dtype=np.uint8)
+
+        # Act
+        samples = tileset.sample_many(masks, np.random.default_rng(0))
+
+        # Assert
+        assert samples.dtype == np.uint8
+        assert np.allclose(np.bincount(samples, minlength=7) / len(samples), [0.75, 0, 0, 0, 0, 0.125, 0.125], atol=0.02)
+
+    def test_render_out_not_contiguous(self):
+        # Arrange
+        tileset = Tileset()
+        states = np.array([[1, 2], [3, 4]])
+        out = np.zeros(shape=(6, 12), dtype=np.uint8)[:, ::2]
+
+        # Act
+        map = tileset.render(states, out=out)
+
+        # Assert
+        assert map is out
+        assert (out == tileset.render(states)).all()
+
+    def test_freeze(self):
+        # Arrange
+        tileset = Tileset()
+
+        # Act
+        frozen = tileset.freeze()
+
+        # Assert
+        assert frozen is tileset
+        assert isinstance(tileset.tile_list, tuple)
+        assert isinstance(tileset.connection_rules[0]["UP"], tuple)
+        assert tileset.connection_rules[0]["UP"] == (0, 4, 5)
+        assert not tileset.patterns.flags.writeable
+        assert not tileset.support.flags.writeable
+        with pytest.raises(ValueError):
+            tileset.adjacency[0, 0] = 0
+        with pytest.raises(TypeError):
+            tileset.connection_rules[0] = {}
+
+    def test_freeze_keeps_tables(self):
+        # Arrange
+        tileset = Tileset()
+
+        # Act
+        frozen = Tileset().freeze()
+
+        # Assert
+        assert (frozen.adjacency == tileset.adjacency).all()
+        assert (frozen.support == tileset.support).all()
+        assert frozen.fingerprint == tileset.fingerprint
+        assert frozen.get_mask([1, 6]) == tileset.get_mask([1, 6])
+
+    @pytest.mark.parametrize("frozen", [True, False])
+    def test_pickle(self, frozen):
+        # Arrange
+        tileset = Tileset(weights={0: 3, "Tile_5": 0.5})
+        if frozen:
+            tileset.freeze()
+
+        # Act
+        loaded = pickle.loads(pickle.dumps(tileset))
+
+        # Assert
+        assert loaded.fingerprint == tileset.fingerprint
+        assert (loaded.weights == tileset.weights).all()
+        assert (loaded.support == tileset.support).all()
+        assert loaded.connection_rules[1]["UP"] == tileset.connection_rules[1]["UP"]
+        assert loaded.patterns.flags.writeable is not frozen
+        assert isinstance(loaded.tile_list, tuple) is frozen
+
+    def test_get_tileset(self):
+        # Arrange
+
+        # Act
+        tileset = get_tileset()
+
+        # Assert
+        assert get_tileset("default") is tileset
+        assert isinstance(tileset, Tileset)
+        assert not tileset.patterns.flags.writeable
+
+    def test_get_tileset_unknown(self):
+        # Arrange
+
+        # Act
+        with pytest.raises(ValueError):
+            get_tileset("unknown")
+
+        # Assert
@@ -0,0 +1,136 @@
+import numpy as np
+import pytest
+from src.tileset import DIRECTIONS
+from src.world import World
+
+
+class TestWorld:
+    def test_constructor(self):
+        # Arrange
+
+        # Act
+        world = World(chunk_size=4, seed=3, cache_size=2)
+
+        # Assert
+        assert world.chunk_size == 4
+        assert world.resident_chunks == []
+
+    def test_constructor_invalid_chunk_size(self):
+        # Arrange
+
+        # Act / Assert
+        with pytest.raises(ValueError, match="Chunk size"):
+            World(chunk_size=0)
+
+    def test_get_chunk(self):
+        # Arrange
+        world = World(chunk_size=4, seed=3)
+
+        # Act
+        chunk = world.get_chunk(-2, 5)
+
+        # Assert
+        assert chunk.shape == (4, 4)
+        assert chunk.dtype == np.uint8
+        assert not chunk.flags.writeable
+        assert world.get_chunk(-2, 5) is chunk
+
+    @pytest.mark.parametrize("seed", [0, 1, 2])
+    def test_seams(self, seed):
+        # Arrange
+        world = World(chunk_size=4, seed=seed)
+        adjacency = world._tileset.adjacency
+
+        # Act
+        window = world.get_window(-6, -6, 12, 12)
+
+        # Assert
+        right = DIRECTIONS.index("RIGHT")
+        down = DIRECTIONS.index("DOWN")
+        assert (adjacency[right][window[:, :-1]] >> window[:, 1:] & 1).all()
+        assert (adjacency[down][window[:-1, :]] >> window[1:, :] & 1).all()
+
+    def test_lru_eviction(self):
+        # Arrange
+        world = World(chunk_size=3, seed=0, cache_size=2)
+
+        # Act
+        world.get_chunk(0, 0)
+        world.get_chunk(0, 1)
+        world.get_chunk(0, 0)
+        world.get_chunk(1, 0)
+
+        # Assert
+        assert world.resident_chunks == [(0, 0), (1, 0)]
+
+    @pytest.mark.parametrize("level, expected_calls", [("off", 0), ("stats", 2), ("debug", 3)])
+    def test_logging(self, mocker, level, expected_calls):
+        # Arrange
+        world = World(chunk_size=3, seed=0, cache_size=1)
+        logger = mocker.patch("loguru.logger.debug")
+        mocker.patch("src.instrumentation.debug_enabled", level == "debug")
+        mocker.patch("src.instrumentation.stats_enabled", level != "off")
+
+        # Act
+        world.get_chunk(0, 0)
+        world.get_chunk(0, 1)
+
+        # Assert
+        messages = [call.args[0] for call in logger.call_args_list]
+        assert len([message for message in messages if "chunk" in message]) == expected_calls
+
+    def test_regenerate_evicted_chunk(self):
+        # Arrange
+        world = World(chunk_size=4, seed=9, cache_size=1)
+        chunks = {
+            key: world.get_chunk(*key).copy()
+            for key in [(0, 0), (0, 1), (1, 1), (1, 0), (-1, 0)]
+        }
+
+        # Act
+        regenerated = {key: world.get_chunk(*key) for key in reversed(list(chunks))}
+
+        # Assert
+        assert world.resident_chunks == [(0, 0)]
+        for key, chunk in chunks.items():
+            assert (regenerated[key] == chunk).all()
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 3, 4])
+    def test_opposite_neighbours(self, chunk_size):
+        # Arrange
+        world = World(chunk_size=chunk_size, seed=0, cache_size=1)
+        # chunks between two or more chunks already generated
+        keys = [(row, column) for row in range(4) for column in range(4) if (row + column) % 2 == 0]
+        keys += [(row, column) for row in range(4) for column in range(4) if (row + column) % 2 == 1]
+
+        # Act
+        chunks = {key: world.get_chunk(*key).copy() for key in keys}
+
+        # Assert
+        for key, chunk in chunks.items():
+            assert (world.get_chunk(*key) == chunk).all()
+        sides = [sides for _, sides in world._records.values()]
+        assert sum(map(sum, sides)) > 0
+
+    def test_get_window_matches_chunks(self):
+        # Arrange
+        world = World(chunk_size=4, seed=1)
+
+        # Act
+        window = world.get_window(2, -3, 5, 6)
+
+        # Assert
+        assert window.shape == (5, 6)
+        assert (window[:2, :3] == world.get_chunk(0, -1)[2:, 1:]).all()
+        assert (window[2:, 3:] == world.get_chunk(1, 0)[:3, :3]).all()
+
+    def test_get_map(self):
+        # Arrange
+        world = World(chunk_size=4, seed=1)
+
+        # Act
+        map = world.get_map(0, 0, 3, 5)
+
+        # Assert
+        assert map.shape == (9, 15)
+        assert (map == world._tileset.render(world.get_window(0, 0, 3, 5))).all()